@@ -22,56 +22,130 @@ def calculate_starting_dasha(moon_lon):
     balance_years = (1 - proportion_passed) * mahadasha_durations[starting_planet]
     return starting_planet, balance_years, starting_planet_index
 
-def generate_dasha_tree(jd_birth, moon_lon, max_levels=4, num_mahadashas=10):
+# Names of the dasha levels, Mahadasha first
+level_names = ["Maha", "Antar", "Pratyantar", "Sookshma", "Prana", "Deha"]
+
+class DashaPeriod:
     """
-    Generate the Vishmottari Dasha tree up to the specified level.
-    
+    One period of the Vimshottari tree (level 1: Mahadasha ... 6: Deha).
+
+    Sub-periods are not stored: iterating a period computes its nine
+    children from its own span, so a deep tree costs memory only for the
+    periods actually visited.
+    """
+    __slots__ = ("planet", "start_jd", "end_jd", "duration_days", "level", "max_levels")
+
+    def __init__(self, planet, start_jd, duration_days, level=1, max_levels=6):
+        self.planet = planet
+        self.start_jd = start_jd
+        self.end_jd = start_jd + duration_days
+        self.duration_days = duration_days
+        self.level = level
+        self.max_levels = max_levels
+
+    @property
+    def has_sub_periods(self):
+        return self.level < self.max_levels
+
+    def __iter__(self):
+        """Sub-periods in order, starting with the period's own planet."""
+        if not self.has_sub_periods:
+            return
+        total_duration_days = self.end_jd - self.start_jd
+        parent_index = dasha_planets.index(self.planet)
+        current_jd = self.start_jd
+        for p in dasha_planets[parent_index:] + dasha_planets[:parent_index]:
+            sub = DashaPeriod(p, current_jd, (mahadasha_durations[p] / 120.0) * total_duration_days,
+                              self.level + 1, self.max_levels)
+            yield sub
+            current_jd = sub.end_jd
+
+    def sub_period_at(self, jd):
+        """The sub-period running at jd, or None."""
+        for sub in self:
+            if sub.start_jd <= jd < sub.end_jd:
+                return sub
+        return None
+
+    def to_dict(self, max_levels=None):
+        """
+        The period and its sub-periods down to max_levels (default: the
+        tree's depth) as nested dicts, in the generate_dasha_tree format.
+        """
+        max_levels = self.max_levels if max_levels is None else max_levels
+        node = {
+            'planet': self.planet,
+            'start_jd': self.start_jd,
+            'end_jd': self.end_jd,
+            'duration_days': self.duration_days
+        }
+        if self.level == 1 or self.level < max_levels:
+            node['sub_dashas'] = [sub.to_dict(max_levels) for sub in self] if self.level < max_levels else []
+        return node
+
+    def __repr__(self):
+        return f"DashaPeriod({self.planet!r}, {self.start_jd}, {self.end_jd}, level={self.level})"
+
+def dasha_periods(jd_birth, moon_lon, max_levels=6, num_mahadashas=10):
+    """
+    Lazy Vimshottari Dasha tree: the Mahadashas as DashaPeriod objects,
+    whose sub-periods (down to max_levels; 6 is Deha) are computed
+    only when iterated.
+
     Args:
         jd_birth (float): Julian Day of birth.
         moon_lon (float): Moon's sidereal longitude in degrees.
-        max_levels (int): Maximum depth of Dasha levels (1: Maha, 2: Antar, 3: Pratyantar, 4: Sookshma).
+        max_levels (int): Maximum depth of Dasha levels (see level_names).
         num_mahadashas (int): Number of Mahadashas to generate.
-    
+
     Returns:
-        list: List of Mahadasha dictionaries with nested sub-periods.
+        list: List of Mahadasha DashaPeriod objects.
     """
     starting_planet, balance_years, starting_index = calculate_starting_dasha(moon_lon)
     mahadashas = []
     current_jd = jd_birth
 
-    # First Mahadasha (partial duration)
-    first_duration_days = balance_years * 365.25
-    first_end_jd = current_jd + first_duration_days
-    first_mahadasha = {
-        'planet': starting_planet,
-        'start_jd': current_jd,
-        'end_jd': first_end_jd,
-        'duration_days': first_duration_days
-    }
-    mahadashas.append(first_mahadasha)
-    current_jd = first_end_jd
-
-    # Subsequent Mahadashas (full duration)
-    for i in range(1, num_mahadashas):
-        planet_index = (starting_index + i) % 9
-        planet = dasha_planets[planet_index]
-        duration_years = mahadasha_durations[planet]
-        duration_days = duration_years * 365.25
-        end_jd = current_jd + duration_days
-        maha = {
-            'planet': planet,
-            'start_jd': current_jd,
-            'end_jd': end_jd,
-            'duration_days': duration_days
-        }
+    # First Mahadasha (partial duration), then full ones
+    for i in range(num_mahadashas):
+        planet = dasha_planets[(starting_index + i) % 9]
+        duration_years = balance_years if i == 0 else mahadasha_durations[planet]
+        maha = DashaPeriod(planet, current_jd, duration_years * 365.25, 1, max_levels)
         mahadashas.append(maha)
-        current_jd = end_jd
+        current_jd = maha.end_jd
+    return mahadashas
 
-    # Generate sub-periods for each Mahadasha
-    for maha in mahadashas:
-        maha['sub_dashas'] = generate_sub_dashas(maha['planet'], maha['start_jd'], maha['end_jd'], 1, max_levels)
+def running_dashas(jd_birth, moon_lon, jd, max_levels=6):
+    """
+    The chain of periods running at jd, Mahadasha first (one lookup per
+    level, nothing else is expanded).
 
-    return mahadashas
+    Returns:
+        list: DashaPeriod objects, one per level (empty if jd is outside
+        the tree)
+    """
+    chain = []
+    period = next((maha for maha in dasha_periods(jd_birth, moon_lon, max_levels)
+                   if maha.start_jd <= jd < maha.end_jd), None)
+    while period is not None:
+        chain.append(period)
+        period = period.sub_period_at(jd)
+    return chain
+
+def generate_dasha_tree(jd_birth, moon_lon, max_levels=4, num_mahadashas=10):
+    """
+    Generate the Vishmottari Dasha tree up to the specified level.
+    
+    Args:
+        jd_birth (float): Julian Day of birth.
+        moon_lon (float): Moon's sidereal longitude in degrees.
+        max_levels (int): Maximum depth of Dasha levels (1: Maha, 2: Antar, 3: Pratyantar, 4: Sookshma,
+            5: Prana, 6: Deha).
+        num_mahadashas (int): Number of Mahadashas to generate.
+    
+    Returns:
+        list: List of Mahadasha dictionaries with nested sub-periods.
+    """
+    return [maha.to_dict() for maha in dasha_periods(jd_birth, moon_lon, max_levels, num_mahadashas)]
 
 def generate_sub_dashas(parent_planet, start_jd, end_jd, level, max_levels):
     """
@@ -89,28 +163,7 @@ def generate_sub_dashas(parent_planet, start_jd, end_jd, level, max_levels):
     """
     if level >= max_levels:
         return []
-    
-    total_duration_days = end_jd - start_jd
-    parent_index = dasha_planets.index(parent_planet)
-    sub_planets = dasha_planets[parent_index:] + dasha_planets[:parent_index]
-    sub_dashas = []
-    current_jd = start_jd
-
-    for p in sub_planets:
-        duration_days = (mahadasha_durations[p] / 120.0) * total_duration_days
-        sub_end_jd = current_jd + duration_days
-        sub_dasha = {
-            'planet': p,
-            'start_jd': current_jd,
-            'end_jd': sub_end_jd,
-            'duration_days': duration_days
-        }
-        if level < max_levels - 1:
-            sub_dasha['sub_dashas'] = generate_sub_dashas(p, current_jd, sub_end_jd, level + 1, max_levels)
-        sub_dashas.append(sub_dasha)
-        current_jd = sub_end_jd
-
-    return sub_dashas
+    return DashaPeriod(parent_planet, start_jd, end_jd - start_jd, level, max_levels).to_dict()['sub_dashas']
 
 def jd_to_date_str(jd):
     """
@@ -575,7 +575,7 @@ def check_condition(condition_name, positions, house_positions, house_lords, d9_
                 tenth_lord, 
                 positions[tenth_lord], 
                 positions, 
-                divisional_dignities.get(tenth_lord, {})
+                divisional_dignities
             )
             primary_state = p_state # Now it is associated with a value!
         except:
@@ -674,7 +674,7 @@ def estimate_yoga_strength(yoga_name, conditions_met, positions, house_positions
         for p, deg in positions.items():
             if p in ["रा", "के", "Asc"]: continue
             try:
-                _, dignity, _, _ = get_planet_state(p, deg, positions, divisional_dignities.get(p, {}))
+                _, dignity, _, _ = get_planet_state(p, deg, positions, divisional_dignities)
                 if dignity == "Debilitated":
                     planets.add(p)
                     sign = int(deg / 30) + 1
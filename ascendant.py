@@ -0,0 +1,80 @@
+from functools import lru_cache
+import numpy as np
+import pytz
+import swisseph as swe
+from ephemeris import houses_ex
+from utils import get_ayanamsa_array
+from riseset import datetime_to_jd
+
+# Sidereal ascendants for whole arrays of instants at one place, straight
+# from the sidereal time and the obliquity of the ecliptic (no houses_ex
+# call, no swe.set_sid_mode). Precession, nutation and the obliquity change
+# slowly, so they are taken from swisseph once per day and interpolated. houses_ex stays
+# available as the reference (reference_ascendant).
+
+J2000 = 2451545.0
+
+def _earth_rotation_angle(jds):
+    return 360.0 * (0.7790572732640 + 1.00273781191135448 * (jds - J2000))
+
+@lru_cache(maxsize=4096)
+def _day_terms(day):
+    """(true obliquity, apparent sidereal time - Earth rotation angle) at 0h UT of a day."""
+    eps = swe.calc_ut(day, swe.ECL_NUT)[0][0]
+    return eps, (swe.sidtime(day) * 15.0 - _earth_rotation_angle(day)) % 360.0
+
+def _terms(jds):
+    """Obliquity and sidereal time offset (degrees) at each JD, interpolated between days."""
+    day0 = np.floor(jds - 0.5) + 0.5
+    days = np.unique(np.concatenate([day0, day0 + 1.0]))
+    table = np.array([_day_terms(float(day)) for day in days])
+    # The offset (precession + nutation) moves ~0.0001°/day; unwrap across 0/360
+    offset = np.unwrap(table[:, 1], period=360.0)
+    return np.interp(jds, days, table[:, 0]), np.interp(jds, days, offset)
+
+def sidereal_time(jds, lon=0.0):
+    """
+    Local apparent sidereal time and true obliquity (degrees) for an array
+    of JDs (UT): the Earth rotation angle plus swisseph's precession and
+    nutation terms, interpolated from daily values.
+    """
+    jds = np.atleast_1d(np.asarray(jds, dtype=float))
+    eps, offset = _terms(jds)
+    return (_earth_rotation_angle(jds) + offset + lon) % 360.0, eps
+
+def tropical_ascendant(jds, lat, lon):
+    """Tropical ascendant (degrees) for an array of JDs (UT) at one place."""
+    armc, eps = sidereal_time(jds, lon)
+    armc, eps, phi = np.radians(armc), np.radians(eps), np.radians(lat)
+    asc = np.degrees(np.arctan2(np.cos(armc),
+                                -(np.sin(armc) * np.cos(eps) + np.tan(phi) * np.sin(eps))))
+    # Inside the polar circles the formula can give the setting point; like
+    # swisseph, keep the ascendant in the half of the ecliptic east of the MC
+    mc = np.degrees(np.arctan2(np.sin(armc), np.cos(armc) * np.cos(eps)))
+    polar = abs(lat) >= 90.0 - np.degrees(eps)
+    behind_mc = (asc - mc + 180.0) % 360.0 - 180.0 < 0
+    return (asc + np.where(polar & behind_mc, 180.0, 0.0)) % 360.0
+
+def sidereal_ascendant(jds, lat, lon, ayanamsa_type="Lahiri"):
+    """
+    Sidereal ascendant (degrees) for one JD or an array of JDs (UT) at a
+    place, in one vectorized evaluation. Matches houses_ex minus the
+    ayanamsa to well under an arcsecond; within a few hundredths of a
+    degree of the polar circles, where the ascendant sweeps very fast, to a
+    few arcseconds. Inside the polar circles it follows houses_ex, so it
+    jumps by 180° when the ecliptic lies on the horizon.
+    """
+    scalar = np.ndim(jds) == 0
+    jds = np.atleast_1d(np.asarray(jds, dtype=float))
+    asc = (tropical_ascendant(jds, lat, lon) - get_ayanamsa_array(jds, ayanamsa_type)) % 360.0
+    return float(asc[0]) if scalar else asc
+
+def reference_ascendant(jd, lat, lon, ayanamsa_type="Lahiri"):
+    """Sidereal ascendant from swisseph's houses_ex (the reference for sidereal_ascendant)."""
+    tropical = houses_ex(jd, lat, lon, b'W', flags=swe.FLG_SWIEPH)[1][0]
+    return (tropical - float(get_ayanamsa_array(jd, ayanamsa_type))) % 360.0
+
+def datetimes_to_jd(datetimes, tz_name=None):
+    """JDs (UT) of datetimes; naive ones are taken as local time in tz_name."""
+    tz = pytz.timezone(tz_name) if tz_name else pytz.utc
+    return np.array([datetime_to_jd(dt if dt.tzinfo else tz.localize(dt)) for dt in datetimes])
@@ -1,7 +1,7 @@
 import sys
 from PyQt6.QtWidgets import QApplication, QWidget
 from PyQt6.QtGui import QPainter, QPen, QFont, QColor,QFontMetrics
-from PyQt6.QtCore import Qt, QPoint, QRect, QTimer
+from PyQt6.QtCore import Qt, QPoint, QRect, QTimer, QThread, pyqtSignal
 from pathlib import Path
 from PyQt6.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout, 
                              QLabel, QLineEdit, QComboBox, QPushButton, 
@@ -12,9 +12,12 @@ import os
 import sys
 from utils import (calculate_lmt_and_charts_logic, get_nakshatra_from_degree, 
                    get_rashi_from_degree, get_pada_from_degree, calculate_arudha_positions, 
-                   get_divisional_data_package, calculate_yogini_dasha)
+                   get_divisional_data_package, get_all_divisional_data_packages,
+                   calculate_yogini_dasha)
 from varr import DIVISION_NAMES, MOOLA_DASHA_YEARS, RASI_SIGNS
 import swisseph as swe
+import numpy as np
+from ephemeris import calc_ut, houses_ex, init_ephemeris, warm_up
 from datetime import datetime
 import pytz
 from NepalIndia import Nepal_district_data, India_district_data, World_city_data
@@ -23,7 +26,7 @@ from timezonefinder import TimezoneFinder
 from strength import calculate_strengths, calculate_ashtakavarga, get_karaka_info, calculate_sthanabala, calculate_dig_bala, calculate_saptavargaja_bala, calculate_uchcha_bala, get_house_number
 from Yogasf import get_detected_yogas_list
 #from nchart import calculate_panchang_for_date
-from Vishmottari_Dasha import generate_dasha_tree, jd_to_date_str
+from Vishmottari_Dasha import dasha_periods, jd_to_date_str
 print("QT FILE STARTED")
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -43,31 +46,12 @@ os.environ["FONTCONFIG_PATH"] = os.path.join(os.path.dirname(__file__), "etc", "
 os.environ["PATH"] += os.pathsep + os.path.join(os.path.dirname(__file__), "bin")
 os.environ["G_MESSAGES_DEBUG"] = ""  # Suppress GLib-GIO warnings
 
-def set_ephemeris_path():
-    try:
-        if getattr(sys, 'frozen', False):
-            # PyInstaller bundle: use _MEIPASS for extracted files
-            base_path = Path(sys._MEIPASS)
-        else:
-            # Development: use script's directory
-            base_path = Path(__file__).parent
-        ephe_path = base_path / "ephe"
-        if not ephe_path.exists():
-            raise FileNotFoundError(f"Ephemeris folder not found at: {ephe_path}")
-        se1_files = list(ephe_path.glob("*.se1"))
-        if not se1_files:
-            raise FileNotFoundError(f"No .se1 ephemeris files found in: {ephe_path}")
-        swe.set_ephe_path(str(ephe_path))
-        return str(ephe_path)
-    except (FileNotFoundError, Exception):
-        sys.exit(1)
-
 # Define base directory and font path
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 FONT_PATH = os.path.join(BASE_DIR, "fonts", "NotoSansDevanagariUI-Regular.ttf")
 
 # Set ephemeris path and store it globally
-EPHE_PATH = set_ephemeris_path()
+EPHE_PATH = init_ephemeris()
 # --- Font Configuration ---
 DEV_FONT_FAMILY = "Mangal"  # Primary choice
 FALLBACK_FONTS = ["Noto Sans Devanagari", "Mangal", "Nirmala UI", "Arial"]  # Fallback options
@@ -209,6 +193,23 @@ class AVChartWidget(QWidget):
         for i, val in enumerate(self.data):
             if i < len(centers):
                 p.drawText(centers[i][0]-5, centers[i][1]+5, str(val))
+class DivisionPackageWorker(QThread):
+    """Builds every divisional chart package of one chart off the UI thread."""
+    packages_ready = pyqtSignal(int, dict)  # chart id, {"D1": (chart_data, rashi_nums, title), ...}
+
+    def __init__(self, chart_id, positions, retro, combust, parent=None):
+        super().__init__(parent)
+        self.chart_id = chart_id
+        self.chart_args = (dict(positions), dict(retro), dict(combust))
+
+    def run(self):
+        try:
+            packages = get_all_divisional_data_packages(*self.chart_args)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            packages = {}
+        self.packages_ready.emit(self.chart_id, packages)
 class AstrologyApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -414,6 +415,7 @@ class AstrologyApp(QMainWindow):
         
         # --- Other Tabs ---
         self.vimshottari_view = self.create_dasha_view("Vimshottari Dasha", "vimshottari")
+        self.vimshottari_table.itemExpanded.connect(self.on_vimshottari_expanded)
         self.moola_view = self.create_dasha_view("Moola Dasha", "moola")
         self.yogini_view = self.create_dasha_view("Yogini Dasha", "yogini")
         self.strength_view = self.create_strength_view()
@@ -1228,36 +1230,30 @@ class AstrologyApp(QMainWindow):
 
         if moon_lon is None: return
 
-        # 1. Get the nested data
-        dasha_data = generate_dasha_tree(jd, moon_lon)
-
-        # 2. Clear the tree
+        # 1. Lazy tree down to Deha; sub-periods are computed on expansion
         tree = self.vimshottari_table # This is now a QTreeWidget
         tree.clear()
-
-        # 3. Recursive function to fill the tree
-        def add_dasha_items(parent_item, dasha_list):
-            for dasha in dasha_list:
-                # Format dates and duration
-                start_str = jd_to_date_str(dasha['start_jd'])
-                end_str = jd_to_date_str(dasha['end_jd'])
-                duration = f"{dasha['duration_days'] / 365.25:.2f} yrs"
-                
-                # Create a tree row
-                item = QTreeWidgetItem([str(dasha['planet']), start_str, end_str, duration])
-                
-                # Add to parent (either the tree itself or a Mahadasha item)
-                if parent_item == tree:
-                    tree.addTopLevelItem(item)
-                else:
-                    parent_item.addChild(item)
-                
-                # If there are sub-dashas (Antar, Pratyantar...), call this function again
-                if 'sub_dashas' in dasha and dasha['sub_dashas']:
-                    add_dasha_items(item, dasha['sub_dashas'])
-
-        # Start the recursive process
-        add_dasha_items(tree, dasha_data)
+        for maha in dasha_periods(jd, moon_lon, max_levels=6):
+            tree.addTopLevelItem(self.make_dasha_item(maha))
+
+    def make_dasha_item(self, period):
+        """Tree row for a DashaPeriod; its children are added when it is expanded"""
+        # Prana and Deha periods last days or hours
+        days = period.duration_days
+        duration = (f"{days / 365.25:.2f} yrs" if days >= 365.25 else
+                    f"{days:.2f} days" if days >= 1 else f"{days * 24:.2f} hrs")
+        item = QTreeWidgetItem([str(period.planet), jd_to_date_str(period.start_jd),
+                                jd_to_date_str(period.end_jd), duration])
+        item.setData(0, Qt.ItemDataRole.UserRole, period)
+        if period.has_sub_periods:
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        return item
+
+    def on_vimshottari_expanded(self, item):
+        period = item.data(0, Qt.ItemDataRole.UserRole)
+        if period is None or item.childCount():
+            return
+        item.addChildren([self.make_dasha_item(sub) for sub in period])
     def calculate_moola(self):
         """Calculate Moola Dasha based on strict Vedic norms"""
         if not hasattr(self, 'current_astro_data'):
@@ -1962,38 +1958,18 @@ class AstrologyApp(QMainWindow):
     def _calculate_retrograde_end(self, jd_start, planet_pid, lat, lon, ayanamsa_type, days_limit=90):
         """Calculate when a planet becomes direct (speed changes from negative to positive)"""
         try:
-            from astropy.time import Time
-            from utils import get_ayanamsa
-            
-            flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+            from utils import PLANETS, format_jd
+            from retrograde import current_cycle
             
-            # Check if currently retrograde
-            initial_speed = swe.calc_ut(jd_start, planet_pid, flags)[0][3]
-            if initial_speed >= 0:
+            # Look up the cached retrograde cycle the planet is in right now
+            planet_key = next(k for k, pid in PLANETS.items() if pid == planet_pid)
+            cycle = current_cycle(planet_key, jd_start, ayanamsa_type)
+            if cycle is None:
                 return None  # Already direct
             
-            for day in range(1, days_limit + 1):
-                jd_check = jd_start + day
-                speed = swe.calc_ut(jd_check, planet_pid, flags)[0][3]
-                
-                if speed >= 0:  # Planet is now direct or stationary
-                    # Binary search for exact moment
-                    jd_low = jd_check - 1
-                    jd_high = jd_check
-                    for _ in range(25):  # High precision
-                        jd_mid = (jd_low + jd_high) / 2
-                        speed_mid = swe.calc_ut(jd_mid, planet_pid, flags)[0][3]
-                        if speed_mid < 0:
-                            jd_low = jd_mid
-                        else:
-                            jd_high = jd_mid
-                        if jd_high - jd_low < 1e-7:
-                            break
-                    
-                    t = Time(jd_high, format='jd', scale='utc')
-                    return t.datetime.strftime("%d-%m-%Y")
-            
-            return f">{days_limit} days"  # Not found within limit
+            if cycle["station_direct"] - jd_start > days_limit:
+                return f">{days_limit} days"  # Not found within limit
+            return format_jd(cycle["station_direct"])
             
         except Exception as e:
             return None
@@ -2002,81 +1978,20 @@ class AstrologyApp(QMainWindow):
     def _calculate_combustion_end(self, jd_start, planet_pid, sun_pid, lat, lon, ayanamsa_type, days_limit=90):
         """Calculate when a planet moves out of combustion orb from Sun"""
         try:
-            from astropy.time import Time
-            from utils import get_ayanamsa
-            
-            flags = swe.FLG_SWIEPH
-            
-            # Get ayanamsa for sidereal calculation
-            ayan_deg = get_ayanamsa(jd_start, ayanamsa_type)
-            
-            # Check if currently combust using SIDEREAL positions
-            sun_pos_tropical = swe.calc_ut(jd_start, sun_pid, flags)[0][0]
-            planet_pos_tropical = swe.calc_ut(jd_start, planet_pid, flags)[0][0]
-            
-            # Convert to sidereal
-            sun_pos_sidereal = (sun_pos_tropical - ayan_deg) % 360
-            planet_pos_sidereal = (planet_pos_tropical - ayan_deg) % 360
-            
-            # Calculate angular distance (shortest path)
-            diff = abs(planet_pos_sidereal - sun_pos_sidereal) % 360
-            dist = min(diff, 360 - diff)
-            
-            # Combustion orbs: Venus/Shukra = 8-10°, Mercury/Budh = 8-12°, others = 6°
-            planet_orbs = {
-                swe.MERCURY: 10,  # Budh
-                swe.VENUS: 8,     # Shukra (currently 8-10 degrees)
-                swe.MARS: 6,
-                swe.JUPITER: 6,
-                swe.SATURN: 6,
-                swe.MOON: 12      # Chandra
-            }
-            combust_orb = planet_orbs.get(planet_pid, 6)
-            
-            if dist >= combust_orb:
+            from combustion import current_combustion
+            from utils import PLANETS, format_jd
+            
+            # Combustion spells come from the cached per-year interval index
+            # (transit orbs: Mercury 10°, Venus 8°, Moon 12°, others 6°)
+            planet_key = next(k for k, pid in PLANETS.items() if pid == planet_pid)
+            spell = current_combustion(planet_key, jd_start, "transit")
+            if spell is None:
                 return None  # Not combust
             
-            # Search for when it clears the orb
-            for day in range(1, days_limit + 1):
-                jd_check = jd_start + day
-                
-                ayan_check = get_ayanamsa(jd_check, ayanamsa_type)
-                sun_tropical = swe.calc_ut(jd_check, sun_pid, flags)[0][0]
-                planet_tropical = swe.calc_ut(jd_check, planet_pid, flags)[0][0]
-                
-                sun_sidereal = (sun_tropical - ayan_check) % 360
-                planet_sidereal = (planet_tropical - ayan_check) % 360
-                
-                diff = abs(planet_sidereal - sun_sidereal) % 360
-                angular_dist = min(diff, 360 - diff)
-                
-                if angular_dist >= combust_orb:  # Out of combustion
-                    # Binary search for exact moment
-                    jd_low = jd_check - 1
-                    jd_high = jd_check
-                    for _ in range(25):
-                        jd_mid = (jd_low + jd_high) / 2
-                        ayan_mid = get_ayanamsa(jd_mid, ayanamsa_type)
-                        sun_mid = swe.calc_ut(jd_mid, sun_pid, flags)[0][0]
-                        planet_mid = swe.calc_ut(jd_mid, planet_pid, flags)[0][0]
-                        
-                        sun_mid_sid = (sun_mid - ayan_mid) % 360
-                        planet_mid_sid = (planet_mid - ayan_mid) % 360
-                        
-                        diff_mid = abs(planet_mid_sid - sun_mid_sid) % 360
-                        dist_mid = min(diff_mid, 360 - diff_mid)
-                        
-                        if dist_mid < combust_orb:
-                            jd_low = jd_mid
-                        else:
-                            jd_high = jd_mid
-                        if jd_high - jd_low < 1e-4:
-                            break
-                    
-                    t = Time(jd_high, format='jd', scale='utc')
-                    return t.datetime.strftime("%d-%m-%Y")
-            
-            return f">{days_limit} days"
+            end = spell[1]
+            if end - jd_start > days_limit:
+                return f">{days_limit} days"
+            return format_jd(end)
             
         except Exception as e:
             print(f"Error calculating combustion end: {e}")
@@ -2090,8 +2005,8 @@ class AstrologyApp(QMainWindow):
             flags = swe.FLG_SWIEPH
             ayan = get_ayanamsa(jd, ayanamsa_type)
 
-            sun_lon = swe.calc_ut(jd, swe.SUN, flags)[0][0]
-            planet_lon = swe.calc_ut(jd, planet_pid, flags)[0][0]
+            sun_lon = calc_ut(jd, swe.SUN, flags)[0][0]
+            planet_lon = calc_ut(jd, planet_pid, flags)[0][0]
 
             sun_sid = (sun_lon - ayan) % 360
             planet_sid = (planet_lon - ayan) % 360
@@ -2137,7 +2052,7 @@ class AstrologyApp(QMainWindow):
             positions, retro_flags, combust_flags, ayan_deg = get_sidereal_positions(jd, ayanamsa_type)
             
             # Add Ascendant for chart calculation
-            house_result = swe.houses_ex(jd, lat, lon, b'W', flags=swe.FLG_SWIEPH)
+            house_result = houses_ex(jd, lat, lon, b'W', flags=swe.FLG_SWIEPH)
             asc_tropical = house_result[1][0]
             asc_sidereal = (asc_tropical - ayan_deg) % 360
             positions['Asc'] = asc_sidereal
@@ -2304,7 +2219,7 @@ class AstrologyApp(QMainWindow):
             self.gochar_d9_chart.update()
             
             # 7. Calculate Upagrahas
-            panchang_result = calculate_panchang(jd, lat, lon, tz_name, positions)
+            panchang_result = calculate_panchang(jd, lat, lon, tz_name, positions, ayanamsa_type)
             
             if panchang_result['status'] == 'success':
                 panchang_data = panchang_result['data']
@@ -2453,14 +2368,22 @@ class AstrologyApp(QMainWindow):
         panchang = data.get('panchang', {})
         panchang_data = panchang.get('data', {})
         
+        def with_end(key):
+            # "name" plus "DD-MM HH:MM सम्म" (until) when the end time is known
+            end = panchang_data.get(f'{key}_end')
+            value = panchang_data.get(key, 'N/A')
+            return f"{value}\n{end[8:10]}-{end[5:7]} {end[11:16]} सम्म" if end else value
+
         elements = [
-            ("तिथि:", panchang_data.get('tithi', 'N/A')),
-            ("नक्षत्र:", panchang_data.get('nakshatra', 'N/A')),
-            ("योग:", panchang_data.get('yoga', 'N/A')),
-            ("करण:", panchang_data.get('karana', 'N/A')),
+            ("तिथि:", with_end('tithi')),
+            ("नक्षत्र:", with_end('nakshatra')),
+            ("योग:", with_end('yoga')),
+            ("करण:", with_end('karana')),
             ("वार:", panchang_data.get('weekday', 'N/A')),
             ("सूर्योदय:", panchang_data.get('sunrise', 'N/A')),
             ("सूर्यास्त:", panchang_data.get('sunset', 'N/A')),
+            ("चन्द्रोदय:", panchang_data.get('moonrise', 'N/A')),
+            ("चन्द्रास्त:", panchang_data.get('moonset', 'N/A')),
             ("नाडी:", panchang_data.get('nadi', 'N/A')),
             ("गण:", panchang_data.get('gana', 'N/A')),
             ("योनी:", panchang_data.get('yoni', 'N/A')),
@@ -2552,16 +2475,17 @@ class AstrologyApp(QMainWindow):
         retro = data['retro_flags']
         combust = data['combust_flags']
         
-        # 2. D1 and D9 Charts (Fixed Widgets)
-        d1_pkg = get_divisional_data_package("D1", pos, retro, combust)
-        self.charts_layout.addWidget(NorthChartWidget(*d1_pkg))
+        # The three charts shown right away come from one varga pass; every
+        # other division is built in the background for the selector
+        shown = get_all_divisional_data_packages(pos, retro, combust, (1, 9, 60))
+        self.start_division_precompute(pos, retro, combust, shown)
 
-        d9_pkg = get_divisional_data_package("D9", pos, retro, combust)
-        self.charts_layout.addWidget(NorthChartWidget(*d9_pkg))
+        # 2. D1 and D9 Charts (Fixed Widgets)
+        self.charts_layout.addWidget(NorthChartWidget(*shown["D1"]))
+        self.charts_layout.addWidget(NorthChartWidget(*shown["D9"]))
 
         # 3. Dynamic Chart (Defaults to D60)
-        d60_pkg = get_divisional_data_package("D60", pos, retro, combust)
-        self.dynamic_chart_widget = NorthChartWidget(*d60_pkg)
+        self.dynamic_chart_widget = NorthChartWidget(*shown["D60"])
         self.charts_layout.addWidget(self.dynamic_chart_widget)
         self.division_selector.setCurrentText(DIVISION_NAMES[60])
         # 4. Handle Signal safely
@@ -2828,6 +2752,27 @@ class AstrologyApp(QMainWindow):
             self.bs_timer.setSingleShot(True)
             self.bs_timer.timeout.connect(self.sync_greg_from_bs)
         self.bs_timer.start(500)  # 500ms delay
+    def start_division_precompute(self, positions, retro, combust, packages=None):
+        """Start building every division's chart package for the current chart."""
+        self.division_packages = dict(packages or {})
+        self.pending_division_index = None
+        # Packages from an older chart are dropped when they arrive
+        self.division_chart_id = getattr(self, 'division_chart_id', 0) + 1
+        worker = DivisionPackageWorker(self.division_chart_id, positions, retro, combust, self)
+        worker.packages_ready.connect(self.on_division_packages_ready)
+        worker.finished.connect(worker.deleteLater)
+        self.division_worker = worker
+        worker.start()
+
+    def on_division_packages_ready(self, chart_id, packages):
+        if chart_id != self.division_chart_id:
+            return
+        self.division_packages.update(packages)
+        self.division_worker = None
+        if self.pending_division_index is not None:
+            index, self.pending_division_index = self.pending_division_index, None
+            self.on_division_selector_changed(index)
+
     def on_division_selector_changed(self, index):
         if index < 0 or not hasattr(self, 'current_pos'):
             return
@@ -2843,11 +2788,17 @@ class AstrologyApp(QMainWindow):
         division_num = int(match.group(1))
         div_code = f"D{division_num}"
         
-        # Recalculate divisional chart
-        new_pkg = get_divisional_data_package(div_code, 
-                                            self.current_pos, 
-                                            self.current_retro, 
-                                            self.current_combust)
+        # Precomputed by DivisionPackageWorker; if it is still running, the
+        # chart is drawn as soon as the packages arrive
+        new_pkg = getattr(self, 'division_packages', {}).get(div_code)
+        if new_pkg is None:
+            if getattr(self, 'division_worker', None) is not None:
+                self.pending_division_index = index
+                return
+            new_pkg = get_divisional_data_package(div_code,
+                                                  self.current_pos,
+                                                  self.current_retro,
+                                                  self.current_combust)
         
         # Update the dynamic chart widget
         if hasattr(self, 'dynamic_chart_widget'):
@@ -2856,6 +2807,8 @@ class AstrologyApp(QMainWindow):
             self.dynamic_chart_widget.chart_title = selected_text
             self.dynamic_chart_widget.update()
 if __name__ == "__main__":
+    # Read the 1900-2100 ephemeris files while the window is being built
+    warm_up(swe.julday(1900, 1, 1, 0.0), swe.julday(2100, 1, 1, 0.0))
     app = QApplication(sys.argv)
     window = AstrologyApp()
     window.show()
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+import pytz
+from BS_DATABASE import BS_DATABASE, bs_to_gregorian
+from varr import VEDIC_WEEKDAYS, month_names
+from suncache import get_sun_events
+from riseset import datetime_to_jd, jd_to_local
+from tableio import write_rows
+from transitions import element_spans, ELEMENTS
+from nchart import RK_INDEX, DAY_SLICES
+
+# One Bikram Sambat year per location in a single pass: sunrises come from
+# the sunrise cache, and the tithi/nakshatra/yoga/karana spans of a whole
+# BS month come from one transitions.element_spans call. Rows are yielded
+# month by month, so memory stays flat however many years are generated.
+
+COLUMNS = [
+    "bs_date", "bs_month", "ad_date", "weekday", "sunrise", "sunset",
+    "tithi", "tithi_end", "kshaya_tithi", "adhika_tithi",
+    "nakshatra", "nakshatra_end", "yoga", "yoga_end", "karana", "karana_end",
+    "rahu_kalam",
+]
+
+def _month_days(bs_year, bs_month):
+    """(BS date string, Gregorian date) for every day of a BS month."""
+    first = datetime.strptime(bs_to_gregorian(f"{bs_year}-{bs_month:02d}-01"), "%Y-%m-%d").date()
+    for day in range(BS_DATABASE[bs_year][bs_month - 1]):
+        yield f"{bs_year:04d}-{bs_month:02d}-{day + 1:02d}", first + timedelta(days=day)
+
+def _span_at(spans, jd):
+    return next((s for s in spans if s["start"] <= jd < s["end"]), None)
+
+def iter_calendar(bs_year, lat, lon, tz_name, ayanamsa_type="Lahiri", end_year=None):
+    """
+    Daily panchang rows for BS years bs_year..end_year (inclusive).
+
+    Elements are the ones prevailing at sunrise (udaya tithi etc.), each
+    with its end time. 'kshaya_tithi' names a tithi that starts and ends
+    between this day's sunrise and the next one (so no day is named after
+    it); 'adhika_tithi' is True when the udaya tithi is the same as the
+    previous day's.
+
+    Yields:
+        dict per day with the keys in COLUMNS (times as local 'HH:MM:SS',
+        end times as local 'YYYY-MM-DD HH:MM:SS')
+    """
+    tz = pytz.timezone(tz_name)
+    end_year = bs_year if end_year is None else end_year
+    prev_tithi = None
+    for year in range(bs_year, end_year + 1):
+        if year not in BS_DATABASE:
+            raise ValueError(f"BS year {year} is outside the calendar table")
+        for month in range(1, 13):
+            days = list(_month_days(year, month))
+            # One more sunrise than days, to see what happens before the next one
+            events = [get_sun_events(d, lat, lon, tz_name)
+                      for d in [greg for _, greg in days] + [days[-1][1] + timedelta(days=1)]]
+            rises = [datetime_to_jd(e["rise"]) if e["rise"] else None for e in events]
+            known = [jd for jd in rises if jd is not None]
+            if not known:
+                raise ValueError(f"No sunrise at {lat}, {lon} in BS {year}-{month:02d}")
+            spans = element_spans(min(known), max(known), ayanamsa_type)
+
+            for i, (bs_date, greg) in enumerate(days):
+                rise, sunset = events[i]["rise"], events[i]["set"]
+                row = dict.fromkeys(COLUMNS, "")
+                row.update({
+                    "bs_date": bs_date, "bs_month": month_names[month - 1],
+                    "ad_date": greg.isoformat(),
+                    "weekday": VEDIC_WEEKDAYS[(greg.weekday() + 1) % 7],
+                    "sunrise": rise.strftime("%H:%M:%S") if rise else "",
+                    "sunset": sunset.strftime("%H:%M:%S") if sunset else "",
+                    "adhika_tithi": False,
+                })
+                if rises[i] is not None:
+                    for element in ELEMENTS:
+                        span = _span_at(spans[element], rises[i])
+                        row[element] = span["name"]
+                        row[f"{element}_end"] = jd_to_local(span["end"], tz).strftime("%Y-%m-%d %H:%M:%S")
+                    tithi = _span_at(spans["tithi"], rises[i])
+                    row["adhika_tithi"] = prev_tithi is not None and tithi["index"] == prev_tithi
+                    prev_tithi = tithi["index"]
+                    if rises[i + 1] is not None:
+                        skipped = [s["name"] for s in spans["tithi"]
+                                   if s["start"] > rises[i] and s["end"] <= rises[i + 1]]
+                        row["kshaya_tithi"] = ", ".join(skipped)
+                else:
+                    prev_tithi = None
+                if rise and sunset:
+                    part = (sunset - rise) / DAY_SLICES
+                    start = rise + part * RK_INDEX[greg.weekday()]
+                    row["rahu_kalam"] = f"{start.strftime('%H:%M')} - {(start + part).strftime('%H:%M')}"
+                yield row
+
+def generate_calendar(bs_year, lat, lon, tz_name, path, ayanamsa_type="Lahiri", end_year=None):
+    """
+    Write the calendar for BS years bs_year..end_year to path; the format
+    follows the extension (.csv, .jsonl or .parquet).
+
+    Returns:
+        int: number of days written
+    """
+    return write_rows(iter_calendar(bs_year, lat, lon, tz_name, ayanamsa_type, end_year), path, COLUMNS,
+                      "calendar", bool_columns=("adhika_tithi",))
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("usage: python bscalendar.py BS_YEAR OUTPUT[.csv|.jsonl|.parquet] [LAT LON TZ]")
+        sys.exit(1)
+    lat, lon, tz_name = (float(sys.argv[3]), float(sys.argv[4]), sys.argv[5]) if len(sys.argv) > 5 \
+        else (27.7172, 85.3240, "Asia/Kathmandu")
+    print(f"{generate_calendar(int(sys.argv[1]), lat, lon, tz_name, sys.argv[2])} days written")
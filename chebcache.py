@@ -0,0 +1,264 @@
+import json
+from pathlib import Path
+import numpy as np
+from numpy.polynomial import chebyshev as C
+import swisseph as swe
+
+# Piecewise Chebyshev fits of tropical longitude and speed, stored as one
+# float64 array (one row per segment) in a .npy file that is opened with
+# mmap_mode='r', so every process reading it shares the same pages.
+# Evaluation is pure NumPy; swisseph is only needed to build the file and
+# for the few minutes a planet spends behind the Sun's disk.
+
+DEGREE = 13
+TOLERANCE = 1e-5        # degrees of longitude (0.036")
+SPEED_TOLERANCE = 1e-4  # degrees/day
+DEFAULT_YEARS = (1900, 2100)
+# Segments are halved down to this length; one that still misses the
+# tolerance stops the build, unless the body is behind the Sun's disk
+MIN_SEGMENT_DAYS = 1.0 / 64.0
+# swisseph's light deflection is not smooth inside the solar disk (its
+# speed steps by up to ~0.07 deg/day there), so those few minutes around a
+# conjunction are left to swisseph instead of a fit
+SUN_RADIUS_DEG = 16.0 / 60.0
+# Each fit is compared with swisseph at this many points per segment
+# (Chebyshev extrema spacing, both ends included)
+CHECK_POINTS = 128
+
+# Starting segment length (days) per body; segments that miss the tolerance are halved
+SEGMENT_DAYS = {
+    swe.SUN: 32.0, swe.MOON: 4.0, swe.MERCURY: 8.0, swe.VENUS: 16.0,
+    swe.MARS: 16.0, swe.JUPITER: 32.0, swe.SATURN: 32.0,
+    swe.MEAN_NODE: 64.0, swe.TRUE_NODE: 2.0,
+}
+DEFAULT_BODIES = (swe.SUN, swe.MOON, swe.MARS, swe.MERCURY, swe.JUPITER,
+                  swe.VENUS, swe.SATURN, swe.MEAN_NODE)
+
+def default_path(start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1]):
+    from utils import CACHE_DIR
+    return CACHE_DIR / f"cheb_{start_year}_{end_year}.npy"
+
+def _meta_path(path):
+    return Path(path).with_suffix(".json")
+
+def _grid_bound(err):
+    """
+    Per-segment error bound from errors on the check grid: the larger end of
+    each grid step plus the change across it, which covers a peak (or a
+    small jump in swisseph) between two grid points.
+    """
+    ends = np.maximum(np.abs(err[:, :-1]), np.abs(err[:, 1:]))
+    return (ends + np.abs(np.diff(err, axis=1))).max(axis=1)
+
+def _fit_segments(body, starts, lengths, degree):
+    """
+    Interpolate longitude and speed on each segment at the Chebyshev nodes
+    and measure the error against swisseph on a dense grid of CHECK_POINTS
+    (incl. both ends).
+
+    Longitude and speed get separate series: swisseph's speed is its own
+    numerical derivative and is matched better directly than through the
+    derivative of the longitude fit.
+    """
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    n = degree + 1
+    nodes = np.cos(np.pi * (np.arange(n) + 0.5) / n)
+    checks = np.cos(np.pi * np.arange(CHECK_POINTS) / (CHECK_POINTS - 1))
+    inv_vander = np.linalg.inv(C.chebvander(nodes, degree))
+    half = lengths[:, None] / 2.0
+
+    def sample(x):
+        jds = (starts[:, None] + half * (x[None, :] + 1.0)).ravel().tolist()
+        rows = np.array([swe.calc_ut(jd, body, flags)[0] for jd in jds])
+        return rows[:, 0].reshape(len(starts), -1), rows[:, 3].reshape(len(starts), -1)
+
+    lon, speed = sample(nodes)
+    lon = np.unwrap(lon, period=360.0, axis=1)
+    coeffs = np.stack([lon @ inv_vander.T, speed @ inv_vander.T], axis=1)
+
+    ref_lon, ref_speed = sample(checks)
+    fit_lon = C.chebval(checks, coeffs[:, 0].T, tensor=True)
+    fit_speed = C.chebval(checks, coeffs[:, 1].T, tensor=True)
+    return coeffs, _grid_bound((fit_lon - ref_lon + 180.0) % 360.0 - 180.0), _grid_bound(fit_speed - ref_speed)
+
+def _behind_sun(body, jds):
+    """Whether the body is within the Sun's disk (geocentric separation) at each JD."""
+    flags = swe.FLG_SWIEPH
+    out = []
+    for jd in jds.tolist():
+        lon, lat = swe.calc_ut(jd, body, flags)[0][:2]
+        sun_lon, sun_lat = swe.calc_ut(jd, swe.SUN, flags)[0][:2]
+        d_lon = (lon - sun_lon + 180.0) % 360.0 - 180.0
+        out.append(np.hypot(d_lon * np.cos(np.radians(lat)), lat - sun_lat) < SUN_RADIUS_DEG)
+    return np.array(out, dtype=bool)
+
+def _fit_body(body, jd0, jd1, seg_days, degree, tolerance=TOLERANCE, speed_tolerance=SPEED_TOLERANCE):
+    """
+    Fit one body, halving only the segments that miss the tolerance
+    (e.g. near conjunctions with the Sun, where light deflection changes
+    quickly).
+
+    Returns:
+        (starts, lengths, coeffs, lon_err, speed_err) sorted by start;
+        coeffs has shape (segments, 2, degree + 1)
+
+    Raises:
+        ValueError: a segment of MIN_SEGMENT_DAYS still misses the tolerance
+    """
+    count = int(np.ceil((jd1 - jd0) / seg_days))
+    starts = jd0 + seg_days * np.arange(count)
+    lengths = np.minimum(seg_days, jd1 - starts)
+
+    done = []
+    while starts.size:
+        coeffs, lon_err, speed_err = _fit_segments(body, starts, lengths, degree)
+        ok = (lon_err <= tolerance) & (speed_err <= speed_tolerance)
+        stuck = ~ok & (lengths <= MIN_SEGMENT_DAYS)
+        if stuck.any():
+            behind = _behind_sun(body, starts[stuck] + lengths[stuck] / 2.0)
+            if not behind.all():
+                i = np.nonzero(stuck)[0][np.argmin(behind)]
+                raise ValueError(f"{swe.get_planet_name(body)} misses the tolerance on the "
+                                 f"{lengths[i] * 1440:.1f}-minute segment at JD {starts[i]:.6f}: "
+                                 f"{lon_err[i]:.2e} deg, {speed_err[i]:.2e} deg/day")
+            # NaN coefficients: evaluated by swisseph (no fit error)
+            coeffs[stuck] = np.nan
+            lon_err[stuck] = speed_err[stuck] = 0.0
+            ok |= stuck
+        done.append((starts[ok], lengths[ok], coeffs[ok], lon_err[ok], speed_err[ok]))
+        half = lengths[~ok] / 2.0
+        starts = np.concatenate([starts[~ok], starts[~ok] + half])
+        lengths = np.concatenate([half, half])
+
+    starts, lengths, coeffs, lon_err, speed_err = (np.concatenate(parts) for parts in zip(*done))
+    order = np.argsort(starts)
+    return starts[order], lengths[order], coeffs[order], lon_err[order], speed_err[order]
+
+def build(path=None, start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1],
+          bodies=DEFAULT_BODIES, degree=DEGREE, tolerance=TOLERANCE, speed_tolerance=SPEED_TOLERANCE):
+    """
+    Precompute the Chebyshev cache from the bundled ephemeris files.
+
+    Args:
+        path: output .npy path (default: CACHE_DIR/cheb_<start>_<end>.npy)
+        start_year, end_year (int): covered range, 1 Jan start_year to
+            1 Jan end_year + 1
+        bodies: swisseph body ids
+        degree (int): polynomial degree per segment
+        tolerance, speed_tolerance (float): largest error allowed on any
+            fitted segment, degrees and degrees/day
+
+    Returns:
+        Path: the written .npy file (metadata goes next to it as .json)
+
+    Raises:
+        ValueError: a segment still misses the tolerance at MIN_SEGMENT_DAYS
+    """
+    from ephemeris import init_ephemeris
+    init_ephemeris()
+    path = Path(path) if path else default_path(start_year, end_year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    jd0 = swe.julday(start_year, 1, 1, 0.0)
+    jd1 = swe.julday(end_year + 1, 1, 1, 0.0)
+    fits = {body: _fit_body(body, jd0, jd1, SEGMENT_DAYS.get(body, 8.0), degree, tolerance, speed_tolerance)
+            for body in bodies}
+
+    # Row layout: [segment start, segment length, lon coeffs..., speed coeffs...]
+    n = degree + 1
+    total = sum(f[0].size for f in fits.values())
+    table = np.lib.format.open_memmap(path, mode="w+", dtype="f8", shape=(total, 2 + 2 * n))
+    meta = {"jd_start": jd0, "jd_end": jd1, "degree": degree,
+            "tolerance": tolerance, "speed_tolerance": speed_tolerance, "bodies": {}}
+    offset = 0
+    for body, (starts, lengths, coeffs, lon_err, speed_err) in fits.items():
+        rows = slice(offset, offset + starts.size)
+        table[rows, 0] = starts
+        table[rows, 1] = lengths
+        table[rows, 2:] = coeffs.reshape(starts.size, 2 * n)
+        meta["bodies"][str(body)] = {
+            "offset": offset, "count": int(starts.size),
+            "min_segment_days": float(lengths.min()),
+            "exact_segments": int(np.isnan(coeffs[:, 0, 0]).sum()),
+            "max_lon_error": float(lon_err.max()), "max_speed_error": float(speed_err.max()),
+        }
+        offset += starts.size
+    table.flush()
+    del table
+    _meta_path(path).write_text(json.dumps(meta, indent=1))
+    return path
+
+class ChebEphemeris:
+    """
+    Read-only view of a Chebyshev cache file.
+
+    longitude(body, jds) returns tropical (longitude, speed) arrays, the same
+    columns 0 and 3 swe.calc_ut gives, without calling swisseph.
+    """
+
+    def __init__(self, path=None):
+        path = Path(path) if path else default_path()
+        self.path = path
+        self.meta = json.loads(_meta_path(path).read_text())
+        self.table = np.load(path, mmap_mode="r")
+        self.jd_start = self.meta["jd_start"]
+        self.jd_end = self.meta["jd_end"]
+
+    def covers(self, body, jds):
+        jds = np.asarray(jds, dtype=float)
+        return (str(body) in self.meta["bodies"]
+                and bool(np.all((jds >= self.jd_start) & (jds < self.jd_end))))
+
+    def error_bound(self, body):
+        """
+        (longitude error in degrees, speed error in degrees/day): the largest
+        difference from swisseph over all fitted segments, bounded at build
+        time from the CHECK_POINTS grid (see _grid_bound) and within the
+        build tolerance. Segments left to swisseph add no error.
+        """
+        info = self.meta["bodies"][str(body)]
+        return info["max_lon_error"], info["max_speed_error"]
+
+    def longitude(self, body, jds):
+        info = self.meta["bodies"].get(str(body))
+        if info is None:
+            raise KeyError(f"Body {body} is not in {self.path}")
+        jds = np.atleast_1d(np.asarray(jds, dtype=float))
+        if not np.all((jds >= self.jd_start) & (jds < self.jd_end)):
+            raise ValueError(f"Julian dates outside cached range {self.jd_start}-{self.jd_end}")
+
+        rows = self.table[info["offset"]:info["offset"] + info["count"]]
+        idx = np.searchsorted(rows[:, 0], jds, side="right") - 1
+        seg = rows[idx]
+        x = 2.0 * (jds - seg[:, 0]) / seg[:, 1] - 1.0
+        n = self.meta["degree"] + 1
+        lon = C.chebval(x, seg[:, 2:2 + n].T, tensor=False) % 360.0
+        speed = C.chebval(x, seg[:, 2 + n:].T, tensor=False)
+        exact = np.isnan(seg[:, 2])
+        if exact.any():
+            # The body is behind the Sun's disk (see SUN_RADIUS_DEG)
+            from ephemeris import init_ephemeris, calc_ut
+            init_ephemeris()
+            rows = np.array([calc_ut(jd, body)[0] for jd in jds[exact].tolist()])
+            lon[exact], speed[exact] = rows[:, 0], rows[:, 3]
+        return lon, speed
+
+_default = None
+
+def get_default():
+    """Shared ChebEphemeris for the default range, or None if it has not been built."""
+    global _default
+    if _default is None:
+        path = default_path()
+        if path.exists() and _meta_path(path).exists():
+            _default = ChebEphemeris(path)
+    return _default
+
+if __name__ == "__main__":
+    import sys
+    years = [int(a) for a in sys.argv[1:3]] or list(DEFAULT_YEARS)
+    out = build(start_year=years[0], end_year=years[-1])
+    for body, info in json.loads(_meta_path(out).read_text())["bodies"].items():
+        print(f"{swe.get_planet_name(int(body)):10s} {info['count']:6d} segments "
+              f"({info['exact_segments']} left to swisseph), "
+              f"error bound {info['max_lon_error']:.2e} deg, {info['max_speed_error']:.2e} deg/day")
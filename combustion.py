@@ -0,0 +1,154 @@
+from functools import lru_cache
+import numpy as np
+import swisseph as swe
+from utils import PLANETS, NO_COMBUSTION, get_sidereal_positions_batch, format_jd
+from varr import COMBUSTION_LIMITS
+from ephemeris import calc_ut
+from intervals import IntervalIndex
+from rootfind import brent
+
+# Orb sets (degrees of longitude from the Sun):
+#   'transit'  - the gochar table (Mercury 10, Venus 8, Moon 12, others 6)
+#   'strength' - varr.COMBUSTION_LIMITS, as used for the combust state in strength.py
+ORB_SETS = {
+    "transit": {"चं": 12, "मं": 6, "बु": 10, "गु": 6, "शु": 8, "श": 6},
+    "strength": {k: v for k, v in COMBUSTION_LIMITS.items() if k not in NO_COMBUSTION},
+}
+
+# Upper bound of |planet speed - Sun speed| (degrees/day). Elongation in
+# longitude always passes through 0 at a conjunction, so every combustion
+# spell lasts at least 2 * orb / REL_SPEED days and a step of orb / REL_SPEED
+# can't miss one.
+REL_SPEED = {"चं": 16.5, "मं": 1.9, "बु": 3.3, "गु": 1.3, "शु": 2.3, "श": 1.2}
+MAX_STEP_DAYS = 5.0
+# Longest combustion spell (Mars with a 17° orb: ~140 days) + margin, so
+# spells crossing New Year are solved in full
+MAX_SPELL_DAYS = 200
+
+def _orbs(orbs):
+    return ORB_SETS[orbs] if isinstance(orbs, str) else orbs
+
+def _elongation(name):
+    """Scalar |planet - Sun| in degrees (0-180); the ayanamsa cancels out."""
+    pid = PLANETS[name]
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+
+    def elong(jd):
+        diff = (calc_ut(jd, pid, flags)[0][0] - calc_ut(jd, swe.SUN, flags)[0][0]) % 360
+        return min(diff, 360 - diff)
+    return elong
+
+def find_combustions(name, jd_start, jd_end, orb, xtol=1e-6):
+    """
+    Combustion spells of one planet between jd_start and jd_end.
+
+    The elongation is sampled for the whole window in one batch, and each
+    crossing of the orb is solved with Brent's method.
+
+    Returns:
+        list of (start, end) Julian Days; a spell already running at
+        jd_start starts at None, one still running at jd_end ends at None
+    """
+    step = min(MAX_STEP_DAYS, orb / REL_SPEED[name])
+    jds = np.append(np.arange(jd_start, jd_end, step), jd_end)
+    table, _ = get_sidereal_positions_batch(jds, "Lahiri", planets=["सु", name])
+    diff = np.abs(table["lon"][:, 1] - table["lon"][:, 0]) % 360
+    excess = np.minimum(diff, 360 - diff) - orb
+    elong = _elongation(name)
+
+    def f(jd):
+        return elong(jd) - orb
+
+    spells = []
+    start = None if excess[0] < 0 else False
+    for i in np.nonzero(np.signbit(excess[:-1]) != np.signbit(excess[1:]))[0]:
+        jd = float(brent(f, jds[i], jds[i + 1], excess[i], excess[i + 1], xtol=xtol))
+        if excess[i] >= 0:
+            start = jd
+        else:
+            spells.append((start, jd))
+            start = False
+    if start is not False:
+        spells.append((start, None))
+    return spells
+
+@lru_cache(maxsize=256)
+def _spells_for_year(name, year, orb, xtol):
+    """Spells starting in the given calendar year."""
+    jd0 = swe.julday(year, 1, 1, 0.0)
+    jd1 = swe.julday(year + 1, 1, 1, 0.0)
+    spells = find_combustions(name, jd0 - 1, jd1 + MAX_SPELL_DAYS, orb, xtol)
+    return tuple((s, e) for s, e in spells if s is not None and e is not None and jd0 <= s < jd1)
+
+@lru_cache(maxsize=256)
+def _year_index(name, year, orb, xtol):
+    """Index of the spells starting in year - 1 and year, i.e. all spells that can contain a JD of `year`."""
+    return IntervalIndex(_spells_for_year(name, year - 1, orb, xtol)
+                         + _spells_for_year(name, year, orb, xtol))
+
+def _year(jd):
+    return swe.revjul(jd)[0]
+
+def get_combustion_index(name, jd_start, jd_end, orbs="transit", xtol=1e-6):
+    """
+    IntervalIndex of the combustion spells of one planet overlapping
+    [jd_start, jd_end]. Spells are computed a calendar year at a time and
+    cached.
+    """
+    orb = _orbs(orbs)[name]
+    spells = []
+    for year in range(_year(jd_start) - 1, _year(jd_end) + 1):
+        spells.extend(_spells_for_year(name, year, orb, xtol))
+    return IntervalIndex((s, e, name) for s, e in spells if e >= jd_start and s <= jd_end)
+
+def get_combustion_intervals(jd_start, jd_end, orbs="transit", planets=None, xtol=1e-6):
+    """
+    Every combustion spell overlapping [jd_start, jd_end].
+
+    Args:
+        jd_start, jd_end (float): window (Julian Day, UT)
+        orbs: 'transit', 'strength' or a {planet key: orb} dict
+        planets: planet keys (default: every planet in the orb set)
+        xtol (float): time tolerance in days
+
+    Returns:
+        list of dicts sorted by start: {'planet', 'start', 'end', 'orb'}
+        (Julian Days, UT)
+    """
+    table = _orbs(orbs)
+    planets = list(table) if planets is None else planets
+    out = []
+    for name in planets:
+        for start, end, _ in get_combustion_index(name, jd_start, jd_end, table, xtol):
+            out.append({"planet": name, "start": start, "end": end, "orb": table[name]})
+    out.sort(key=lambda c: c["start"])
+    return out
+
+def current_combustion(name, jd, orbs="transit", xtol=1e-6):
+    """(start, end) of the spell `name` is in at jd, or None."""
+    if name in NO_COMBUSTION:
+        return None
+    hit = _year_index(name, _year(jd), _orbs(orbs)[name], xtol).containing(jd)
+    return hit[:2] if hit else None
+
+def is_combust(name, jd, orbs="transit", xtol=1e-6):
+    return current_combustion(name, jd, orbs, xtol) is not None
+
+def next_combustion(name, jd, orbs="transit", years=5, xtol=1e-6):
+    """(start, end) of the first spell starting after jd within `years`, or None."""
+    if name in NO_COMBUSTION:
+        return None
+    orb = _orbs(orbs)[name]
+    year = _year(jd)
+    for y in range(year, year + years + 1):
+        hit = _year_index(name, y, orb, xtol).next_after(jd)
+        if hit:
+            return hit[:2]
+    return None
+
+def format_spell(spell, fmt="%d-%m-%Y"):
+    return tuple(format_jd(jd, fmt) for jd in spell)
+
+def clear_cache():
+    _spells_for_year.cache_clear()
+    _year_index.cache_clear()
@@ -0,0 +1,170 @@
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import swisseph as swe
+from utils import CACHE_DIR, year_jd, load_table
+
+# Global solar and lunar eclipses, scanned once with the Swiss Ephemeris and
+# kept as one sorted structured array (a few KB as .npy). Catalog queries
+# are np.searchsorted lookups; local circumstances are solved on request.
+
+DEFAULT_YEARS = (1900, 2100)
+SOLAR, LUNAR = 0, 1
+KIND_NAMES = {SOLAR: "solar", LUNAR: "lunar"}
+ECLIPSE_DTYPE = np.dtype([
+    ("jd", "f8"),         # maximum (UT)
+    ("begin", "f8"),      # first contact anywhere / penumbral begin
+    ("end", "f8"),        # last contact anywhere / penumbral end
+    ("kind", "u1"),       # SOLAR or LUNAR
+    ("type", "i4"),       # swisseph ECL_* flags
+    ("magnitude", "f4"),  # solar: at greatest eclipse; lunar: umbral (penumbral if < 0)
+])
+SOLAR_TYPES = ((swe.ECL_ANNULAR_TOTAL, "Annular-Total"), (swe.ECL_TOTAL, "Total"),
+               (swe.ECL_ANNULAR, "Annular"), (swe.ECL_PARTIAL, "Partial"))
+LUNAR_TYPES = ((swe.ECL_TOTAL, "Total"), (swe.ECL_PARTIAL, "Partial"),
+               (swe.ECL_PENUMBRAL, "Penumbral"))
+FLAGS = swe.FLG_SWIEPH
+
+def default_path(start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1]):
+    return CACHE_DIR / f"eclipses_{start_year}_{end_year}.npy"
+
+def type_name(kind, flags):
+    for flag, name in (SOLAR_TYPES if kind == SOLAR else LUNAR_TYPES):
+        if flags & flag == flag:
+            return name
+    return "Unknown"
+
+def scan(jd_start, jd_end):
+    """Every eclipse with its maximum in [jd_start, jd_end), as an ECLIPSE_DTYPE array sorted by time."""
+    from ephemeris import init_ephemeris
+    init_ephemeris()
+    rows = []
+    jd = jd_start
+    while True:
+        flags, tret = swe.sol_eclipse_when_glob(jd, FLAGS)
+        if tret[0] >= jd_end:
+            break
+        attr = swe.sol_eclipse_where(tret[0], FLAGS)[2]
+        rows.append((tret[0], tret[2], tret[3], SOLAR, flags, attr[0]))
+        jd = tret[0] + 1.0
+    jd = jd_start
+    while True:
+        flags, tret = swe.lun_eclipse_when(jd, FLAGS)
+        if tret[0] >= jd_end:
+            break
+        attr = swe.lun_eclipse_how(tret[0], (0.0, 0.0, 0.0), FLAGS)[1]
+        magnitude = attr[0] if flags & (swe.ECL_TOTAL | swe.ECL_PARTIAL) else -attr[1]
+        rows.append((tret[0], tret[6], tret[7], LUNAR, flags, magnitude))
+        jd = tret[0] + 1.0
+    table = np.array(rows, dtype=ECLIPSE_DTYPE)
+    return table[np.argsort(table["jd"])]
+
+def build(path=None, start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1]):
+    """Write the catalog for 1 Jan start_year to 1 Jan end_year + 1; returns the path."""
+    path = Path(path) if path else default_path(start_year, end_year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, scan(year_jd(start_year), year_jd(end_year + 1)))
+    return path
+
+class EclipseCatalog:
+    """Sorted eclipse table with range, year and next-eclipse lookups."""
+
+    def __init__(self, table, start_year, end_year):
+        self.table = table
+        self.jd_start = year_jd(start_year)
+        self.jd_end = year_jd(end_year + 1)
+
+    def _rows(self, jd_start, jd_end):
+        if jd_start >= self.jd_start and jd_end <= self.jd_end:
+            lo, hi = np.searchsorted(self.table["jd"], [jd_start, jd_end])
+            return self.table[lo:hi]
+        # Outside the catalog: scan just this window
+        return _scan_cached(float(jd_start), float(jd_end))
+
+    def between(self, jd_start, jd_end, kind=None):
+        """Eclipses with their maximum in [jd_start, jd_end), as dicts."""
+        rows = self._rows(jd_start, jd_end)
+        if kind is not None:
+            rows = rows[rows["kind"] == kind]
+        return [_as_dict(row) for row in rows]
+
+    def in_year(self, year, kind=None):
+        return self.between(year_jd(year), year_jd(year + 1), kind)
+
+    def next(self, jd, kind=None):
+        """First eclipse with its maximum after jd, or None."""
+        table = self.table if kind is None else self.table[self.table["kind"] == kind]
+        i = np.searchsorted(table["jd"], jd, side="right")
+        if jd >= self.jd_start and i < len(table):
+            return _as_dict(table[i])
+        for row in _scan_cached(float(jd), float(jd) + 370.0):
+            if row["jd"] > jd and (kind is None or row["kind"] == kind):
+                return _as_dict(row)
+        return None
+
+@lru_cache(maxsize=32)
+def _scan_cached(jd_start, jd_end):
+    return scan(jd_start, jd_end)
+
+def _as_dict(row):
+    kind = int(row["kind"])
+    return {"kind": KIND_NAMES[kind], "jd": float(row["jd"]), "begin": float(row["begin"]),
+            "end": float(row["end"]), "type": type_name(kind, int(row["type"])),
+            "magnitude": float(row["magnitude"])}
+
+_catalog = None
+
+def get_catalog():
+    """The shared 1900-2100 catalog, loaded (or built and saved) on first use."""
+    global _catalog
+    if _catalog is None:
+        table = load_table(default_path(), lambda: scan(year_jd(DEFAULT_YEARS[0]), year_jd(DEFAULT_YEARS[1] + 1)),
+                           "Eclipse catalog")
+        _catalog = EclipseCatalog(table, *DEFAULT_YEARS)
+    return _catalog
+
+def eclipses_in_year(year, kind=None):
+    return get_catalog().in_year(year, kind)
+
+def next_eclipse(jd, kind=None):
+    return get_catalog().next(jd, kind)
+
+def _jd_or_none(jd):
+    return float(jd) if jd > 0 else None
+
+@lru_cache(maxsize=1024)
+def _local(jd, kind, lat, lon, alt):
+    geopos = (lon, lat, alt)
+    if kind == "solar":
+        flags, tret, attr = swe.sol_eclipse_when_loc(jd - 1.0, geopos, FLAGS)
+        if abs(tret[0] - jd) > 1.0:
+            return {"visible": False}
+        return {
+            "visible": bool(flags & swe.ECL_VISIBLE), "type": type_name(SOLAR, flags),
+            "maximum": _jd_or_none(tret[0]), "first_contact": _jd_or_none(tret[1]),
+            "second_contact": _jd_or_none(tret[2]), "third_contact": _jd_or_none(tret[3]),
+            "fourth_contact": _jd_or_none(tret[4]), "sunrise": _jd_or_none(tret[5]),
+            "sunset": _jd_or_none(tret[6]), "magnitude": attr[0], "obscuration": attr[2],
+        }
+    flags, tret, attr = swe.lun_eclipse_when_loc(jd - 1.0, geopos, FLAGS)
+    if abs(tret[0] - jd) > 1.0:
+        return {"visible": False}
+    return {
+        "visible": bool(flags & swe.ECL_VISIBLE), "type": type_name(LUNAR, flags),
+        "maximum": _jd_or_none(tret[0]), "penumbral_begin": _jd_or_none(tret[6]),
+        "partial_begin": _jd_or_none(tret[2]), "total_begin": _jd_or_none(tret[4]),
+        "total_end": _jd_or_none(tret[5]), "partial_end": _jd_or_none(tret[3]),
+        "penumbral_end": _jd_or_none(tret[7]), "moonrise": _jd_or_none(tret[8]),
+        "moonset": _jd_or_none(tret[9]), "magnitude": attr[0],
+    }
+
+def local_circumstances(eclipse, lat, lon, alt=0.0):
+    """
+    Visibility and contact times (Julian Days, UT) of a catalog eclipse at a
+    place. Solved with swisseph on first request and cached.
+
+    Returns:
+        dict with 'visible' and, when the eclipse can be seen there, the
+        local type, contact times and magnitude
+    """
+    return dict(_local(eclipse["jd"], eclipse["kind"], round(lat, 4), round(lon, 4), float(alt)))
@@ -0,0 +1,220 @@
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+import swisseph as swe
+from functools import lru_cache, wraps
+
+# Bounded memo layer over the Swiss Ephemeris. Results are plain tuples, so
+# cached values are safe to share between callers.
+CALC_CACHE_SIZE = 16384
+HOUSES_CACHE_SIZE = 1024
+AYANAMSA_CACHE_SIZE = 4096
+
+# name -> lru_cache-wrapped function, for the hit/miss counters
+_MEMOS = {}
+
+def memoize(name, maxsize):
+    """
+    Decorator: LRU-memoize a pure ephemeris function and register it under
+    `name` so its counters show up in cache_stats(). Keyword arguments are
+    bound to their positions first, so f(jd, "x") and f(jd, kind="x") share
+    one cache entry.
+    """
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        _MEMOS[name] = cached
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if kwargs:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                args = bound.args
+            return cached(*args)
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
+@memoize("calc_ut", CALC_CACHE_SIZE)
+def _calc_ut(jd, body, flags):
+    span = _span(jd)
+    if span in _touched:
+        return swe.calc_ut(jd, body, flags)
+    # First call in this 600-year span opens its ephemeris files
+    start = time.perf_counter()
+    result = swe.calc_ut(jd, body, flags)
+    _record_io("cold_calls", time.perf_counter() - start)
+    _touched.add(span)
+    return result
+
+@memoize("houses_ex", HOUSES_CACHE_SIZE)
+def _houses_ex(jd, lat, lon, hsys, flags):
+    return swe.houses_ex(jd, lat, lon, hsys, flags)
+
+def calc_ut(jd, body, flags=swe.FLG_SWIEPH | swe.FLG_SPEED):
+    """
+    Memoized swe.calc_ut. Same arguments and return value.
+
+    Sidereal requests depend on the global swe.set_sid_mode() state, so
+    they are passed straight through instead of being cached.
+    """
+    if flags & swe.FLG_SIDEREAL:
+        return swe.calc_ut(jd, body, flags)
+    return _calc_ut(float(jd), body, flags)
+
+def houses_ex(jd, lat, lon, hsys=b'P', flags=0):
+    """Memoized swe.houses_ex (sidereal requests are not cached, see calc_ut)."""
+    if flags & swe.FLG_SIDEREAL:
+        return swe.houses_ex(jd, lat, lon, hsys, flags)
+    return _houses_ex(float(jd), float(lat), float(lon), hsys, flags)
+
+def cache_stats():
+    """
+    Hit/miss counters of every memoized ephemeris function.
+
+    Returns:
+        dict: name -> {'hits', 'misses', 'size', 'maxsize'}
+    """
+    stats = {}
+    for name, cached in _MEMOS.items():
+        info = cached.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses,
+                       'size': info.currsize, 'maxsize': info.maxsize}
+    return stats
+
+def clear_caches():
+    """Drop all memoized values and reset the counters."""
+    for cached in _MEMOS.values():
+        cached.cache_clear()
+
+# ----------------------------------------------------------------------------
+# Ephemeris files
+# ----------------------------------------------------------------------------
+# Every sepl_/semo_/seas_ file covers 600 years: sepl_18.se1 is 1800-2399
+# (planets), semo_ the Moon, seas_ the main asteroids; the 'm' variants
+# (seplm06.se1: 600-1 BC) cover years before the epoch.
+FILE_SPAN_YEARS = 600
+FILE_KINDS = {"pl": "planets", "mo": "moon", "as": "asteroids"}
+_FILE_RE = re.compile(r"^se(pl|mo|as)(_|m)(\d+)\.se1$")
+# JD of 1 Jan 0h of year 0; 600-year spans are counted from there
+_JD_YEAR0 = 1721058.5
+
+EPHE_PATH = None
+_coverage = {}      # kind -> sorted list of (start_year, end_year, file name)
+_touched = set()    # 600-year spans already opened by swisseph
+_io_stats = {"init": 0.0, "warm_up": 0.0, "cold_calls": 0.0, "counts": {}}
+_init_lock = threading.Lock()
+_io_lock = threading.Lock()
+
+def _record_io(key, seconds):
+    with _io_lock:
+        _io_stats[key] += seconds
+        _io_stats["counts"][key] = _io_stats["counts"].get(key, 0) + 1
+
+def _span(jd):
+    """Index of the 600-year file span containing jd (span 3 = 1800-2399)."""
+    return int((jd - _JD_YEAR0) // (365.2425 * FILE_SPAN_YEARS))
+
+def default_ephe_dir():
+    if getattr(sys, 'frozen', False):
+        # PyInstaller bundle: use _MEIPASS for extracted files
+        return Path(sys._MEIPASS) / "ephe"
+    return Path(__file__).parent / "ephe"
+
+def init_ephemeris(path=None):
+    """
+    Point swisseph at the ephemeris folder and index its files. Runs once
+    per process; later calls return the path set by the first one.
+
+    Returns:
+        str: the ephemeris folder
+    """
+    global EPHE_PATH
+    with _init_lock:
+        if EPHE_PATH is not None:
+            return EPHE_PATH
+        start = time.perf_counter()
+        ephe_path = Path(path) if path else default_ephe_dir()
+        try:
+            if not ephe_path.exists():
+                raise FileNotFoundError(f"Ephemeris folder not found at: {ephe_path}")
+            names = [entry.name for entry in os.scandir(ephe_path) if entry.name.endswith(".se1")]
+            if not names:
+                raise FileNotFoundError(f"No .se1 ephemeris files found in: {ephe_path}")
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        coverage = {kind: [] for kind in FILE_KINDS.values()}
+        for name in names:
+            match = _FILE_RE.match(name)
+            if not match:
+                continue
+            kind, sign, century = match.groups()
+            first = int(century) * 100 * (-1 if sign == "m" else 1)
+            coverage[FILE_KINDS[kind]].append((first, first + FILE_SPAN_YEARS - 1, name))
+        for files in coverage.values():
+            files.sort()
+        _coverage.update(coverage)
+
+        swe.set_ephe_path(str(ephe_path))
+        EPHE_PATH = str(ephe_path)
+        _record_io("init", time.perf_counter() - start)
+        return EPHE_PATH
+
+def files_for_years(start_year, end_year, kinds=("planets", "moon")):
+    """Ephemeris files needed for [start_year, end_year], e.g. ['semo_18.se1', 'sepl_18.se1']."""
+    init_ephemeris()
+    return sorted(name for kind in kinds for first, last, name in _coverage.get(kind, ())
+                  if first <= end_year and last >= start_year)
+
+def coverage():
+    """kind -> [(first year, last year, file name)] for the files present."""
+    init_ephemeris()
+    return {kind: list(files) for kind, files in _coverage.items()}
+
+def warm_up(jd_start, jd_end, background=True):
+    """
+    Read the planet and Moon files covering [jd_start, jd_end] into the OS
+    cache and let swisseph open them, so the first chart in that range
+    doesn't pay for it. With background=True this runs in a daemon thread,
+    which is returned.
+    """
+    def run():
+        start = time.perf_counter()
+        first = swe.revjul(jd_start)[0]
+        last = swe.revjul(jd_end)[0]
+        for name in files_for_years(first, last):
+            with open(Path(EPHE_PATH) / name, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+        for span in range(_span(jd_start), _span(jd_end) + 1):
+            jd = max(jd_start, _JD_YEAR0 + span * 365.2425 * FILE_SPAN_YEARS + 1)
+            for body in (swe.SUN, swe.MOON):
+                _calc_ut(float(jd), body, swe.FLG_SWIEPH | swe.FLG_SPEED)
+        _record_io("warm_up", time.perf_counter() - start)
+
+    init_ephemeris()
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="ephemeris-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def io_stats():
+    """
+    Seconds spent on ephemeris file I/O: 'init' (folder scan),
+    'warm_up' (pre-reading files) and 'cold_calls' (calc_ut calls that
+    opened a new file span), plus how often each happened.
+    """
+    with _io_lock:
+        return {"init": _io_stats["init"], "warm_up": _io_stats["warm_up"],
+                "cold_calls": _io_stats["cold_calls"], "counts": dict(_io_stats["counts"]),
+                "spans_open": sorted(_touched)}
@@ -1,11 +1,9 @@
-from utils import (swe, get_ayanamsa, planet_speeds, PLANETS, 
+from utils import (swe, get_ayanamsa, planet_speeds, PLANETS, PLANET_KEYS,
                    get_divisional_position, convert_to_dms,
                    get_lahiri, get_kp_old, get_true_lahiri, get_kp_new,
+                   get_sidereal_positions, get_sidereal_positions_batch,
                    EPHE_PATH)
 import re
-from astropy.time import Time
-from astropy.coordinates import EarthLocation, AltAz, get_sun
-import astropy.units as u
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -17,108 +15,28 @@ from varr import (TITHI_NAMES, YOGA_NAMES, KARANA_NAMES,YONI_MAP, NADI_MAP,
                   fixed_karanas,PADA_SPAN,month_names, RASI_NAMES,
                   rasi_names, nakshatras)
 from BS_DATABASE import gregorian_to_bs
+from suncache import get_sunrise_sunset
+from ephemeris import calc_ut, houses_ex
+from ingress import find_ingresses
+from lunarmonth import lunar_month, month_label
+from ascendant import sidereal_ascendant, datetimes_to_jd
 
 # Import PyQt6 modules
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
 
 def check_planet_rasi_changes(jd_start, lat, lon, days=365, ayanamsa_type="Lahiri"):
-    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    """Next sign ingress of every planet within `days` (Rahu and Ketu first)."""
     result = {}
-    rahu_change_date = None
-
-    # 1. Find Rahu's change date
-    name_rahu = "रा"
-    pid_rahu = swe.MEAN_NODE
-    jd = jd_start
-    pos_rahu_start = swe.calc_ut(jd, pid_rahu, flags)[0][0]
-    sidereal_pos_rahu_start = (pos_rahu_start - get_ayanamsa(jd, ayanamsa_type)) % 360
-    last_rasi_rahu = int(sidereal_pos_rahu_start // 30)
-
-    for delta in range(1, days + 1):
-        jd_next = jd_start + delta
-        pos_rahu_next = swe.calc_ut(jd_next, pid_rahu, flags)[0][0]
-        sidereal_pos_rahu_next = (pos_rahu_next - get_ayanamsa(jd_next, ayanamsa_type)) % 360
-        new_rasi_rahu = int(sidereal_pos_rahu_next // 30)
-
-        if new_rasi_rahu != last_rasi_rahu:
-            jd_low = jd_next - 1
-            jd_high = jd_next
-            for _ in range(30):
-                jd_mid = (jd_low + jd_high) / 2
-                pos_rahu_mid = swe.calc_ut(jd_mid, pid_rahu, flags)[0][0]
-                sidereal_pos_rahu_mid = (pos_rahu_mid - get_ayanamsa(jd_mid, ayanamsa_type)) % 360
-                mid_rasi_rahu = int(sidereal_pos_rahu_mid // 30)
-                if mid_rasi_rahu == last_rasi_rahu:
-                    jd_low = jd_mid
-                else:
-                    jd_high = jd_mid
-                if jd_high - jd_low < 1e-9:
-                    break
-            rahu_change_jd = jd_high
-            t_rahu = Time(rahu_change_jd, format='jd', scale='utc')
-            rahu_change_date_str = t_rahu.datetime.strftime("%d-%m-%Y")
-            rahu_new_rasi = new_rasi_rahu + 1
-
-            result[name_rahu] = {
-                "new_rasi": rahu_new_rasi,
-                "change_date": rahu_change_date_str
-            }
-            rahu_change_date = rahu_change_jd
-            break
-
-    # 2. Calculate Ketu's change based on Rahu's change date
-    name_ketu = "के"
-    if rahu_change_date is not None:
-        jd_ketu_change = rahu_change_date
-        pos_rahu_at_change = swe.calc_ut(jd_ketu_change, swe.MEAN_NODE, flags)[0][0]
-        pos_ketu_at_change = (pos_rahu_at_change + 180) % 360
-        sidereal_pos_ketu_at_change = (pos_ketu_at_change - get_ayanamsa(jd_ketu_change, ayanamsa_type)) % 360
-        ketu_new_rasi = int(sidereal_pos_ketu_at_change // 30) + 1
-
-        t_ketu = Time(jd_ketu_change, format='jd', scale='utc')
-        ketu_change_date_str = t_ketu.datetime.strftime("%d-%m-%Y")
-
-        result[name_ketu] = {
-            "new_rasi": ketu_new_rasi,
-            "change_date": ketu_change_date_str
-        }
-
-    # 3. Calculate rasi changes for other planets
-    for name, pid in PLANETS.items():
-        if name not in ["रा", "के"]:
-            jd = jd_start
-            pos = swe.calc_ut(jd, pid, flags)[0][0]
-            sidereal_pos = (pos - get_ayanamsa(jd, ayanamsa_type)) % 360
-            last_rasi = int(sidereal_pos // 30)
-
-            for delta in range(1, days + 1):
-                jd_next = jd_start + delta
-                pos = swe.calc_ut(jd_next, pid, flags)[0][0]
-                sidereal_pos = (pos - get_ayanamsa(jd_next, ayanamsa_type)) % 360
-                new_rasi = int(sidereal_pos // 30)
-
-                if new_rasi != last_rasi:
-                    jd_low = jd_next - 1
-                    jd_high = jd_next
-                    for _ in range(30):
-                        jd_mid = (jd_low + jd_high) / 2
-                        pos_mid = swe.calc_ut(jd_mid, pid, flags)[0][0]
-                        sidereal_pos_mid = (pos_mid - get_ayanamsa(jd_mid, ayanamsa_type)) % 360
-                        mid_rasi = int(sidereal_pos_mid // 30)
-                        if mid_rasi == last_rasi:
-                            jd_low = jd_mid
-                        else:
-                            jd_high = jd_mid
-                        if jd_high - jd_low < 1e-9:
-                            break
-                    t = Time(jd_high, format='jd', scale='utc')
-                    change_date = t.datetime.strftime("%d-%m-%Y")
-                    result[name] = {
-                        "new_rasi": new_rasi + 1,
-                        "change_date": change_date
-                    }
-                    break
+    first = {}
+    for event in find_ingresses(jd_start, jd_start + days, ayanamsa_type, kinds=("sign",)):
+        first.setdefault(event["planet"], event)
+
+    order = ["रा", "के"] + [name for name in PLANETS if name not in ("रा", "के")]
+    for name in order:
+        event = first.get(name)
+        if event is not None:
+            result[name] = {"new_rasi": event["to"] + 1, "change_date": event["date"]}
     return result
 
 def calculate_gochar(lat, lon, jd):
@@ -127,7 +45,7 @@ def calculate_gochar(lat, lon, jd):
     combust_flags = {}
     flags = swe.FLG_SWIEPH | swe.FLG_SPEED
 
-    house_result = swe.houses_ex(jd, lat, lon, b'W', swe.FLG_SWIEPH)
+    house_result = houses_ex(jd, lat, lon, b'W', swe.FLG_SWIEPH)
     ascendant_degree_tropical = house_result[1][0]
     ayanamsa = get_ayanamsa(jd)
     positions['Asc'] = (ascendant_degree_tropical - ayanamsa) % 360
@@ -141,7 +59,7 @@ def calculate_gochar(lat, lon, jd):
             retro_flags["के"] = False
             continue
 
-        pos_array, _ = swe.calc_ut(jd, pid, flags)
+        pos_array, _ = calc_ut(jd, pid, flags)
         pos, speed = pos_array[0], pos_array[3]
         positions[name] = (pos - ayanamsa) % 360
         planet_speeds[name] = speed
@@ -151,8 +69,8 @@ def calculate_gochar(lat, lon, jd):
     moon_pos = positions.get("चं")
     
     if None not in (sun_pos, moon_pos):
-        sun_long = swe.calc_ut(jd, swe.SUN)[0][0]
-        moon_long = swe.calc_ut(jd, swe.MOON)[0][0]
+        sun_long = calc_ut(jd, swe.SUN)[0][0]
+        moon_long = calc_ut(jd, swe.MOON)[0][0]
         phase_angle = (moon_long - sun_long) % 360
         
         phases = [
@@ -206,55 +124,6 @@ def get_moon_phase_pixmap(moon_phase, size=(100, 100)):
             Qt.TransformationMode.SmoothTransformation
         )
     return None
-def get_sidereal_positions(jd, ayanamsa_type):
-    """
-    Calculates sidereal positions for planets using only supported ayanamsas.
-    """
-    positions = {}
-    retro_flags = {}
-    combust_flags = {}
-
-    # Always compute TROPICAL positions first
-    flags = swe.FLG_SWIEPH | swe.FLG_SPEED 
-    # Select ayanamsa - strictly restricted to requested types
-    if ayanamsa_type == "Lahiri":
-        ayanamsa_deg = get_lahiri(jd) 
-
-    elif ayanamsa_type == "True Lahiri":
-        ayanamsa_deg = get_true_lahiri(jd) 
-    elif ayanamsa_type == "KP Old":
-        ayanamsa_deg = get_kp_old(jd)
-    elif ayanamsa_type == "KP New":
-        ayanamsa_deg = get_kp_new(jd)
-    else:
-        raise ValueError(
-            f"Ayanamsa '{ayanamsa_type}' not supported. "
-            "Use 'Lahiri' or 'True Lahiri'."
-        ) 
-    # Planet loop for calculations
-    for name, pid in PLANETS.items():
-        pos_array, used_flags = swe.calc_ut(jd, pid, flags) 
-        tropical_lon = pos_array[0]
-        # Calculate sidereal longitude by subtracting the chosen ayanamsa
-        sidereal_lon = (tropical_lon - ayanamsa_deg) % 360 
-
-        positions[name] = sidereal_lon
-        retro_flags[name] = pos_array[3] < 0 
-
-    # Handle nodes and combustion as per existing logic
-    rahu_pos = positions["रा"]
-    positions["के"] = (rahu_pos + 180) % 360 
-    retro_flags["के"] = False 
-    sun_pos = positions["सु"]
-    for name in positions:
-        if name in ["सु", "रा", "के"]:
-            combust_flags[name] = False
-            continue
-
-        diff = abs(positions[name] - sun_pos) % 360
-        combust_flags[name] = min(diff, 360 - diff) < 6 
-
-    return positions, retro_flags, combust_flags, ayanamsa_deg
 def make_chart_data(positions, division, ascendant_sign, retro_flags=None, combust_flags=None):
     chart = {i: [] for i in range(12)}
     
@@ -287,33 +156,9 @@ def make_chart_data(positions, division, ascendant_sign, retro_flags=None, combu
 
     return chart
 def calculate_upagrahas(lmt_chart, ayanamsa_type):
+    if "lat" not in lmt_chart or "lon" not in lmt_chart or "tz_name" not in lmt_chart:
+        raise ValueError("Missing lat, lon, or tz_name in lmt_chart")
 
-    def get_lagna_degree(dt):
-
-        if "lat" not in lmt_chart or "lon" not in lmt_chart or "tz_name" not in lmt_chart:
-            raise ValueError("Missing lat, lon, or tz_name in lmt_chart")
-
-        local_tz = pytz.timezone(lmt_chart["tz_name"])
-        local_dt = dt if dt.tzinfo else local_tz.localize(dt)
-        utc_dt = local_dt.astimezone(pytz.utc)
-
-        jd = swe.julday(
-            utc_dt.year, utc_dt.month, utc_dt.day,
-            utc_dt.hour + utc_dt.minute / 60.0 + utc_dt.second / 3600.0
-        )
-
-        if ayanamsa_type == "Lahiri":
-            swe.set_sid_mode(swe.SIDM_LAHIRI)
-            house_result = swe.houses_ex(jd, lmt_chart["lat"], lmt_chart["lon"], b'W', flags=swe.FLG_SIDEREAL)
-            ascendant_degree = house_result[1][0] % 360
-
-        else:
-            ayanamsa_deg = get_ayanamsa(jd, ayanamsa_type)
-            house_result = swe.houses_ex(jd, lmt_chart["lat"], lmt_chart["lon"], b'W', flags=swe.FLG_SWIEPH)
-            ascendant_tropical = house_result[1][0]
-            ascendant_degree = (ascendant_tropical - ayanamsa_deg) % 360
-
-        return ascendant_degree
     # Helper function to generate metadata
     def get_lagna_meta(degree):
         """
@@ -381,7 +226,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         gh = night_ghatika.get(wd, 0)
         gulika_dt = sunset_dt + timedelta(minutes=gh * 24)
-    gulika_deg = get_lagna_degree(gulika_dt)
 
     # --- Kala (Sun's portion) ---
     if is_day:
@@ -390,7 +234,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Kala_night.get(wd, 0)
         kala_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    kala_deg = get_lagna_degree(kala_dt)
 
     # --- Yamaghantaka (Jupiter's portion) ---
     if is_day:
@@ -399,7 +242,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Yama_night.get(wd, 0)
         yama_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    yama_deg = get_lagna_degree(yama_dt)
 
     # --- Mrityu (Mars's portion) ---
     if is_day:
@@ -408,7 +250,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Mrtyu_night.get(wd, 0)
         mrtyu_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    mrtyu_deg = get_lagna_degree(mrtyu_dt)
     # ardhaprahara section
     if is_day:
         gh = ardhaprahara_day.get(wd, 0) # Check if wd matches your dict keys
@@ -416,7 +257,10 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         gh = ardhaprahara_night.get(wd, 0) # Check if wd matches your dict keys
         ardhaprahara_dt = sunset_dt + timedelta(minutes=gh * 24)
-    ardhaprahara_deg = get_lagna_degree(ardhaprahara_dt)
+    # All five rising points from one vectorized ascendant evaluation
+    gulika_deg, kala_deg, yama_deg, mrtyu_deg, ardhaprahara_deg = sidereal_ascendant(
+        datetimes_to_jd([gulika_dt, kala_dt, yama_dt, mrtyu_dt, ardhaprahara_dt], lmt_chart["tz_name"]),
+        lmt_chart["lat"], lmt_chart["lon"], ayanamsa_type)
     # --- Shadow (Aprakasha) upagrahas from Sun longitude ---
     try:
         sun_deg = lmt_chart["planet_positions"]["सूर्य"]
@@ -500,7 +344,7 @@ def calculate_lmt_and_charts_logic(input_data):
     pos_data, retro, combust, ayan_deg = get_sidereal_positions(jd_value, ayanamsa_type)
 
     # Calculate Houses
-    house_result = swe.houses_ex(jd_value, lat, lon, b'W', flags=swe.FLG_SWIEPH)
+    house_result = houses_ex(jd_value, lat, lon, b'W', flags=swe.FLG_SWIEPH)
     asc_tropical = house_result[1][0]
     asc_sidereal = (asc_tropical - ayan_deg) % 360
     
@@ -595,53 +439,6 @@ def _calculate_karana(tithi_deg):
         # Movable Karanas cycle through the first 7 names
         return KARANA_NAMES[(karana_num - 1) % 7]
 
-def calculate_sunrise_sunset(date, lat, lon, local_tz_name):
-    """
-    Calculate local sunrise and sunset times using Astropy.
-
-    Args:
-        date (datetime.date or str): Date in 'YYYY/MM/DD' format or datetime.date
-        lat (float): Latitude in degrees
-        lon (float): Longitude in degrees
-        local_tz_name (str): Timezone name (e.g., 'Asia/Kathmandu')
-
-    Returns:
-        (datetime, datetime): Tuple of (sunrise_local, sunset_local)
-    """
-    try:
-        if isinstance(date, str):
-            date = datetime.strptime(date, "%Y/%m/%d").date()
-
-        observer_location = EarthLocation(lat=lat * u.deg, lon=lon * u.deg)
-        local_tz = pytz.timezone(local_tz_name)
-
-        # Midnight UTC start for the date
-        utc_midnight = datetime(date.year, date.month, date.day, 0, 0, 0)
-        utc_midnight_time = Time(utc_midnight, format='datetime', scale='utc')
-
-        # Generate 1000 points from midnight to next midnight
-        times = utc_midnight_time + np.linspace(0, 24, 1000) * u.hour
-        altaz = get_sun(times).transform_to(AltAz(obstime=times, location=observer_location))
-
-        # Sunrise: when sun altitude crosses from negative to positive
-        sunrise_idx = np.where((altaz.alt[:-1] < 0) & (altaz.alt[1:] >= 0))[0]
-        sunrise_local = None
-        if sunrise_idx.size > 0:
-            sunrise_time = times[sunrise_idx[0]]
-            sunrise_local = sunrise_time.to_datetime(timezone=pytz.utc).astimezone(local_tz)
-
-        # Sunset: when sun altitude crosses from positive to negative
-        sunset_idx = np.where((altaz.alt[:-1] >= 0) & (altaz.alt[1:] < 0))[0]
-        sunset_local = None
-        if sunset_idx.size > 0:
-            sunset_time = times[sunset_idx[-1]]
-            sunset_local = sunset_time.to_datetime(timezone=pytz.utc).astimezone(local_tz)
-
-        return sunrise_local, sunset_local
-
-    except Exception as e:
-        print(f"Astropy sunrise/sunset error: {e}")
-        return None, None
 import traceback
 
 def julian_day_to_gregorian(jd):
@@ -658,28 +455,14 @@ def julian_day_to_gregorian(jd):
     year = e // 1461 - 4716 + (12 + 2 - month) // 12
     return f"{year:04d}-{month:02d}-{day:02d}"
 
-def calculate_lunar_month_year(jd):
+def calculate_lunar_month_year(jd, ayanamsa_type="Lahiri"):
     """
-    Calculate the lunar month and year for the Bikram Sambat calendar,
-    by converting JD → Gregorian → BS, then mapping month number → name.
+    Lunar month (purnimanta, adhik months prefixed 'अधिक') and Vikram
+    Samvat year at jd; see lunarmonth.
     """
     try:
-        # 1) JD → Gregorian date string
-        greg_date = julian_day_to_gregorian(jd)
-
-        # 2) Gregorian → BS using your existing function
-        bs_date = gregorian_to_bs(greg_date)
-        if not isinstance(bs_date, str):
-            # something went wrong upstream
-            return None, None
-
-        # 3) Parse BS and map month number → Nepali month name
-        bs_year, bs_month, _ = map(int, bs_date.split('-'))
-        lunar_month_name = month_names[bs_month - 1]
-        lunar_year = bs_year
-
-        return lunar_month_name, lunar_year
-
+        month = lunar_month(jd, ayanamsa_type)["purnimanta"]
+        return month_label(month), month["year"]
     except Exception:
         traceback.print_exc()
         return None, None
@@ -760,7 +543,7 @@ def calculate_panchang(jd, lat, lon, local_tz_name, positions):
         try:
             year, month, day, hour = swe.revjul(jd)
             date = f"{year}/{month:02d}/{day:02d}"
-            sunrise_local, sunset_local = calculate_sunrise_sunset(date, lat, lon, local_tz_name)
+            sunrise_local, sunset_local = get_sunrise_sunset(date, lat, lon, local_tz_name)
 
             results.update({
                 'sunrise': sunrise_local.strftime("%H:%M:%S"),
@@ -828,8 +611,8 @@ def is_combust_now(planet_pid, ayanamsa_type,jd):
     flags = swe.FLG_SWIEPH
     ayan = get_ayanamsa(jd, ayanamsa_type)
 
-    sun_lon = swe.calc_ut(jd, swe.SUN, flags)[0][0]
-    planet_lon = swe.calc_ut(jd, planet_pid, flags)[0][0]
+    sun_lon = calc_ut(jd, swe.SUN, flags)[0][0]
+    planet_lon = calc_ut(jd, planet_pid, flags)[0][0]
 
     sun_sid = (sun_lon - ayan) % 360
     planet_sid = (planet_lon - ayan) % 360
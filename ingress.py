@@ -0,0 +1,146 @@
+import numpy as np
+import swisseph as swe
+from utils import (PLANETS, PLANET_KEYS, get_ayanamsa, get_sidereal_positions_batch,
+                   get_divisional_position, get_division_boundaries, format_jd)
+from ephemeris import calc_ut
+from rootfind import brent
+
+# Upper bound of |daily motion| (degrees/day), used to size the sampling step
+MAX_SPEED = {
+    "सु": 1.02, "चं": 15.4, "मं": 0.80, "बु": 2.21, "गु": 0.25,
+    "शु": 1.26, "श": 0.13, "रा": 0.06, "के": 0.06,
+}
+# Longest step: keeps every station visible (Mercury's shortest retrograde
+# spell is ~20 days) and the motion between samples well under 180°
+MAX_STEP_DAYS = 5.0
+STEP_DEGREES = 60.0
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = 360.0 / 108
+
+def _kind_table(kind):
+    """(boundaries, index function) for 'sign', 'nakshatra', 'pada' or 'D<n>'."""
+    if kind == "sign":
+        return np.arange(12) * 30.0, lambda lon: int(lon // 30) % 12
+    if kind == "nakshatra":
+        return np.arange(27) * NAKSHATRA_SPAN, lambda lon: int(lon // NAKSHATRA_SPAN) % 27
+    if kind == "pada":
+        return np.arange(108) * PADA_SPAN, lambda lon: int(lon // PADA_SPAN) % 108
+    if kind.startswith("D") and kind[1:].isdigit():
+        division = int(kind[1:])
+        return (get_division_boundaries(division),
+                lambda lon: int(get_divisional_position(lon, division) // 30) % 12)
+    raise ValueError(f"Unknown ingress kind '{kind}'. Use 'sign', 'nakshatra', 'pada' or 'D<n>'.")
+
+def sidereal_lon_speed(name, ayanamsa_type):
+    """Scalar sidereal longitude/speed of one planet key."""
+    pid = PLANETS[name]
+    offset = 180.0 if name == "के" else 0.0
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+
+    def lon(jd):
+        return (calc_ut(jd, pid, flags)[0][0] + offset - get_ayanamsa(jd, ayanamsa_type)) % 360
+
+    def speed(jd):
+        return calc_ut(jd, pid, flags)[0][3]
+    return lon, speed
+
+def find_stations(name, jd_start, jd_end, ayanamsa_type="Lahiri", xtol=1e-6):
+    """
+    Stations (speed = 0) of one planet between jd_start and jd_end.
+
+    Returns:
+        list of (jd, 'R' or 'D'): 'R' where the planet turns retrograde,
+        'D' where it turns direct
+    """
+    step = min(MAX_STEP_DAYS, STEP_DEGREES / MAX_SPEED[name])
+    jds = np.append(np.arange(jd_start, jd_end, step), jd_end)
+    table, _ = get_sidereal_positions_batch(jds, ayanamsa_type, planets=[name])
+    speeds = table["speed"][:, 0]
+    _, speed = sidereal_lon_speed(name, ayanamsa_type)
+
+    stations = []
+    for i in np.nonzero(np.signbit(speeds[:-1]) != np.signbit(speeds[1:]))[0]:
+        jd = brent(speed, jds[i], jds[i + 1], speeds[i], speeds[i + 1], xtol=xtol)
+        stations.append((float(jd), "R" if speeds[i] > 0 else "D"))
+    return stations
+
+def find_ingresses(jd_start, jd_end, ayanamsa_type="Lahiri", planets=None,
+                   kinds=("sign", "nakshatra", "pada"), xtol=1e-6):
+    """
+    Every ingress of the given planets between jd_start and jd_end.
+
+    Positions are sampled with a step sized from each planet's maximum
+    speed, the samples are split at stations so the motion between two
+    samples is monotonic, and each boundary crossed in between is solved
+    with Brent's method. Retrograde re-entries show up as separate events.
+
+    Args:
+        jd_start, jd_end (float): search window (Julian Day, UT)
+        ayanamsa_type (str): 'Lahiri', 'True Lahiri', 'KP Old' or 'KP New'
+        planets: planet keys (default: all of PLANETS)
+        kinds: any of 'sign', 'nakshatra', 'pada' and divisional signs 'D<n>'
+               (e.g. 'D9')
+        xtol (float): time tolerance in days
+
+    Returns:
+        list of dicts sorted by time: {'planet', 'kind', 'jd', 'date',
+        'from', 'to', 'retro'}; 'from'/'to' are 0-based sign, nakshatra,
+        pada or divisional-sign indices
+    """
+    planets = PLANET_KEYS if planets is None else planets
+    tables = {kind: _kind_table(kind) for kind in kinds}
+    events = []
+
+    for name in planets:
+        lon, _ = sidereal_lon_speed(name, ayanamsa_type)
+        step = min(MAX_STEP_DAYS, STEP_DEGREES / MAX_SPEED[name])
+        jds = np.append(np.arange(jd_start, jd_end, step), jd_end)
+        stations = [jd for jd, _ in find_stations(name, jd_start, jd_end, ayanamsa_type, xtol)]
+        jds = np.union1d(jds, stations)
+        lons = np.array([lon(jd) for jd in jds])
+        # Unwrapped track, so a crossing of 0° Aries is an ordinary boundary
+        track = np.unwrap(lons, period=360.0)
+
+        for i in range(len(jds) - 1):
+            lo, hi = sorted((track[i], track[i + 1]))
+            if hi == lo:
+                continue
+            retro = track[i + 1] < track[i]
+            roots = {}
+            for kind, (boundaries, index) in tables.items():
+                base = 360.0 * np.floor(lo / 360.0)
+                targets = np.concatenate([boundaries + base, boundaries + base + 360.0])
+                for target in targets[(targets > lo) & (targets <= hi)]:
+                    before = index((target - 1e-7) % 360)
+                    after = index((target + 1e-7) % 360)
+                    if retro:
+                        before, after = after, before
+                    if before == after:
+                        continue
+                    # Boundaries shared by several kinds are solved once
+                    key = round(float(target), 9)
+                    if key not in roots:
+                        def offset(jd, target=target):
+                            return (lon(jd) - target + 180.0) % 360.0 - 180.0
+                        roots[key] = brent(offset, jds[i], jds[i + 1], xtol=xtol)
+                    jd = float(roots[key])
+                    events.append({
+                        "planet": name, "kind": kind, "jd": jd, "date": format_jd(jd),
+                        "from": before, "to": after, "retro": bool(retro),
+                    })
+
+    events.sort(key=lambda e: e["jd"])
+    return events
+
+def next_ingress(jd_start, name, kind="sign", ayanamsa_type="Lahiri", days=365, xtol=1e-6):
+    """First ingress of one planet after jd_start within `days`, or None."""
+    chunk = 30.0
+    start = jd_start
+    while start < jd_start + days:
+        end = min(start + chunk, jd_start + days)
+        events = find_ingresses(start, end, ayanamsa_type, [name], (kind,), xtol)
+        if events:
+            return events[0]
+        start, chunk = end, chunk * 2
+    return None
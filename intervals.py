@@ -0,0 +1,108 @@
+from bisect import bisect_right
+
+class IntervalIndex:
+    """
+    Sorted, non-overlapping [start, end) intervals (Julian Days) with
+    O(log n) point and "next window" lookups.
+
+    Each interval may carry a payload (any object), returned alongside it.
+    """
+
+    __slots__ = ("starts", "ends", "payloads")
+
+    def __init__(self, intervals=()):
+        """intervals: iterable of (start, end) or (start, end, payload)."""
+        items = sorted((tuple(iv) + (None,))[:3] for iv in intervals if iv[1] > iv[0])
+        self.starts = [iv[0] for iv in items]
+        self.ends = [iv[1] for iv in items]
+        self.payloads = [iv[2] for iv in items]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends, self.payloads))
+
+    def __repr__(self):
+        return f"IntervalIndex({len(self)} intervals)"
+
+    def containing(self, t):
+        """(start, end, payload) of the interval that contains t, or None."""
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.starts[i], self.ends[i], self.payloads[i]
+        return None
+
+    def __contains__(self, t):
+        return self.containing(t) is not None
+
+    def next_after(self, t):
+        """First interval starting after t, or None."""
+        i = bisect_right(self.starts, t)
+        if i < len(self.starts):
+            return self.starts[i], self.ends[i], self.payloads[i]
+        return None
+
+    def overlapping(self, start, end):
+        """All intervals that overlap [start, end)."""
+        i = max(bisect_right(self.starts, start) - 1, 0)
+        out = []
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.ends[i] > start:
+                out.append((self.starts[i], self.ends[i], self.payloads[i]))
+            i += 1
+        return out
+
+# Interval algebra on plain lists of (start, end) pairs. Inputs may be in
+# any order and may overlap; results are sorted and non-overlapping.
+
+def normalize(intervals):
+    """Sort and merge overlapping or touching intervals; empty ones are dropped."""
+    merged = []
+    for start, end in sorted((iv[0], iv[1]) for iv in intervals if iv[1] > iv[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def union(*interval_lists):
+    return normalize([iv for intervals in interval_lists for iv in intervals])
+
+def intersect(*interval_lists):
+    """Time covered by every list (linear merge of the normalized lists)."""
+    if not interval_lists:
+        return []
+    result = normalize(interval_lists[0])
+    for other in interval_lists[1:]:
+        other = normalize(other)
+        out, i, j = [], 0, 0
+        while i < len(result) and j < len(other):
+            start = max(result[i][0], other[j][0])
+            end = min(result[i][1], other[j][1])
+            if end > start:
+                out.append((start, end))
+            if result[i][1] < other[j][1]:
+                i += 1
+            else:
+                j += 1
+        result = out
+    return result
+
+def subtract(intervals, removed):
+    """Parts of `intervals` not covered by `removed`."""
+    removed = normalize(removed)
+    out, j = [], 0
+    for start, end in normalize(intervals):
+        while j < len(removed) and removed[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(removed) and removed[k][0] < end:
+            if removed[k][0] > start:
+                out.append((start, removed[k][0]))
+            start = max(start, removed[k][1])
+            k += 1
+        if end > start:
+            out.append((start, end))
+    return out
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+import pytz
+from varr import RASI_NAMES
+from ascendant import sidereal_ascendant
+from riseset import to_date, datetime_to_jd, jd_to_local
+from tableio import write_rows
+
+# Rising-sign (lagna) timetables: the sidereal ascendant is sampled on a
+# fine grid with the vectorized ascendant engine, every crossing of a sign
+# (or navamsa) boundary is bracketed, and all crossings are refined together
+# by guarded Newton steps. Day tables are cached per (date, place).
+
+# 2 minutes: the ascendant moves well under one navamsa (3°20') in this
+# time outside polar latitudes, and several crossings in one step are
+# still bracketed separately
+STEP_DAYS = 2.0 / 1440
+RATE_STEP_DAYS = 1.0 / 86400
+MAX_ITER = 12
+NAVAMSA_SPAN = 30.0 / 9
+COLUMNS = ["date", "kind", "sign", "start", "end"]
+
+def _error(t, targets, lat, lon, ayanamsa_type):
+    return (sidereal_ascendant(t, lat, lon, ayanamsa_type) - targets + 180.0) % 360.0 - 180.0
+
+def boundary_crossings(jd_start, jd_end, lat, lon, ayanamsa_type="Lahiri", span=30.0, xtol=1e-7):
+    """
+    Times in (jd_start, jd_end) when the sidereal ascendant crosses a
+    multiple of span degrees (30 for signs, NAVAMSA_SPAN for navamsas).
+
+    Returns:
+        (times, parts): sorted JD array and, for each time, the index of the
+        span entered (0 .. 360/span - 1)
+    """
+    jds = np.append(np.arange(jd_start, jd_end, STEP_DAYS), jd_end)
+    track = np.unwrap(sidereal_ascendant(jds, lat, lon, ayanamsa_type), period=360.0)
+    first = np.floor(track[:-1] / span) + 1
+    last = np.floor(track[1:] / span)
+    steps = np.nonzero(last >= first)[0]
+    counts = (last[steps] - first[steps] + 1).astype(int)
+    i = np.repeat(steps, counts)
+    k = np.concatenate([np.arange(first[s], last[s] + 1) for s in steps]) if len(steps) else np.zeros(0)
+    if not len(i):
+        return np.zeros(0), np.zeros(0, dtype=int)
+
+    targets = (k * span) % 360.0
+    lo, hi = jds[i], jds[i + 1]
+    t = lo + (k * span - track[i]) / (track[i + 1] - track[i]) * (hi - lo)
+    # Guarded Newton with a numerical rate; ascendant and rate come from
+    # one engine call for all crossings
+    for _ in range(MAX_ITER):
+        both = _error(np.concatenate([t, t + RATE_STEP_DAYS]), np.tile(targets, 2), lat, lon, ayanamsa_type)
+        error, ahead = both[:len(t)], both[len(t):]
+        lo = np.where(error < 0, t, lo)
+        hi = np.where(error > 0, t, hi)
+        t_new = t - error * RATE_STEP_DAYS / (ahead - error)
+        t_new = np.where((t_new < lo) | (t_new > hi), (lo + hi) / 2, t_new)
+        done = np.abs(t_new - t) < xtol
+        t = t_new
+        if done.all():
+            break
+    parts = np.round(k).astype(int) % int(round(360.0 / span))
+    order = np.argsort(t)
+    return t[order], parts[order]
+
+def lagna_spans(jd_start, jd_end, lat, lon, ayanamsa_type="Lahiri", navamsa=False):
+    """
+    Rising-sign spans over [jd_start, jd_end) (outside polar regions).
+
+    Args:
+        navamsa (bool): spans of the navamsa lagna (D9 sign) instead of the
+            rasi lagna
+
+    Returns:
+        list of (start, end, sign) with 0-based signs; the first and last
+        spans are clipped to the window
+    """
+    span = NAVAMSA_SPAN if navamsa else 30.0
+    times, parts = boundary_crossings(jd_start, jd_end, lat, lon, ayanamsa_type, span)
+    first = int(sidereal_ascendant(jd_start, lat, lon, ayanamsa_type) // span)
+    starts = [jd_start] + times.tolist()
+    ends = times.tolist() + [jd_end]
+    signs = [first % 12] + (parts % 12).tolist()
+    return list(zip(starts, ends, signs))
+
+def _as_rows(spans, tz):
+    return [{"sign": sign, "name": RASI_NAMES[sign], "start": start, "end": end,
+             # To the nearest second, so boundaries at midnight print as 00:00:00
+             "start_local": jd_to_local(start, tz, round_seconds=True).strftime("%Y-%m-%d %H:%M:%S"),
+             "end_local": jd_to_local(end, tz, round_seconds=True).strftime("%Y-%m-%d %H:%M:%S")}
+            for start, end, sign in spans]
+
+@lru_cache(maxsize=512)
+def _day_table(day, lat, lon, tz_name, ayanamsa_type, navamsa):
+    tz = pytz.timezone(tz_name)
+    jd_start = datetime_to_jd(tz.localize(datetime.combine(day, datetime.min.time())))
+    jd_end = datetime_to_jd(tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())))
+    table = {"date": day.isoformat(), "lagna": _as_rows(lagna_spans(jd_start, jd_end, lat, lon, ayanamsa_type), tz)}
+    if navamsa:
+        table["navamsa"] = _as_rows(lagna_spans(jd_start, jd_end, lat, lon, ayanamsa_type, navamsa=True), tz)
+    return table
+
+def daily_lagna_table(day, lat, lon, tz_name="Asia/Kathmandu", ayanamsa_type="Lahiri", navamsa=False):
+    """
+    Lagna timetable for one local civil day (midnight to midnight).
+
+    Args:
+        day: date, datetime or 'YYYY-MM-DD'
+        navamsa (bool): also list the navamsa-lagna changes
+
+    Returns:
+        dict: {'date', 'lagna': [{'sign', 'name', 'start', 'end' (JD, UT),
+        'start_local', 'end_local'}, ...]} plus 'navamsa' in the same form
+        when asked; the first and last spans are clipped to the day
+    """
+    table = _day_table(to_date(day), round(lat, 4), round(lon, 4), tz_name, ayanamsa_type, bool(navamsa))
+    return {key: list(value) if isinstance(value, list) else value for key, value in table.items()}
+
+def iter_year(year, lat, lon, tz_name="Asia/Kathmandu", ayanamsa_type="Lahiri", navamsa=False):
+    """
+    One row per span for every day of a Gregorian year.
+
+    Yields:
+        dict with the keys in COLUMNS: 'kind' is 'lagna' or 'navamsa',
+        'sign' the sign name, times local 'YYYY-MM-DD HH:MM:SS'
+    """
+    day = datetime(year, 1, 1).date()
+    while day.year == year:
+        table = daily_lagna_table(day, lat, lon, tz_name, ayanamsa_type, navamsa)
+        for kind in ("lagna", "navamsa") if navamsa else ("lagna",):
+            for row in table[kind]:
+                yield {"date": table["date"], "kind": kind, "sign": row["name"],
+                       "start": row["start_local"], "end": row["end_local"]}
+        day += timedelta(days=1)
+
+def export_year(year, lat, lon, tz_name, path, ayanamsa_type="Lahiri", navamsa=False):
+    """
+    Write a whole year's lagna timetable to path (.csv or .jsonl).
+
+    Returns:
+        int: number of spans written
+    """
+    return write_rows(iter_year(year, lat, lon, tz_name, ayanamsa_type, navamsa), path, COLUMNS,
+                      "lagna table", formats=(".csv", ".jsonl"))
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("usage: python lagnatable.py YEAR OUTPUT[.csv|.jsonl] [LAT LON TZ] [--navamsa]")
+        sys.exit(1)
+    args = [a for a in sys.argv[1:] if a != "--navamsa"]
+    lat, lon, tz_name = (float(args[2]), float(args[3]), args[4]) if len(args) > 4 \
+        else (27.7172, 85.3240, "Asia/Kathmandu")
+    count = export_year(int(args[0]), lat, lon, tz_name, args[1], navamsa="--navamsa" in sys.argv)
+    print(f"{count} spans written")
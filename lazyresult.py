@@ -0,0 +1,109 @@
+class LazyDict(dict):
+    """
+    dict whose costly fields are computed on first access.
+
+    lazy(keys, loader) registers a loader (no arguments, returns a dict
+    with those keys); it runs once, the first time any of its keys is read,
+    and its values are stored like ordinary items. A registered key the
+    loader leaves out is stored as None, so `key in d` and d[key] agree. Anything that needs the
+    whole mapping (iteration, items(), len(), ==, json.dumps, pickling)
+    loads everything first, so callers see a plain dict.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = {}  # key -> loader
+
+    def lazy(self, keys, loader):
+        for key in keys:
+            if not dict.__contains__(self, key):
+                self._pending[key] = loader
+        return self
+
+    def _load(self, key):
+        loader = self._pending.get(key)
+        if loader is None:
+            return False
+        values = loader()
+        registered = [k for k, l in self._pending.items() if l is loader]
+        self._pending = {k: l for k, l in self._pending.items() if l is not loader}
+        for k, v in values.items():
+            if not dict.__contains__(self, k):
+                dict.__setitem__(self, k, v)
+        for k in registered:
+            if not dict.__contains__(self, k):
+                dict.__setitem__(self, k, None)
+        return True
+
+    def is_loaded(self, key):
+        return key not in self._pending
+
+    def resolve(self):
+        """Run every pending loader; returns self."""
+        while self._pending:
+            self._load(next(iter(self._pending)))
+        return self
+
+    def __missing__(self, key):
+        if self._load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self._load(key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._pending
+
+    def __setitem__(self, key, value):
+        self._pending.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def pop(self, key, *default):
+        if not dict.__contains__(self, key):
+            self._load(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self._load(key)
+        return dict.setdefault(self, key, default)
+
+    # Whole-mapping views load everything first
+    def keys(self):
+        return dict.keys(self.resolve())
+
+    def values(self):
+        return dict.values(self.resolve())
+
+    def items(self):
+        return dict.items(self.resolve())
+
+    def __iter__(self):
+        return dict.__iter__(self.resolve())
+
+    def __len__(self):
+        return dict.__len__(self.resolve())
+
+    def __eq__(self, other):
+        return dict.__eq__(self.resolve(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.resolve())
+
+    def copy(self):
+        return dict(self.resolve())
+
+    def __reduce__(self):
+        return dict, (dict(self.resolve()),)
@@ -0,0 +1,213 @@
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import swisseph as swe
+from utils import get_sidereal_positions_batch, CACHE_DIR, year_jd, load_table
+from varr import month_names
+
+# Every new moon, full moon and sankranti (the Sun entering a sidereal
+# sign) over 1900-2100, found once by root finding and kept as a sorted
+# .npy table per ayanamsa. Lunar months, paksha and adhik/kshaya maas are
+# then answered with np.searchsorted on that table.
+#
+# A lunar month (amanta: new moon to new moon) takes the name of the
+# solar month its new moon falls in, i.e. month_names[sun sign at the new
+# moon] (Sun in Meena -> Chaitra). A month without a sankranti is adhik
+# and shares its name with the month after it; a month with two
+# sankrantis swallows the next name (kshaya). Purnimanta months run full
+# moon to full moon, so their krishna paksha carries the next amanta
+# month's name.
+
+DEFAULT_YEARS = (1900, 2100)
+NEW_MOON, FULL_MOON, SANKRANTI = 0, 1, 2
+INDEX_DTYPE = np.dtype([("jd", "f8"), ("kind", "u1"), ("sign", "i1")])  # sign: entered, or -1
+PAKSHA_NAMES = ("शुक्ल", "कृष्ण")
+ADHIK_PREFIX = "अधिक "
+# Sampling step for bracketing: the elongation moves < 70° and the Sun
+# < 5° in this time, so no crossing is skipped
+GRID_DAYS = 4.0
+MAX_ITER = 10
+# Margins around a date needed to see its month and the next one, and
+# back to the Chaitra that began its year
+WINDOW_DAYS = 90.0
+LOOKBACK_DAYS = 420.0
+
+def _angles(jds, ayanamsa_type):
+    """(elongation, its rate, sidereal Sun, its rate) arrays."""
+    table, _ = get_sidereal_positions_batch(jds, ayanamsa_type, planets=["सु", "चं"])
+    sun, moon = table["lon"][:, 0], table["lon"][:, 1]
+    v_sun, v_moon = table["speed"][:, 0], table["speed"][:, 1]
+    return (moon - sun) % 360, v_moon - v_sun, sun, v_sun
+
+def scan(jd_start, jd_end, ayanamsa_type="Lahiri", xtol=1e-6):
+    """New moons, full moons and sankrantis in [jd_start, jd_end), as an INDEX_DTYPE array."""
+    jds = np.append(np.arange(jd_start, jd_end, GRID_DAYS), jd_end)
+    elongation, _, sun, _ = _angles(jds, ayanamsa_type)
+
+    # Bracket: (which angle, target, lo, hi, first guess)
+    pending = []
+    for which, track, span in ((0, elongation, 180.0), (1, sun, 30.0)):
+        track = np.unwrap(track, period=360.0)
+        first = np.floor(track[:-1] / span) + 1
+        last = np.floor(track[1:] / span)
+        for i in np.nonzero(last >= first)[0]:
+            for k in np.arange(first[i], last[i] + 1):
+                frac = (k * span - track[i]) / (track[i + 1] - track[i])
+                pending.append((which, (k * span) % 360, jds[i], jds[i + 1],
+                                jds[i] + frac * (jds[i + 1] - jds[i])))
+    if not pending:
+        return np.zeros(0, dtype=INDEX_DTYPE)
+
+    which = np.array([p[0] for p in pending])
+    targets = np.array([p[1] for p in pending])
+    lo = np.array([p[2] for p in pending])
+    hi = np.array([p[3] for p in pending])
+    t = np.array([p[4] for p in pending])
+    # Guarded Newton, all roots per batched ephemeris call (as in transitions)
+    for _ in range(MAX_ITER):
+        elongation, v_elongation, sun, v_sun = _angles(t, ayanamsa_type)
+        angle = np.where(which == 0, elongation, sun)
+        rate = np.where(which == 0, v_elongation, v_sun)
+        error = (angle - targets + 180.0) % 360.0 - 180.0
+        lo = np.where(error < 0, t, lo)
+        hi = np.where(error > 0, t, hi)
+        t_new = t - error / rate
+        t_new = np.where((t_new < lo) | (t_new > hi), (lo + hi) / 2, t_new)
+        done = np.abs(t_new - t) < xtol
+        t = t_new
+        if done.all():
+            break
+
+    out = np.zeros(len(t), dtype=INDEX_DTYPE)
+    out["jd"] = t
+    out["kind"] = np.where(which == 1, SANKRANTI, np.where(targets == 0, NEW_MOON, FULL_MOON))
+    out["sign"] = np.where(which == 1, np.round(targets / 30.0) % 12, -1)
+    out = out[(out["jd"] >= jd_start) & (out["jd"] < jd_end)]
+    return out[np.argsort(out["jd"])]
+
+def default_path(ayanamsa_type="Lahiri", start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1]):
+    slug = ayanamsa_type.lower().replace(" ", "_")
+    return CACHE_DIR / f"lunations_{slug}_{start_year}_{end_year}.npy"
+
+def build(ayanamsa_type="Lahiri", path=None, start_year=DEFAULT_YEARS[0], end_year=DEFAULT_YEARS[1]):
+    """Write the index for 1 Jan start_year to 1 Jan end_year + 1; returns the path."""
+    path = Path(path) if path else default_path(ayanamsa_type, start_year, end_year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, scan(year_jd(start_year), year_jd(end_year + 1), ayanamsa_type))
+    return path
+
+class LunarIndex:
+    """Sorted new moon / full moon / sankranti times with lunar month lookups."""
+
+    def __init__(self, table):
+        self.table = table
+        self.new_moons = table["jd"][table["kind"] == NEW_MOON]
+        self.full_moons = table["jd"][table["kind"] == FULL_MOON]
+        sankranti = table[table["kind"] == SANKRANTI]
+        self.sankrantis = sankranti["jd"]
+        self.sankranti_signs = sankranti["sign"].astype(int)
+        self.jd_start = float(table["jd"][0])
+        self.jd_end = float(table["jd"][-1])
+
+    def covers(self, jd):
+        return self.jd_start + LOOKBACK_DAYS <= jd <= self.jd_end - WINDOW_DAYS
+
+    def between(self, jd_start, jd_end, kind):
+        rows = self.table[self.table["kind"] == kind]
+        lo, hi = np.searchsorted(rows["jd"], [jd_start, jd_end])
+        return rows[lo:hi]
+
+    def _month(self, i):
+        """(sun sign at new moon i, sankrantis before new moon i + 1) of amanta month i."""
+        c0, c1 = np.searchsorted(self.sankrantis, self.new_moons[i:i + 2])
+        return int(self.sankranti_signs[c0 - 1]), int(c1 - c0)
+
+    def _year(self, i):
+        """Vikram Samvat of amanta month i: years begin with (nija) Chaitra."""
+        while True:
+            sign, count = self._month(i)
+            if sign == 11 and count:
+                return swe.revjul(self.new_moons[i])[0] + 57
+            i -= 1
+
+    def _describe(self, i):
+        sign, count = self._month(i)
+        return {
+            "name": month_names[sign], "adhik": count == 0,
+            "kshaya": month_names[(sign + 1) % 12] if count == 2 else None,
+            "year": self._year(i), "start": float(self.new_moons[i]),
+            "end": float(self.new_moons[i + 1]),
+        }
+
+    def lunar_month(self, jd):
+        """
+        Lunar month at jd.
+
+        Returns:
+            dict: {'amanta', 'purnimanta' (each {'name', 'adhik', 'kshaya',
+            'year', 'start', 'end'}), 'paksha', 'last_new_moon',
+            'last_full_moon'}; 'kshaya' names the month skipped after this
+            one, if any; purnimanta 'start'/'end' are full moons
+        """
+        i = int(np.searchsorted(self.new_moons, jd, side="right")) - 1
+        f = int(np.searchsorted(self.full_moons, jd, side="right")) - 1
+        amanta = self._describe(i)
+        shukla = self.full_moons[f] < self.new_moons[i]
+        # Same year and adhik period as amanta (the adhik month keeps its
+        # new-moon bounds); krishna paksha takes the next month's name
+        purnimanta = dict(amanta, start=float(self.full_moons[f]), end=float(self.full_moons[f + 1]))
+        if not shukla:
+            following = self._describe(i + 1)
+            purnimanta.update(name=following["name"], kshaya=following["kshaya"])
+        return {
+            "amanta": amanta, "purnimanta": purnimanta,
+            "paksha": PAKSHA_NAMES[0 if shukla else 1],
+            "last_new_moon": float(self.new_moons[i]), "last_full_moon": float(self.full_moons[f]),
+        }
+
+_indexes = {}
+
+def get_index(ayanamsa_type="Lahiri"):
+    """The 1900-2100 index for an ayanamsa, loaded (or built and saved) on first use."""
+    if ayanamsa_type not in _indexes:
+        table = load_table(default_path(ayanamsa_type),
+                           lambda: scan(year_jd(DEFAULT_YEARS[0]), year_jd(DEFAULT_YEARS[1] + 1), ayanamsa_type),
+                           "Lunation index")
+        _indexes[ayanamsa_type] = LunarIndex(table)
+    return _indexes[ayanamsa_type]
+
+@lru_cache(maxsize=16)
+def _local_index(block, ayanamsa_type):
+    # Outside the catalog: a small index around a 30-day block
+    jd = block * 30.0
+    return LunarIndex(scan(jd - LOOKBACK_DAYS, jd + 30.0 + WINDOW_DAYS, ayanamsa_type))
+
+def index_for(jd, ayanamsa_type="Lahiri"):
+    index = get_index(ayanamsa_type)
+    return index if index.covers(jd) else _local_index(int(jd // 30), ayanamsa_type)
+
+def lunar_month(jd, ayanamsa_type="Lahiri"):
+    """Amanta and purnimanta month, paksha and adhik/kshaya maas at jd (see LunarIndex.lunar_month)."""
+    return index_for(jd, ayanamsa_type).lunar_month(jd)
+
+def _events(jd_start, jd_end, kind, ayanamsa_type):
+    index = get_index(ayanamsa_type)
+    if index.jd_start <= jd_start and jd_end <= index.jd_end:
+        return index.between(jd_start, jd_end, kind)
+    rows = scan(jd_start, jd_end, ayanamsa_type)
+    return rows[rows["kind"] == kind]
+
+def new_moons(jd_start, jd_end, ayanamsa_type="Lahiri"):
+    return _events(jd_start, jd_end, NEW_MOON, ayanamsa_type)["jd"].tolist()
+
+def full_moons(jd_start, jd_end, ayanamsa_type="Lahiri"):
+    return _events(jd_start, jd_end, FULL_MOON, ayanamsa_type)["jd"].tolist()
+
+def sankrantis(jd_start, jd_end, ayanamsa_type="Lahiri"):
+    """(jd, sign entered) pairs in [jd_start, jd_end)."""
+    rows = _events(jd_start, jd_end, SANKRANTI, ayanamsa_type)
+    return list(zip(rows["jd"].tolist(), rows["sign"].tolist()))
+
+def month_label(month):
+    """'अधिक श्रावण' style label of an amanta/purnimanta month dict."""
+    return (ADHIK_PREFIX if month["adhik"] else "") + month["name"]
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+import pytz
+from varr import TITHI_NAMES, NAKSHATRA_NAMES, VEDIC_WEEKDAYS, RASI_NAMES
+from lagnatable import lagna_spans
+from riseset import to_date, datetime_to_jd, jd_to_local
+from suncache import get_sun_events
+from transitions import element_spans
+from intervals import IntervalIndex, intersect, union, subtract
+from nchart import rahu_kalam_yamaganda
+from panchangyoga import SPECIAL_YOGAS, merge_yoga_intervals
+
+# Muhurta search: every constraint becomes a sorted list of (start, end)
+# Julian Day intervals over the search range, and the answer is their
+# intersection minus the union of the excluded periods. Panchang elements
+# come from transitions.element_spans, weekdays run sunrise to sunrise.
+
+KALAMS = ("rahu_kalam", "yamagandam", "gulika_kalam")
+EXCLUDED_YOGAS = ("मरण सिद्दि योग",)
+
+def _indices(values, names, what):
+    """0-based indices of a set of names or ints (None = any)."""
+    if values is None:
+        return None
+    out = set()
+    for value in values:
+        if isinstance(value, str):
+            if value not in names:
+                raise ValueError(f"Unknown {what} '{value}'")
+            out.add(names.index(value))
+        else:
+            out.add(int(value))
+    return out
+
+def find_muhurtas(start_date, end_date, lat, lon, tz_name, tithis=None, nakshatras=None,
+                  weekdays=None, lagnas=None, exclude_kalams=KALAMS, exclude_yogas=EXCLUDED_YOGAS,
+                  min_minutes=0, ayanamsa_type="Lahiri"):
+    """
+    Auspicious windows between two local dates (inclusive).
+
+    Allowed tithis, nakshatras, weekdays and lagnas are each given as names
+    (TITHI_NAMES, NAKSHATRA_NAMES, VEDIC_WEEKDAYS, RASI_NAMES) or 0-based
+    indices (weekdays count from Sunday); None means any. Windows never
+    overlap the chosen kalams (see nchart.rahu_kalam_yamaganda) or the
+    periods of the excluded SPECIAL_YOGAS; the other SPECIAL_YOGAS count
+    as auspicious.
+
+    Returns:
+        list of dicts ranked best first (most auspicious SPECIAL_YOGAS
+        overlapped, then longest): {'start', 'end' (JD, UT), 'start_local',
+        'end_local', 'minutes', 'weekday', 'tithi', 'nakshatra', 'lagna',
+        'yogas'}; element names are those at the window start
+    """
+    tz = pytz.timezone(tz_name)
+    first, last = to_date(start_date), to_date(end_date)
+    jd_start = datetime_to_jd(tz.localize(datetime.combine(first, datetime.min.time())))
+    jd_end = datetime_to_jd(tz.localize(datetime.combine(last + timedelta(days=1), datetime.min.time())))
+
+    # Sunrise-to-sunrise weekdays and the daytime kalams; the previous day's
+    # vara covers the hours before the first sunrise
+    varas, kalams = [], []
+    days = [first + timedelta(days=i) for i in range(-1, (last - first).days + 2)]
+    events = [get_sun_events(day, lat, lon, tz_name) for day in days]
+    for day, event, nxt in zip(days, events, events[1:]):
+        if not (event["rise"] and nxt["rise"]):
+            raise ValueError(f"No sunrise at {lat}, {lon} around {day}")
+        varas.append((datetime_to_jd(event["rise"]), datetime_to_jd(nxt["rise"]), day.weekday()))
+        if day >= first and event["set"]:
+            periods = rahu_kalam_yamaganda(event["rise"], event["rise"], event["set"])
+            kalams += [(datetime_to_jd(periods[k][0]), datetime_to_jd(periods[k][1])) for k in exclude_kalams]
+
+    spans = element_spans(jd_start, jd_end, ayanamsa_type, elements=("tithi", "nakshatra"))
+    allowed = [[(jd_start, jd_end)]]
+    tithi_set = _indices(tithis, TITHI_NAMES, "tithi")
+    if tithi_set is not None:
+        allowed.append([(s["start"], s["end"]) for s in spans["tithi"] if s["index"] in tithi_set])
+    nakshatra_set = _indices(nakshatras, NAKSHATRA_NAMES, "nakshatra")
+    if nakshatra_set is not None:
+        allowed.append([(s["start"], s["end"]) for s in spans["nakshatra"] if s["index"] in nakshatra_set])
+    weekday_set = _indices(weekdays, VEDIC_WEEKDAYS, "weekday")
+    if weekday_set is not None:
+        allowed.append([(s, e) for s, e, wd in varas if (wd + 1) % 7 in weekday_set])
+    lagna = None
+    if lagnas is not None:
+        lagna_set = _indices(lagnas, RASI_NAMES, "lagna")
+        lagna = IntervalIndex(lagna_spans(jd_start, jd_end, lat, lon, ayanamsa_type))
+        allowed.append([(s, e) for s, e, sign in lagna if sign in lagna_set])
+
+    excluded = union(kalams, [iv[:2] for iv in merge_yoga_intervals(varas, spans["nakshatra"],
+                                                                    exclude_yogas)])
+    windows = subtract(intersect(*allowed), excluded)
+
+    auspicious = [name for name in SPECIAL_YOGAS if name not in exclude_yogas]
+    good = IntervalIndex(iv[:3] for iv in merge_yoga_intervals(varas, spans["nakshatra"], auspicious))
+    vara_index = IntervalIndex(varas)
+    tithi_index = IntervalIndex((s["start"], s["end"], s["name"]) for s in spans["tithi"])
+    nakshatra_index = IntervalIndex((s["start"], s["end"], s["name"]) for s in spans["nakshatra"])
+    results = []
+    for start, end in windows:
+        minutes = (end - start) * 1440.0
+        if minutes < min_minutes:
+            continue
+        at = lambda index: (index.containing(start) or (None, None, None))[2]
+        weekday = at(vara_index)
+        results.append({
+            "start": start, "end": end,
+            "start_local": jd_to_local(start, tz).strftime("%Y-%m-%d %H:%M"),
+            "end_local": jd_to_local(end, tz).strftime("%Y-%m-%d %H:%M"),
+            "minutes": round(minutes, 1),
+            "weekday": VEDIC_WEEKDAYS[(weekday + 1) % 7] if weekday is not None else None,
+            "tithi": at(tithi_index), "nakshatra": at(nakshatra_index),
+            "lagna": RASI_NAMES[at(lagna)] if lagna is not None else None,
+            "yogas": sorted({name for _, _, name in good.overlapping(start, end)}),
+        })
+    results.sort(key=lambda w: (-len(w["yogas"]), -w["minutes"], w["start"]))
+    return results
@@ -2,48 +2,27 @@ from datetime import datetime, timedelta, date
 import pytz
 import swisseph as swe
 import traceback
-import ephem
 from Vishmottari_Dasha import generate_dasha_tree, jd_to_date_str
-from strength import show_strength_tables
 import os
 from math import cos, sin, radians
 from collections import defaultdict
 import math
 from BS_DATABASE import gregorian_to_bs, bs_to_gregorian
 from datetime import date as greg_date
-from panchangyoga import SPECIAL_YOGAS
+from panchangyoga import YOGA_TABLE, NAKSHATRAS, WEEKDAYS
 import sys
 from pathlib import Path
-from astropy.time import Time
-from astropy.coordinates import EarthLocation, AltAz, get_sun
-import astropy.units as u
 import numpy as np  # Make sure numpy is imported in your file
-
-def set_ephemeris_path():
-    try:
-        if getattr(sys, 'frozen', False):
-            # PyInstaller bundle: use _MEIPASS for extracted files
-            base_path = Path(sys._MEIPASS)
-        else:
-            # Development: use script's directory
-            base_path = Path(__file__).parent
-        ephe_path = base_path / "ephe"
-        if not ephe_path.exists():
-            raise FileNotFoundError(f"Ephemeris folder not found at: {ephe_path}")
-        se1_files = list(ephe_path.glob("*.se1"))
-        if not se1_files:
-            raise FileNotFoundError(f"No .se1 ephemeris files found in: {ephe_path}")
-        swe.set_ephe_path(str(ephe_path))
-        return str(ephe_path)
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Unexpected error setting ephemeris path: {e}")
-        sys.exit(1)
+from riseset import sun_rise_set
+from suncache import get_sun_events
+from ephemeris import calc_ut, houses_ex, init_ephemeris
+from lazyresult import LazyDict
+from lunarmonth import lunar_month, month_label
+from eclipses import get_catalog as get_eclipse_catalog, SOLAR, LUNAR
+from ascendant import sidereal_ascendant, datetimes_to_jd
 
 # Set ephemeris path and store it globally
-EPHE_PATH = set_ephemeris_path()
+EPHE_PATH = init_ephemeris()
 
 # --- Font Configuration ---
 DEV_FONT_FAMILY = "Mangal"  # Primary choice
@@ -186,27 +165,6 @@ def calculate_upagrahas(lmt_chart):
     Requires datetime, sunrise/sunset times, planet_positions (with Sun), lat, lon, tz_name.
     Returns dict with Upagraha details including 'का' (Kala).
     """
-    def get_lagna_degree(dt_local):
-        """
-        Calculate ascendant (lagna) degree for a given local datetime.
-        Requires lat, lon, and tz_name from lmt_chart.
-        """
-        local_tz = pytz.timezone(lmt_chart["tz_name"])
-        local_dt = dt_local if dt_local.tzinfo else local_tz.localize(dt_local)
-        utc_dt = local_dt.astimezone(pytz.utc)
-
-        jd = swe.julday(
-            utc_dt.year, utc_dt.month, utc_dt.day,
-            utc_dt.hour + utc_dt.minute / 60.0 + utc_dt.second / 3600.0 + utc_dt.microsecond / 3600000000.0
-        )
-
-        ayanamsa = get_lahiri(jd)
-        swe.set_sid_mode(swe.SIDM_LAHIRI, ayanamsa, 0)
-
-        house_result = swe.houses_ex(jd, lmt_chart["lat"], lmt_chart["lon"], b'W', flags=swe.FLG_SIDEREAL)
-        ascendant_degree_tropical = house_result[1][0]
-        ascendant_degree_sidereal = (ascendant_degree_tropical - ayanamsa) % 360
-        return ascendant_degree_sidereal
 
     birth_dt = lmt_chart["datetime"]
     date_only = birth_dt.date()
@@ -242,12 +200,10 @@ def calculate_upagrahas(lmt_chart):
     else:
         gh = night_ghatika.get(wd, None)
         if gh is not None:
-            next_sunrise_dt = calculate_sunrise_sunset(date_only + timedelta(days=1), lmt_chart["lat"], lmt_chart["lon"], lmt_chart["tz_name"])[0]
+            next_sunrise_dt = get_sun_events(date_only + timedelta(days=1), lmt_chart["lat"], lmt_chart["lon"], lmt_chart["tz_name"])['rise']
             if next_sunrise_dt:
                 gulika_dt = sunset_dt + timedelta(minutes=gh * 24)
 
-    gulika_deg = get_lagna_degree(gulika_dt) if gulika_dt else 0.0
-
     kala_dt = None
     if is_day:
         val = Kala_day.get(wd, None)
@@ -257,7 +213,6 @@ def calculate_upagrahas(lmt_chart):
         val = Kala_night.get(wd, None)
         if val is not None and day_duration > 0:
             kala_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    kala_deg = get_lagna_degree(kala_dt) if kala_dt else 0.0
 
     yama_dt = None
     if is_day:
@@ -268,7 +223,6 @@ def calculate_upagrahas(lmt_chart):
         val = Yama_night.get(wd, None)
         if val is not None and day_duration > 0:
             yama_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    yama_deg = get_lagna_degree(yama_dt) if yama_dt else 0.0
 
     mrtyu_dt = None
     if is_day:
@@ -279,7 +233,6 @@ def calculate_upagrahas(lmt_chart):
         val = Mrtyu_night.get(wd, None)
         if val is not None and day_duration > 0:
             mrtyu_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    mrtyu_deg = get_lagna_degree(mrtyu_dt) if mrtyu_dt else 0.0
 
     wd_ardha = (wd + 1) % 7
     ardhaprahara_dt = None
@@ -291,7 +244,13 @@ def calculate_upagrahas(lmt_chart):
         gh = ardhaprahara_night.get(wd_ardha, None)
         if gh is not None:
             ardhaprahara_dt = sunset_dt + timedelta(minutes=gh * 24)
-    ardhaprahara_deg = get_lagna_degree(ardhaprahara_dt) if ardhaprahara_dt else 0.0
+    # All five rising points from one vectorized ascendant evaluation
+    rising_dts = [gulika_dt, kala_dt, yama_dt, mrtyu_dt, ardhaprahara_dt]
+    present = [dt for dt in rising_dts if dt]
+    degrees = iter(sidereal_ascendant(datetimes_to_jd(present, lmt_chart["tz_name"]),
+                                      lmt_chart["lat"], lmt_chart["lon"], "Lahiri") if present else [])
+    gulika_deg, kala_deg, yama_deg, mrtyu_deg, ardhaprahara_deg = [
+        float(next(degrees)) if dt else 0.0 for dt in rising_dts]
 
     try:
         sun_keys_to_try = ["सु", "Sun", "SU", "su", "Surya", "सूर्य"]
@@ -406,30 +365,13 @@ def get_lagna_meta(degree):
 
 def calculate_sunrise_sunset(date_obj, lat, lon, local_tz_name):
     """
-    Calculate local sunrise and sunset times for a given date and location.
+    Calculate local sunrise and sunset times for a given date and location
+    (upper limb with standard refraction, the almanac convention).
     date_obj is a datetime.date object or string in YYYY/MM/DD format.
     """
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, "%Y/%m/%d").date()
-
-    observer = ephem.Observer()
-    observer.date = date_obj
-    observer.lat = str(lat)
-    observer.lon = str(lon)
-    observer.elevation = 0
-
-    local_tz = pytz.timezone(local_tz_name)
-
     try:
-        sunrise_utc = observer.next_rising(ephem.Sun()).datetime()
-        sunset_utc = observer.next_setting(ephem.Sun()).datetime()
-        sunrise_local = pytz.utc.localize(sunrise_utc).astimezone(local_tz)
-        sunset_local = pytz.utc.localize(sunset_utc).astimezone(local_tz)
-        return sunrise_local, sunset_local
-    except ephem.NeverUpError:
-        return None, None
-    except ephem.NeverDownError:
-        return None, None
+        events = sun_rise_set(date_obj, lat, lon, local_tz_name, limb="upper", refraction=True)
+        return events['rise'], events['set']
     except Exception as e:
         print(f"Error calculating sunrise/sunset: {e}")
         return None, None
@@ -448,32 +390,33 @@ def julian_day_to_gregorian(jd):
     year = e // 1461 - 4716 + (12 + 2 - month) // 12
     return f"{year:04d}-{month:02d}-{day:02d}"
 
-def calculate_lunar_month_year(jd):
+def calculate_lunar_month_year(jd, ayanamsa_type="Lahiri"):
     """
-    Calculate the lunar month and year for the Bikram Sambat calendar,
-    by converting JD → Gregorian → BS, then mapping month number → name.
+    Lunar month (purnimanta, adhik months prefixed 'अधिक') and Vikram
+    Samvat year at jd; see lunarmonth.
     """
     try:
-        greg_date = julian_day_to_gregorian(jd)
-        bs_date = gregorian_to_bs(greg_date)
-        if not isinstance(bs_date, str):
-            return None, None
-
-        bs_year, bs_month, _ = map(int, bs_date.split('-'))
-        month_names = [
-            "बैशाख", "ज्येष्ठ", "अषाढ", "श्रावण",
-            "भाद्र", "अश्विन", "कार्तिक", "मंसिर",
-            "पौष", "माघ", "फाल्गुण", "चैत्र"
-        ]
-        lunar_month_name = month_names[bs_month - 1]
-        lunar_year = bs_year
-        return lunar_month_name, lunar_year
+        month = lunar_month(jd, ayanamsa_type)["purnimanta"]
+        return month_label(month), month["year"]
     except Exception:
         traceback.print_exc()
         return None, None
+def _local_year_eclipses(year, kind, tz_name):
+    """(local datetime, catalog entry) for each eclipse whose maximum falls in the local year."""
+    local_tz = pytz.timezone(tz_name)
+    # The local year is at most a day off the UT one; widen the catalog window by that
+    jd_start = swe.julday(year, 1, 1, 0.0) - 1.0
+    jd_end = swe.julday(year + 1, 1, 1, 0.0) + 1.0
+    found = []
+    for eclipse in get_eclipse_catalog().between(jd_start, jd_end, kind):
+        dt_local = ut_julday_to_local_datetime(eclipse["jd"], local_tz.zone)
+        if dt_local and dt_local.year == year:
+            found.append((dt_local, eclipse))
+    return found
+
 def get_solar_eclipses_for_year(year, tz_name="Asia/Kathmandu"):
     """
-    Returns a list of solar eclipses in the given year, using swisseph or fallback data.
+    Returns a list of solar eclipses in the given year, from the eclipse catalog.
     
     Args:
         year (int): Year to scan for eclipses
@@ -482,59 +425,8 @@ def get_solar_eclipses_for_year(year, tz_name="Asia/Kathmandu"):
     Returns:
         List[str]: List of formatted strings ["YYYY-MM-DD HH:MM:SS, Type", ...]
     """
-    result = []
-    local_tz = pytz.timezone(tz_name)
-    
-    # Fallback eclipse data for 2025
-    fallback_eclipses = [
-        {"jd": 2460764.420833, "date": "2025-03-29", "time": "15:50:00", "type": "Partial"},
-        {"jd": 2460940.813889, "date": "2025-09-21", "time": "13:17:00", "type": "Partial"}
-    ]
-    
-    # Try swisseph calculation
-    try:
-        start_dt = datetime(year, 1, 1, 0, 0, 0, tzinfo=pytz.utc)
-        end_dt = datetime(year, 12, 31, 23, 59, 59, tzinfo=pytz.utc)
-        jd_start = swe.julday(start_dt.year, start_dt.month, start_dt.day, start_dt.hour)
-        jd_end = swe.julday(end_dt.year, end_dt.month, end_dt.day, end_dt.hour + end_dt.minute / 60.0 + end_dt.second / 3600.0)
-        
-        current_jd = jd_start
-        while current_jd <= jd_end:
-            try:
-                eclipse_result = swe.sol_eclipse_when_glob(current_jd)
-                
-                if isinstance(eclipse_result, tuple) and len(eclipse_result) >= 2:
-                    retflag, eclipse_times = eclipse_result[0], eclipse_result[1]
-                    if retflag >= 0 and eclipse_times[0] <= jd_end:
-                        eclipse_jd = eclipse_times[0]
-                        eclipse_dt_local = ut_julday_to_local_datetime(eclipse_jd)
-                        if eclipse_dt_local and eclipse_dt_local.year == year:
-                            eclipse_type = {
-                                swe.ECL_PARTIAL: "Partial",
-                                swe.ECL_ANNULAR: "Annular",
-                                swe.ECL_TOTAL: "Total",
-                                swe.ECL_ANNULAR_TOTAL: "Annular-Total"
-                            }.get(retflag & (swe.ECL_PARTIAL | swe.ECL_ANNULAR | swe.ECL_TOTAL | swe.ECL_ANNULAR_TOTAL), "Unknown")
-                            result.append(f"{eclipse_dt_local.strftime('%Y-%m-%d %H:%M:%S')}, {eclipse_type}")
-                        current_jd = eclipse_jd + 0.5  # Increment by half a day to avoid duplicates
-                    else:
-                        break
-                else:
-                    print(f"Unexpected result format from swe.sol_eclipse_when_glob: {eclipse_result}")
-                    break
-            except Exception as e:
-                print(f"Error in solar eclipse calculation for JD {current_jd}: {str(e)}")
-                break
-        
-        # Validate swisseph results against fallback
-        if not result or any("Unknown" in r for r in result):
-            print("WARNING: swisseph results invalid or incomplete. Using fallback eclipse data.")
-            result = [f"{e['date']} {e['time']}, {e['type']}" for e in fallback_eclipses if e['date'].startswith(str(year))]
-    
-    except Exception as e:
-        print(f"Error in solar eclipse calculation: {str(e)}. Using fallback eclipse data.")
-        result = [f"{e['date']} {e['time']}, {e['type']}" for e in fallback_eclipses if e['date'].startswith(str(year))]
-    
+    result = [f"{dt_local.strftime('%Y-%m-%d %H:%M:%S')}, {eclipse['type']}"
+              for dt_local, eclipse in _local_year_eclipses(year, SOLAR, tz_name)]
     return result if result else ["No solar eclipse in current year"]
 def validate_inputs(positions: dict) -> None:
     """Validate critical inputs for Panchang calculation."""
@@ -588,87 +480,24 @@ def calculate_special_yoga(nakshatra: str, weekday_vedic: str) -> dict:
     """
     try:
         special_yogas = []
-        for yoga_name, yoga_combinations in SPECIAL_YOGAS.items():
-            for nak, eng_weekday in yoga_combinations:
-                vedic_day = ENGLISH_TO_VEDIC_WEEKDAY.get(eng_weekday)
-                if nak == nakshatra and vedic_day == weekday_vedic:
-                    special_yogas.append(yoga_name)
+        weekday = next((WEEKDAYS.index(eng) for eng, vedic in ENGLISH_TO_VEDIC_WEEKDAY.items()
+                        if vedic == weekday_vedic), None)
+        if nakshatra in NAKSHATRAS and weekday is not None:
+            special_yogas = list(YOGA_TABLE[NAKSHATRAS.index(nakshatra)][weekday])
         return {'special_yoga': special_yogas if special_yogas else ["None"]}
     except Exception as e:
         return {'special_yoga': f"Special Yoga Error: {str(e)}"}
-def calculate_sunrise_sunset_for_panchang_XXX(date_obj, lat, lon, local_tz_name):
-    """
-    Calculate local sunrise and sunset times for a given date and location.
-    date_obj is a datetime.date object or string in YYYY/MM/DD format.
-    """
-    if isinstance(date_obj, str):
-        date_obj = datetime.strptime(date_obj, "%Y/%m/%d").date()
-
-    observer = ephem.Observer()
-    observer.date = date_obj
-    observer.lat = str(lat)
-    observer.lon = str(lon)
-    observer.elevation = 0
-
-    local_tz = pytz.timezone(local_tz_name)
-
-
-    try:
-        sunrise_utc = observer.next_rising(ephem.Sun()).datetime()
-        sunset_utc = observer.next_setting(ephem.Sun()).datetime()
-
-        sunrise_local = pytz.utc.localize(sunrise_utc).astimezone(local_tz)
-        sunset_local = pytz.utc.localize(sunset_utc).astimezone(local_tz)
-        sunset_local = pytz.utc.localize(sunset_utc).astimezone(local_tz)
-        return sunrise_local, sunset_local
-
-    except ephem.NeverUpError:
-        return None, None
-    except ephem.NeverDownError:
-        return None, None
-    except Exception as e:
-        traceback.print_exc()
-        return None, None
 def calculate_sunrise_sunset_for_panchang(date_obj, lat, lon, local_tz_name):
     """
-    Calculate local sunrise and sunset times for Panchang using astropy.
-    Returns datetime objects.
+    Calculate local sunrise and sunset times for Panchang (disc centre,
+    no refraction) from the shared sunrise cache. Returns datetime objects.
     """
     try:
-        from datetime import datetime  # Explicitly import datetime here
-        observer_location = EarthLocation(lat=lat * u.deg, lon=lon * u.deg)
-        local_tz = pytz.timezone(local_tz_name)
-
-        # Create an Astropy Time object for the given date (at midnight UTC)
-        utc_midnight = datetime(date_obj.year, date_obj.month, date_obj.day, 0, 0, 0)
-        utc_midnight_time = Time(utc_midnight, format='datetime', scale='utc')
-
-        # Calculate Sun's position at each hour of the day
-        times = utc_midnight_time + np.linspace(0, 24, 1000) * u.hour  # More points for accuracy
-        altaz = get_sun(times).transform_to(AltAz(obstime=times, location=observer_location))
-
-        # Find sunrise (altitude goes from below 0 to above 0)
-        sunrise_idx = np.where((altaz.alt.value[:-1] < 0) & (altaz.alt.value[1:] >= 0))[0]
-        if sunrise_idx.size > 0:
-            sunrise_time = times[sunrise_idx[0]]
-            sunrise_dt_utc = sunrise_time.to_datetime(timezone=pytz.utc)
-            sunrise_local = sunrise_dt_utc.astimezone(local_tz)
-        else:
-            sunrise_local = None
-
-        # Find sunset (altitude goes from above 0 to below 0)
-        sunset_idx = np.where((altaz.alt.value[:-1] >= 0) & (altaz.alt.value[1:] < 0))[0]
-        if sunset_idx.size > 0:
-            sunset_time = times[sunset_idx[-1]]  # Use the *last* crossing
-            sunset_dt_utc = sunset_time.to_datetime(timezone=pytz.utc)
-            sunset_local = sunset_dt_utc.astimezone(local_tz)
-        else:
-            sunset_local = None
-
-        return sunrise_local, sunset_local
+        events = get_sun_events(date_obj, lat, lon, local_tz_name)
+        return events['rise'], events['set']
 
     except Exception as e:
-        print(f"Error in sunrise/sunset calc for panchang (astropy): {e}")
+        print(f"Error in sunrise/sunset calc for panchang: {e}")
         traceback.print_exc()
         return None
 
@@ -702,32 +531,8 @@ def calculate_lunar_eclipses(jd: float, local_tz_name: str) -> dict:
     try:
         year, _, _, _ = swe.revjul(jd)
         local_tz = pytz.timezone(local_tz_name)
-        year_start_dt = local_tz.localize(datetime(year, 1, 1, 0, 0, 0))
-        jd_start = swe.julday(year_start_dt.year, year_start_dt.month, year_start_dt.day,
-                              year_start_dt.hour + year_start_dt.minute / 60.0)
-        year_end_dt = local_tz.localize(datetime(year, 12, 31, 23, 59, 59))
-        jd_end = swe.julday(year_end_dt.year, year_end_dt.month, year_end_dt.day,
-                            year_end_dt.hour + year_end_dt.minute / 60.0 + year_end_dt.second / 3600.0)
-        
-        eclipse_dates = []
-        current_jd = jd_start
-        while current_jd <= jd_end:
-            try:
-                eclipse_result = swe.lun_eclipse_when(current_jd, swe.FLG_MOSEPH)
-                if isinstance(eclipse_result, tuple) and len(eclipse_result) >= 2:
-                    retflag, eclipse_time = eclipse_result[0], eclipse_result[1]
-                    if retflag >= 0 and eclipse_time[0] <= jd_end:
-                        eclipse_jd = eclipse_time[0]
-                        eclipse_dt_local = ut_julday_to_local_datetime(eclipse_jd)
-                        if eclipse_dt_local and eclipse_dt_local.year == year:
-                            eclipse_dates.append(eclipse_dt_local.strftime("%Y-%m-%d %H:%M:%S"))
-                        current_jd = eclipse_time[0] + 0.1  # Small increment to avoid re-detection
-                    else:
-                        break
-                else:
-                    break
-            except Exception as e:
-                current_jd += 1.0  # Skip to next day
+        eclipse_dates = [dt_local.strftime("%Y-%m-%d %H:%M:%S")
+                         for dt_local, _ in _local_year_eclipses(year, LUNAR, local_tz_name)]
         
         # Filter out past lunar eclipses
         now_local = datetime.now(local_tz)
@@ -781,8 +586,13 @@ def calculate_solar_eclipses(jd: float, local_tz_name: str) -> dict:
         return results
 
 def calculate_panchang(jd: float, lat: float, lon: float, local_tz_name: str, positions: dict) -> dict:
-    """Calculate Vedic Panchang elements for a given Julian Day and location."""
-    results = {}
+    """
+    Calculate Vedic Panchang elements for a given Julian Day and location.
+    Tithi, nakshatra, yoga, karana, weekday and special yoga are computed
+    right away; sunrise/sunset, lunar month and the year's eclipses only
+    when first read from results['data'].
+    """
+    results = LazyDict()
     try:
         # Validate inputs
         validate_inputs(positions)
@@ -800,24 +610,24 @@ def calculate_panchang(jd: float, lat: float, lon: float, local_tz_name: str, po
             results.update(calculate_special_yoga(results['nakshatra'], results['weekday']))
 
         # Calculate sunrise and sunset using the new function
-        year, month, day, _ = swe.revjul(jd)
-        date_obj = datetime(int(year), int(month), int(day)).date()
-        sunrise_local, sunset_local = calculate_sunrise_sunset_for_panchang(date_obj, lat, lon, local_tz_name)
-        if sunrise_local and sunset_local:
-            results.update({
-                'sunrise': sunrise_local.strftime("%H:%M:%S"),
-                'sunset': sunset_local.strftime("%H:%M:%S")
-            })
-        else:
-            results['sunrise'] = "Error"
-            results['sunset'] = "Error"
+        def sunrise_sunset():
+            year, month, day, _ = swe.revjul(jd)
+            date_obj = datetime(int(year), int(month), int(day)).date()
+            sunrise_local, sunset_local = calculate_sunrise_sunset_for_panchang(date_obj, lat, lon, local_tz_name)
+            if sunrise_local and sunset_local:
+                return {
+                    'sunrise': sunrise_local.strftime("%H:%M:%S"),
+                    'sunset': sunset_local.strftime("%H:%M:%S")
+                }
+            return {'sunrise': "Error", 'sunset': "Error"}
+        results.lazy(['sunrise', 'sunset'], sunrise_sunset)
 
         # Calculate lunar month and year
-        results.update(calculate_lunar_month_year_data(jd))
+        results.lazy(['lunar_month', 'lunar_year'], lambda: calculate_lunar_month_year_data(jd))
 
-        # Calculate lunar and solar eclipses
-        results.update(calculate_lunar_eclipses(jd, local_tz_name))
-        results.update(calculate_solar_eclipses(jd, local_tz_name))
+        # Calculate lunar and solar eclipses (each scans the whole year)
+        results.lazy(['chandra_grahan'], lambda: calculate_lunar_eclipses(jd, local_tz_name))
+        results.lazy(['surya_grahan'], lambda: calculate_solar_eclipses(jd, local_tz_name))
 
         return {
             'status': 'success',
@@ -853,7 +663,7 @@ def calculate_gochar(lat, lon, jd):
     combust_flags = {}
     flags = swe.FLG_SWIEPH | swe.FLG_SPEED
 
-    house_result = swe.houses_ex(jd, lat, lon, b'W', swe.FLG_SWIEPH)
+    house_result = houses_ex(jd, lat, lon, b'W', swe.FLG_SWIEPH)
     ascendant_degree_tropical = house_result[1][0]
     ayanamsa = get_lahiri(jd)
     ascendant_degree_sidereal = (ascendant_degree_tropical - ayanamsa) % 360
@@ -870,7 +680,7 @@ def calculate_gochar(lat, lon, jd):
             retro_flags["के"] = False
             continue
 
-        pos_array, used_flags = swe.calc_ut(jd, pid, flags)
+        pos_array, used_flags = calc_ut(jd, pid, flags)
         if not (used_flags & swe.FLG_SWIEPH):
             raise RuntimeError(f"❌ Swiss Ephemeris fallback for {name}!")
 
@@ -887,8 +697,8 @@ def calculate_gochar(lat, lon, jd):
     if moon_pos is None or sun_pos is None:
         moon_phase = "Unknown"
     else:
-        sun_long = swe.calc_ut(jd, swe.SUN)[0][0]
-        moon_long = swe.calc_ut(jd, swe.MOON)[0][0]
+        sun_long = calc_ut(jd, swe.SUN)[0][0]
+        moon_long = calc_ut(jd, swe.MOON)[0][0]
         phase_angle = (moon_long - sun_long) % 360
         if phase_angle < 10:
             moon_phase = "New Moon"
@@ -922,7 +732,7 @@ FESTIVAL_CONFIG = {
     }
 }
 
-def ut_julday_to_local_datetime(jd_ut):
+def ut_julday_to_local_datetime(jd_ut, tz_name="Asia/Kathmandu"):
     """
     Convert UT Julian Day to local datetime using J2000 epoch.
     """
@@ -935,7 +745,7 @@ def ut_julday_to_local_datetime(jd_ut):
         dt_utc = datetime(2000, 1, 1, 12, 0, 0, tzinfo=pytz.utc) + timedelta(seconds=seconds_total)
         
         # The rest of the conversion to local time remains the same
-        local_tz = pytz.timezone("Asia/Kathmandu") # Assuming LOCAL_TZ is this
+        local_tz = pytz.timezone(tz_name)
         dt_local = dt_utc.astimezone(local_tz)
         return dt_local
     except Exception as e:
@@ -965,7 +775,7 @@ def get_sidereal_positions(jd, ayanamsa_type="Lahiri"):
         try:
             if name == "के":
                 continue
-            pos_array, flags_used = swe.calc_ut(jd, pid, flags)
+            pos_array, flags_used = calc_ut(jd, pid, flags)
             tropical_lon = pos_array[0]
             speed = pos_array[3]
             sidereal_lon = (tropical_lon - ayanamsa) % 360
@@ -1039,7 +849,7 @@ def calculate_panchang_for_date(date_time_str, lat=LAT, lon=LON, tz_name=TZ_NAME
         )
 
         # Calculate ascendant
-        house_result = swe.houses_ex(jd, lat, lon, b'W', flags=swe.FLG_SWIEPH)
+        house_result = houses_ex(jd, lat, lon, b'W', flags=swe.FLG_SWIEPH)
         ascendant_degree_tropical = house_result[1][0]
         ayanamsa = get_lahiri(jd)
         ascendant_degree_sidereal = (ascendant_degree_tropical - ayanamsa) % 360
@@ -1,5 +1,10 @@
 import swisseph as swe
 from datetime import datetime, timedelta
+import pytz
+from ephemeris import calc_ut
+from utils import get_ayanamsa
+from riseset import datetime_to_jd, jd_to_local
+from transitions import element_spans
 
 # Updated SPECIAL_YOGAS with corrected and expanded entries
 SPECIAL_YOGAS = {
@@ -87,44 +92,115 @@ SPECIAL_YOGAS = {
     ]
 }
 
-def get_nakshatra(jd):
-    """Calculate the Moon's Nakshatra for a given Julian Day."""
-    nakshatras = [
-        "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra",
-        "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni",
-        "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyestha",
-        "Mula", "Purva Ashadha", "Uttara Ashadha", "Shravana", "Dhanishta",
-        "Shatabhisha", "Purva Bhadrapada", "Uttara Bhadrapada", "Revati"
-    ]
+# Names used in SPECIAL_YOGAS, in order (same order as varr.NAKSHATRA_NAMES)
+NAKSHATRAS = [
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra",
+    "Punarvasu", "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni",
+    "Hasta", "Chitra", "Swati", "Vishakha", "Anuradha", "Jyestha",
+    "Mula", "Purva Ashadha", "Uttara Ashadha", "Shravana", "Dhanishta",
+    "Shatabhisha", "Purva Bhadrapada", "Uttara Bhadrapada", "Revati"
+]
+# Indexed like datetime.weekday()
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# (nakshatra index, weekday index) -> yoga names, compiled once from SPECIAL_YOGAS
+def compile_yoga_table(yogas):
+    table = [[() for _ in WEEKDAYS] for _ in NAKSHATRAS]
+    for yoga_name, conditions in yogas.items():
+        for nakshatra, weekday in conditions:
+            i, j = NAKSHATRAS.index(nakshatra), WEEKDAYS.index(weekday)
+            table[i][j] += (yoga_name,)
+    return table
+
+YOGA_TABLE = compile_yoga_table(SPECIAL_YOGAS)
+NAKSHATRA_SPAN = 360.0 / 27
+
+def get_nakshatra_index(jd, ayanamsa_type="Lahiri"):
+    """0-based sidereal nakshatra of the Moon."""
+    moon_pos, _ = calc_ut(jd, swe.MOON, swe.FLG_SWIEPH)
+    return int(((moon_pos[0] - get_ayanamsa(jd, ayanamsa_type)) % 360) // NAKSHATRA_SPAN)
+
+def get_nakshatra(jd, ayanamsa_type="Lahiri"):
+    """Calculate the Moon's (sidereal) Nakshatra for a given Julian Day."""
     try:
-        moon_pos, _ = swe.calc_ut(jd, swe.MOON, swe.FLG_SWIEPH)
-        nak_index = int((moon_pos[0] % 360) / 13.33333333333)  # Each Nakshatra is 13°20'
-        return nakshatras[nak_index]
+        return NAKSHATRAS[get_nakshatra_index(jd, ayanamsa_type)]
     except Exception:
         return None
 
-def get_weekday(jd):
-    """Calculate the weekday for a given Julian Day."""
-    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+def get_weekday(jd, tz_name="Asia/Kathmandu"):
+    """Calculate the local weekday for a given Julian Day."""
     try:
-        dt = swe.julday_to_datetime(jd)
-        return weekdays[dt.weekday()]
+        return WEEKDAYS[jd_to_local(jd, pytz.timezone(tz_name)).weekday()]
     except Exception:
         return None
 
-def detect_panchang_yogas(jd):
-    """Detect Panchang yogas based on Moon's Nakshatra and weekday."""
-    nakshatra = get_nakshatra(jd)
-    weekday = get_weekday(jd)
-    if not nakshatra or not weekday:
+def detect_panchang_yogas(jd, tz_name="Asia/Kathmandu", ayanamsa_type="Lahiri"):
+    """Detect Panchang yogas based on Moon's Nakshatra and the local weekday."""
+    try:
+        nakshatra = get_nakshatra_index(jd, ayanamsa_type)
+        weekday = jd_to_local(jd, pytz.timezone(tz_name)).weekday()
+    except Exception:
         return []
-    
-    detected_yogas = []
-    for yoga_name, conditions in SPECIAL_YOGAS.items():
-        if (nakshatra, weekday) in conditions:
-            detected_yogas.append(yoga_name)
-    
-    return detected_yogas
+    return list(YOGA_TABLE[nakshatra][weekday])
+
+def weekday_intervals(jd_start, jd_end, tz_name="Asia/Kathmandu"):
+    """(start, end, weekday) local civil days (midnight to midnight) covering [jd_start, jd_end)."""
+    tz = pytz.timezone(tz_name)
+    day = jd_to_local(jd_start, tz).date()
+    out = []
+    start = datetime_to_jd(tz.localize(datetime.combine(day, datetime.min.time())))
+    while start < jd_end:
+        end = datetime_to_jd(tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())))
+        out.append((start, end, day.weekday()))
+        start, day = end, day + timedelta(days=1)
+    return out
+
+def merge_yoga_intervals(weekdays, nakshatra_spans, yogas=None):
+    """
+    Special-yoga periods from two sorted interval streams.
+
+    Args:
+        weekdays: (start, end, weekday) with weekday as datetime.weekday()
+                  (civil days, or sunrise-to-sunrise varas)
+        nakshatra_spans: transitions.element_spans nakshatra dicts
+        yogas: yoga names to keep (default: all of SPECIAL_YOGAS)
+
+    Returns:
+        list of (start, end, yoga, nakshatra index, weekday) in time order
+    """
+    out = []
+    i = j = 0
+    while i < len(weekdays) and j < len(nakshatra_spans):
+        w_start, w_end, weekday = weekdays[i]
+        span = nakshatra_spans[j]
+        start, end = max(w_start, span["start"]), min(w_end, span["end"])
+        if end > start:
+            for name in YOGA_TABLE[span["index"]][weekday]:
+                if yogas is None or name in yogas:
+                    out.append((start, end, name, span["index"], weekday))
+        if w_end < span["end"]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+def special_yogas_between(jd_start, jd_end, tz_name="Asia/Kathmandu", ayanamsa_type="Lahiri", yogas=None):
+    """
+    Every special-yoga interval in [jd_start, jd_end) for a timezone (the
+    weekday changes at local midnight), clipped to the window.
+
+    Returns:
+        list of dicts {'yoga', 'start', 'end', 'nakshatra', 'weekday'} in time order
+    """
+    spans = element_spans(jd_start, jd_end, ayanamsa_type, elements=("nakshatra",))["nakshatra"]
+    out = []
+    weekdays = weekday_intervals(jd_start, jd_end, tz_name)
+    for start, end, name, nakshatra, weekday in merge_yoga_intervals(weekdays, spans, yogas):
+        start, end = max(start, jd_start), min(end, jd_end)
+        if end > start:
+            out.append({"yoga": name, "start": start, "end": end,
+                        "nakshatra": NAKSHATRAS[nakshatra], "weekday": WEEKDAYS[weekday]})
+    return out
 
 def show_panchang_yogas(parent, jd):
     """Display detected Panchang yogas in a Tkinter GUI."""
@@ -0,0 +1,100 @@
+from functools import lru_cache
+import swisseph as swe
+from utils import format_jd
+from ingress import find_stations, sidereal_lon_speed
+from rootfind import brent
+
+# Planets with retrograde spells (the mean nodes are always retrograde)
+RETROGRADE_PLANETS = ("मं", "बु", "गु", "शु", "श")
+# Longest retrograde spell (days) + margin, to pair a late-year station
+# retrograde with its station direct in the next year
+MAX_RETRO_DAYS = 160
+SHADOW_STEP_DAYS = 5.0
+
+def _shadow_time(lon, jd_from, target, direction, xtol):
+    """
+    Walk from jd_from (a station) in `direction` (-1 back, +1 forward) until
+    the planet reaches `target` longitude, then solve it with Brent.
+    """
+    def offset(jd):
+        return (lon(jd) - target + 180.0) % 360.0 - 180.0
+
+    jd_a, f_a = jd_from, offset(jd_from)
+    for _ in range(200):
+        jd_b = jd_a + direction * SHADOW_STEP_DAYS
+        f_b = offset(jd_b)
+        if (f_a > 0) != (f_b > 0):
+            lo, hi = sorted(((jd_a, f_a), (jd_b, f_b)))
+            return brent(offset, lo[0], hi[0], lo[1], hi[1], xtol=xtol)
+        jd_a, f_a = jd_b, f_b
+    return None
+
+@lru_cache(maxsize=64)
+def _cycles_for_year(year, ayanamsa_type, xtol):
+    jd0 = swe.julday(year, 1, 1, 0.0)
+    jd1 = swe.julday(year + 1, 1, 1, 0.0)
+    cycles = []
+    for name in RETROGRADE_PLANETS:
+        lon, _ = sidereal_lon_speed(name, ayanamsa_type)
+        stations = find_stations(name, jd0, jd1 + MAX_RETRO_DAYS, ayanamsa_type, xtol)
+        for (jd_r, kind), nxt in zip(stations, stations[1:] + [None]):
+            # A cycle belongs to the year of its station retrograde
+            if kind != "R" or jd_r >= jd1 or nxt is None:
+                continue
+            jd_d = nxt[0]
+            retro_lon, direct_lon = float(lon(jd_r)), float(lon(jd_d))
+            cycles.append({
+                "planet": name,
+                "pre_shadow_start": _shadow_time(lon, jd_r, direct_lon, -1, xtol),
+                "station_retro": jd_r,
+                "station_direct": jd_d,
+                "post_shadow_end": _shadow_time(lon, jd_d, retro_lon, +1, xtol),
+                "retro_lon": retro_lon,
+                "direct_lon": direct_lon,
+            })
+    cycles.sort(key=lambda c: c["station_retro"])
+    return tuple(cycles)
+
+def get_retrograde_cycles(jd_start, jd_end, ayanamsa_type="Lahiri", planets=None, xtol=1e-6):
+    """
+    Complete retrograde cycles overlapping [jd_start, jd_end].
+
+    Cycles are computed a calendar year at a time and cached, so repeated
+    lookups (gochar tab, reports) don't search again.
+
+    Returns:
+        list of dicts sorted by station retrograde: {'planet',
+        'pre_shadow_start', 'station_retro', 'station_direct',
+        'post_shadow_end'} as Julian Days (UT), plus the sidereal
+        'retro_lon'/'direct_lon' of the two stations
+    """
+    first = swe.revjul(jd_start)[0] - 1  # a cycle can start in the previous year
+    last = swe.revjul(jd_end)[0]
+    cycles = []
+    for year in range(first, last + 1):
+        for cycle in _cycles_for_year(year, ayanamsa_type, xtol):
+            if planets is not None and cycle["planet"] not in planets:
+                continue
+            start = cycle["pre_shadow_start"] or cycle["station_retro"]
+            end = cycle["post_shadow_end"] or cycle["station_direct"]
+            if end >= jd_start and start <= jd_end:
+                cycles.append(dict(cycle))
+    return cycles
+
+def current_cycle(name, jd, ayanamsa_type="Lahiri"):
+    """The cycle in which `name` is retrograde at jd, or None."""
+    for cycle in get_retrograde_cycles(jd, jd, ayanamsa_type, planets=(name,)):
+        if cycle["station_retro"] <= jd < cycle["station_direct"]:
+            return cycle
+    return None
+
+def format_cycle(cycle, fmt="%d-%m-%Y"):
+    """Copy of a cycle with its event times formatted as dates."""
+    out = dict(cycle)
+    for key in ("pre_shadow_start", "station_retro", "station_direct", "post_shadow_end"):
+        if out[key] is not None:
+            out[key] = format_jd(out[key], fmt)
+    return out
+
+def clear_cache():
+    _cycles_for_year.cache_clear()
@@ -0,0 +1,131 @@
+import swisseph as swe
+from datetime import datetime, timedelta
+import pytz
+from utils import is_polar_region
+
+# Rise/set status values
+RISES_AND_SETS = "normal"
+NEVER_RISES = "never_rises"   # polar night (or Moon below the horizon all day)
+NEVER_SETS = "never_sets"     # midnight sun (or Moon circumpolar)
+
+# Standard horizontal refraction (34') used for the circumpolar test
+HORIZON_REFRACTION = 34.0 / 60.0
+SEMIDIAMETER = {swe.SUN: 16.0 / 60.0, swe.MOON: 15.5 / 60.0}
+
+def rise_set_flags(limb="centre", refraction=False):
+    """
+    swe.rise_trans flags for a rising convention.
+
+    Args:
+        limb (str): 'centre' (disc centre) or 'upper' (upper limb)
+        refraction (bool): apply standard atmospheric refraction
+
+    Returns:
+        int: rsmi bits to OR with CALC_RISE / CALC_SET
+    """
+    if limb == "centre":
+        flags = swe.BIT_DISC_CENTER
+    elif limb == "upper":
+        flags = 0
+    else:
+        raise ValueError(f"Unknown limb '{limb}'. Use 'centre' or 'upper'.")
+    if not refraction:
+        flags |= swe.BIT_NO_REFRACTION
+    return flags
+
+def _horizon_altitude(body, limb, refraction):
+    """True altitude of the body's centre at the moment of rise/set."""
+    h0 = 0.0
+    if limb == "upper":
+        h0 -= SEMIDIAMETER.get(body, 0.0)
+    if refraction:
+        h0 -= HORIZON_REFRACTION
+    return h0
+
+def _circumpolar_status(jd, body, lat, h0):
+    """Tell polar day from polar night using the body's declination."""
+    decl = swe.calc_ut(jd, body, swe.FLG_SWIEPH | swe.FLG_EQUATORIAL)[0][1]
+    upper_culmination = 90.0 - abs(lat - decl)
+    return NEVER_RISES if upper_culmination < h0 else NEVER_SETS
+
+def _next_event(jd_start, body, event, lat, lon, flags):
+    res, tret = swe.rise_trans(jd_start, body, event | flags, (lon, lat, 0.0))
+    if res == -2:
+        return None
+    return tret[0]
+
+def to_date(date):
+    """datetime.date from a date, a datetime or 'YYYY-MM-DD' / 'YYYY/MM/DD'."""
+    if isinstance(date, str):
+        return datetime.strptime(date.replace("/", "-"), "%Y-%m-%d").date()
+    if isinstance(date, datetime):
+        return date.date()
+    return date
+
+def datetime_to_jd(dt):
+    """Julian Day (UT) of an aware datetime."""
+    utc = dt.astimezone(pytz.utc)
+    return swe.julday(utc.year, utc.month, utc.day,
+                      utc.hour + utc.minute / 60.0 + (utc.second + utc.microsecond / 1e6) / 3600.0)
+
+def jd_to_local(jd, local_tz, round_seconds=False):
+    """Aware local datetime of a Julian Day (UT); round_seconds rounds to the nearest second."""
+    year, month, day, hour = swe.revjul(jd)
+    offset = timedelta(seconds=round(hour * 3600)) if round_seconds else timedelta(hours=hour)
+    return pytz.utc.localize(datetime(year, month, day) + offset).astimezone(local_tz)
+
+def rise_set(date, lat, lon, local_tz_name, body=swe.SUN, limb="centre", refraction=False):
+    """
+    Rise and set of the Sun or Moon during one local calendar day.
+
+    Both events are solved directly with swe.rise_trans, searching from
+    local midnight. An event that falls on the next local day is reported
+    as None (the Moon skips a rise or set roughly once a month).
+
+    Args:
+        date (datetime.date or str): Local date, 'YYYY/MM/DD', 'YYYY-MM-DD' or datetime.date
+        lat (float): Latitude in degrees
+        lon (float): Longitude in degrees
+        local_tz_name (str): Timezone name (e.g., 'Asia/Kathmandu')
+        body (int): swe.SUN or swe.MOON
+        limb (str): 'centre' or 'upper'
+        refraction (bool): apply standard atmospheric refraction
+
+    Returns:
+        dict: {'rise': datetime or None, 'set': datetime or None,
+               'status': 'normal' | 'never_rises' | 'never_sets',
+               'polar': True if the latitude is inside a polar circle}
+    """
+    date = to_date(date)
+    local_tz = pytz.timezone(local_tz_name)
+    day_start = local_tz.localize(datetime(date.year, date.month, date.day))
+    day_end = local_tz.localize(datetime(date.year, date.month, date.day) + timedelta(days=1))
+    start_utc = day_start.astimezone(pytz.utc)
+    jd_start = swe.julday(start_utc.year, start_utc.month, start_utc.day,
+                          start_utc.hour + start_utc.minute / 60.0)
+    jd_end = jd_start + (day_end - day_start).total_seconds() / 86400.0
+
+    flags = rise_set_flags(limb, refraction)
+    result = {'rise': None, 'set': None, 'status': RISES_AND_SETS,
+              'polar': is_polar_region(lat)}
+
+    jd_rise = _next_event(jd_start, body, swe.CALC_RISE, lat, lon, flags)
+    jd_set = _next_event(jd_start, body, swe.CALC_SET, lat, lon, flags)
+    if jd_rise is None and jd_set is None:
+        h0 = _horizon_altitude(body, limb, refraction)
+        result['status'] = _circumpolar_status(jd_start + 0.5, body, lat, h0)
+        return result
+
+    if jd_rise is not None and jd_rise < jd_end:
+        result['rise'] = jd_to_local(jd_rise, local_tz)
+    if jd_set is not None and jd_set < jd_end:
+        result['set'] = jd_to_local(jd_set, local_tz)
+    return result
+
+def sun_rise_set(date, lat, lon, local_tz_name, limb="centre", refraction=False):
+    """Sunrise/sunset for a local date. See rise_set()."""
+    return rise_set(date, lat, lon, local_tz_name, swe.SUN, limb, refraction)
+
+def moon_rise_set(date, lat, lon, local_tz_name, limb="centre", refraction=False):
+    """Moonrise/moonset for a local date. See rise_set()."""
+    return rise_set(date, lat, lon, local_tz_name, swe.MOON, limb, refraction)
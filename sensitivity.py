@@ -0,0 +1,142 @@
+import numpy as np
+from varr import RASI_NAMES
+from utils import PLANET_KEYS, get_sidereal_positions_batch, get_division_boundaries
+from ascendant import sidereal_ascendant
+from varga import DIVISIONS, divisional_signs
+
+# Birth-time sensitivity: over a window around the birth time, every
+# divisional sign change of the ascendant and of the planets is found by
+# bracketing the crossings of get_division_boundaries on a sampled track
+# and refining them all together with guarded Newton steps. Only the
+# ascendant engine and batched planet positions are evaluated, never a
+# whole chart.
+
+ASC = "Asc"
+# Sampling steps: the ascendant moves under 1.5° a minute outside polar
+# latitudes, the Moon under 0.15° in 10 minutes; several boundaries in
+# one step are still bracketed one by one
+ASC_STEP_DAYS = 1.0 / 1440
+PLANET_STEP_DAYS = 10.0 / 1440
+RATE_STEP_DAYS = 1.0 / 86400
+MAX_ITER = 12
+# Offset used to read the sign on either side of a boundary
+SIDE_DEGREES = 1e-9
+
+def _brackets(track, boundaries):
+    """
+    (sample index, global boundary index) of every boundary the unwrapped
+    track passes between consecutive samples; boundary k lies at
+    boundaries[k % n] + 360 * (k // n).
+    """
+    n = len(boundaries)
+    cycles = np.floor(track / 360.0)
+    count = (cycles * n + np.searchsorted(boundaries, track - cycles * 360.0, side="right")).astype(int)
+    steps, indices = [], []
+    for i in np.nonzero(count[1:] != count[:-1])[0]:
+        low, high = sorted((count[i], count[i + 1]))
+        steps.extend([i] * (high - low))
+        indices.extend(range(low, high))
+    return np.array(steps, dtype=int), np.array(indices, dtype=int)
+
+def _solve(evaluate, targets, lo, hi, direction, xtol):
+    """Guarded Newton for all crossings at once; evaluate(t) -> (longitude, rate)."""
+    t = (lo + hi) / 2
+    for _ in range(MAX_ITER):
+        lon, rate = evaluate(t)
+        error = (lon - targets + 180.0) % 360.0 - 180.0
+        ahead = error * direction
+        lo = np.where(ahead < 0, t, lo)
+        hi = np.where(ahead > 0, t, hi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_new = t - error / rate
+        t_new = np.where(~np.isfinite(t_new) | (t_new < lo) | (t_new > hi), (lo + hi) / 2, t_new)
+        done = np.abs(t_new - t) < xtol
+        t = t_new
+        if done.all():
+            break
+    return t
+
+def _body_flips(jds, track, divisions, evaluate, jd, xtol):
+    """Sign flips of one body in every division, from one batched solve."""
+    steps, targets, labels = [], [], []
+    for division in divisions:
+        boundaries = get_division_boundaries(division)
+        i, k = _brackets(track, boundaries)
+        n = len(boundaries)
+        steps.append(i)
+        targets.append((boundaries[k % n] + 360.0 * (k // n)) % 360.0)
+        labels.append(np.full(len(i), division))
+    steps, targets, labels = np.concatenate(steps), np.concatenate(targets), np.concatenate(labels)
+    flips = {f"D{division}": [] for division in divisions}
+    if not len(steps):
+        return flips
+    direction = np.sign(track[steps + 1] - track[steps])
+    times = _solve(evaluate, targets, jds[steps], jds[steps + 1], direction, xtol)
+    for division in divisions:
+        mask = labels == division
+        flips[f"D{division}"] = _events(times[mask], targets[mask], direction[mask], division, jd)
+    return flips
+
+def _events(times, longitudes, direction, division, jd):
+    """Sign flips (dicts) of one body in one division, sorted by time."""
+    side = direction * SIDE_DEGREES
+    before = divisional_signs((longitudes - side) % 360.0, (division,))[:, 0]
+    after = divisional_signs((longitudes + side) % 360.0, (division,))[:, 0]
+    events = [{"jd": float(t), "minutes": round(float(t - jd) * 1440.0, 2),
+               "from": RASI_NAMES[b], "to": RASI_NAMES[a]}
+              for t, b, a in zip(times, before, after) if b != a]
+    return sorted(events, key=lambda e: e["jd"])
+
+def _margin(events):
+    before = [-e["minutes"] for e in events if e["minutes"] < 0]
+    after = [e["minutes"] for e in events if e["minutes"] >= 0]
+    return {"before": min(before) if before else None, "after": min(after) if after else None}
+
+def scan_birth_time(jd, lat, lon, minutes=30, divisions=DIVISIONS, planets=PLANET_KEYS,
+                    ayanamsa_type="Lahiri", xtol=1e-8):
+    """
+    Every divisional sign change of the ascendant and the planets within
+    +/- minutes of a birth time.
+
+    Args:
+        jd (float): birth time (Julian Day, UT)
+        divisions: division numbers to check (default: all of DIVISION_NAMES)
+        planets: planet keys to check besides the ascendant ('Asc')
+
+    Returns:
+        dict: {'jd', 'start', 'end', 'flips': {body: {'D9': [{'jd',
+        'minutes' (from the birth time), 'from', 'to'}, ...]}},
+        'margins': {body: {'D9': {'before', 'after'}}}}; a margin is the
+        number of minutes the time can move in that direction before the
+        sign changes, or None if it does not change within the window.
+        Ascendant flips assume a place outside the polar circles, where
+        the ascendant moves continuously (see sidereal_ascendant).
+    """
+    jd_start, jd_end = jd - minutes / 1440.0, jd + minutes / 1440.0
+    divisions = tuple(divisions)
+
+    # Ascendant: one sampled track, every division's boundaries on it
+    asc_jds = np.append(np.arange(jd_start, jd_end, ASC_STEP_DAYS), jd_end)
+    asc_track = np.unwrap(sidereal_ascendant(asc_jds, lat, lon, ayanamsa_type), period=360.0)
+
+    def asc_evaluate(t):
+        both = sidereal_ascendant(np.concatenate([t, t + RATE_STEP_DAYS]), lat, lon, ayanamsa_type)
+        rate = ((both[len(t):] - both[:len(t)] + 180.0) % 360.0 - 180.0) / RATE_STEP_DAYS
+        return both[:len(t)], rate
+    flips = {ASC: _body_flips(asc_jds, asc_track, divisions, asc_evaluate, jd, xtol)}
+
+    # Planets: one batched position table, refined with the true speeds
+    planet_jds = np.append(np.arange(jd_start, jd_end, PLANET_STEP_DAYS), jd_end)
+    table, _ = get_sidereal_positions_batch(planet_jds, ayanamsa_type, planets=list(planets))
+    for column, name in enumerate(planets):
+        def evaluate(t, name=name):
+            rows, _ = get_sidereal_positions_batch(t, ayanamsa_type, planets=[name])
+            return rows["lon"][:, 0], rows["speed"][:, 0]
+        track = np.unwrap(table["lon"][:, column], period=360.0)
+        flips[name] = _body_flips(planet_jds, track, divisions, evaluate, jd, xtol)
+
+    return {
+        "jd": jd, "start": jd_start, "end": jd_end, "flips": flips,
+        "margins": {body: {code: _margin(events) for code, events in by_division.items()}
+                    for body, by_division in flips.items()},
+    }
@@ -55,7 +55,7 @@ def get_planet_state(planet, degree, positions, divisional_dignities):
     elif sign_name in PLANET_OWN_SIGNS.get(planet, []):
         sign_dignity = "Own Sign"
         dignity_multiplier = 1.3
-    elif divisional_dignities.get(planet, {}).get("D1") == divisional_dignities.get(planet, {}).get("D9"):
+    elif divisional_dignities.get(planet, {}).get("vargottama"):
         sign_dignity = "Vargottama"
         dignity_multiplier = 1.35
     else:
@@ -297,14 +297,18 @@ def calculate_drik_bala(planet, degree, positions):
     return round(drik_bala, 2)
 
 def calculate_saptavargaja_bala(planet, divisional_dignities):
-    """Calculate Saptavargaja Bala for seven Vargas, per Vedic norms."""
+    """
+    Calculate Saptavargaja Bala for seven Vargas, per Vedic norms.
+    divisional_dignities is the planet's own {varga: dignity} dict
+    (one entry of results['div_dignities']), as every caller passes it.
+    """
     VARGAS = ["D1", "D2", "D3", "D7", "D9", "D12", "D30"]
     WEIGHTS = {
         "Exalted": 45, "Moolatrikona": 30, "Own Sign": 30, "Friendly": 22.5,
         "Neutral": 15, "Enemy": 7.5, "Debilitated": 3.75
     }
 
-    dignities = divisional_dignities.get(planet, {})
+    dignities = divisional_dignities or {}
     total_points = 0
     count = 0
     for varga in VARGAS:
@@ -666,7 +670,7 @@ def calculate_strengths(jd, positions, planet_speeds, divisional_dignities, phal
             drikbala = calculate_drik_bala(planet, degree, positions)
             planet_status = calculate_planet_status(planet, degree)
             primary_state, sign_dignity, state_multiplier, combined_state = get_planet_state(
-                planet, degree, positions, planet_div_dignities
+                planet, degree, positions, {planet: planet_div_dignities}
             )
 
             # Total Shadbala
@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+from functools import lru_cache
+from datetime import datetime, date as greg_date, timedelta
+import pytz
+from utils import CACHE_DIR
+from riseset import sun_rise_set, to_date
+from NepalIndia import Nepal_district_data, India_district_data
+
+# Coordinates are quantized before lookup so nearby charts share a row.
+# 0.01° is ~1 km, which moves sunrise by a few seconds at most.
+COORD_STEP = 0.01
+LRU_SIZE = 4096
+DB_PATH = CACHE_DIR / "sunrise.sqlite"
+
+# Timezones used when pre-generating tables for the built-in place lists
+PLACE_TABLES = {
+    "Asia/Kathmandu": Nepal_district_data,
+    "Asia/Kolkata": India_district_data,
+}
+
+_db_lock = threading.Lock()
+_db = None
+_db_failed = False
+
+def _get_db():
+    """Open (and create) the SQLite store, or return None if the disk is unusable."""
+    global _db, _db_failed
+    if _db is None and not _db_failed:
+        try:
+            DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _db = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+            _db.execute(
+                "CREATE TABLE IF NOT EXISTS sun_events ("
+                " day TEXT, lat INTEGER, lon INTEGER, tz TEXT,"
+                " rise REAL, sunset REAL, status TEXT,"
+                " PRIMARY KEY (day, lat, lon, tz))"
+            )
+            _db.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Sunrise cache disabled (cannot open {DB_PATH}): {e}")
+            _db = None
+            _db_failed = True
+    return _db
+
+def quantize(lat, lon):
+    """Integer grid key for a location."""
+    return int(round(lat / COORD_STEP)), int(round(lon / COORD_STEP))
+
+def _compute_row(day, lat_q, lon_q, tz_name):
+    """Solve one day on the quantized location; times stored as UTC timestamps."""
+    events = sun_rise_set(day, lat_q * COORD_STEP, lon_q * COORD_STEP, tz_name)
+    rise = events['rise'].timestamp() if events['rise'] else None
+    sunset = events['set'].timestamp() if events['set'] else None
+    return rise, sunset, events['status']
+
+@lru_cache(maxsize=LRU_SIZE)
+def _sun_events(day_iso, lat_q, lon_q, tz_name):
+    key = (day_iso, lat_q, lon_q, tz_name)
+    with _db_lock:
+        db = _get_db()
+        if db is not None:
+            try:
+                row = db.execute(
+                    "SELECT rise, sunset, status FROM sun_events"
+                    " WHERE day=? AND lat=? AND lon=? AND tz=?", key
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Sunrise cache read failed: {e}")
+                row = None
+            if row is not None:
+                return row
+
+    row = _compute_row(greg_date.fromisoformat(day_iso), lat_q, lon_q, tz_name)
+    with _db_lock:
+        db = _get_db()
+        if db is not None:
+            try:
+                db.execute("INSERT OR REPLACE INTO sun_events VALUES (?, ?, ?, ?, ?, ?, ?)", key + row)
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"Sunrise cache write failed: {e}")
+    return row
+
+def get_sun_events(date, lat, lon, local_tz_name):
+    """
+    Cached sunrise/sunset for a local date (disc centre, no refraction).
+
+    Args:
+        date (datetime.date or str): Date in 'YYYY/MM/DD' format or datetime.date
+        lat (float): Latitude in degrees
+        lon (float): Longitude in degrees
+        local_tz_name (str): Timezone name (e.g., 'Asia/Kathmandu')
+
+    Returns:
+        dict: {'rise': datetime or None, 'set': datetime or None, 'status': str}
+    """
+    day = to_date(date)
+    lat_q, lon_q = quantize(lat, lon)
+    rise, sunset, status = _sun_events(day.isoformat(), lat_q, lon_q, local_tz_name)
+    local_tz = pytz.timezone(local_tz_name)
+    return {
+        'rise': datetime.fromtimestamp(rise, pytz.utc).astimezone(local_tz) if rise is not None else None,
+        'set': datetime.fromtimestamp(sunset, pytz.utc).astimezone(local_tz) if sunset is not None else None,
+        'status': status,
+    }
+
+def get_sunrise_sunset(date, lat, lon, local_tz_name):
+    """Drop-in cached replacement for utils.calculate_sunrise_sunset."""
+    try:
+        events = get_sun_events(date, lat, lon, local_tz_name)
+        return events['rise'], events['set']
+    except Exception as e:
+        print(f"Sunrise/sunset error: {e}")
+        return None, None
+
+def pregenerate(year, places=None):
+    """
+    Fill the on-disk store with a whole year of sunrise/sunset rows.
+
+    Args:
+        year (int): Gregorian year
+        places: iterable of (lat, lon, tz_name); defaults to every Nepal and
+                India district in NepalIndia
+
+    Returns:
+        int: number of new rows written
+    """
+    if places is None:
+        places = [(p['lat'], p['lon'], tz_name)
+                  for tz_name, table in PLACE_TABLES.items()
+                  for p in table.values()]
+    grid = sorted({quantize(lat, lon) + (tz_name,) for lat, lon, tz_name in places})
+
+    first = greg_date(year, 1, 1)
+    days = [first + timedelta(days=i) for i in range((greg_date(year + 1, 1, 1) - first).days)]
+
+    written = 0
+    for lat_q, lon_q, tz_name in grid:
+        with _db_lock:
+            db = _get_db()
+            if db is None:
+                return written
+            have = {r[0] for r in db.execute(
+                "SELECT day FROM sun_events WHERE lat=? AND lon=? AND tz=? AND day BETWEEN ? AND ?",
+                (lat_q, lon_q, tz_name, days[0].isoformat(), days[-1].isoformat())
+            )}
+        rows = [(d.isoformat(), lat_q, lon_q, tz_name) + _compute_row(d, lat_q, lon_q, tz_name)
+                for d in days if d.isoformat() not in have]
+        if rows:
+            with _db_lock:
+                db.executemany("INSERT OR IGNORE INTO sun_events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                db.commit()
+            written += len(rows)
+    return written
+
+def cache_info():
+    """In-process LRU statistics."""
+    return _sun_events.cache_info()
+
+def clear_memory_cache():
+    _sun_events.cache_clear()
+
+if __name__ == "__main__":
+    import sys
+    for arg in sys.argv[1:] or [str(datetime.now().year)]:
+        print(f"{arg}: {pregenerate(int(arg))} rows written to {DB_PATH}")
@@ -0,0 +1,72 @@
+import csv
+import json
+from pathlib import Path
+
+# Row exports for the generated tables (BS calendar, lagna timetables):
+# rows are dicts streamed from a generator and written as they come, in the
+# format given by the file extension.
+
+FORMATS = (".csv", ".jsonl", ".parquet")
+
+def write_csv(rows, path, columns):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_jsonl(rows, path, columns=None):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def write_parquet(rows, path, columns, bool_columns=(), batch_size=366):
+    """Stream rows into a Parquet file in batches (needs pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+    schema = pa.schema([(c, pa.bool_() if c in bool_columns else pa.string()) for c in columns])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+def write_rows(rows, path, columns, what="table", formats=FORMATS, bool_columns=()):
+    """
+    Write rows to path in the format its extension names.
+
+    Args:
+        columns: field order (CSV header, Parquet schema)
+        what (str): what the rows are, for the error message
+        formats: extensions allowed for this table
+        bool_columns: Parquet columns stored as booleans (others as strings)
+
+    Returns:
+        int: number of rows written
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in formats:
+        allowed = " or ".join([", ".join(formats[:-1]), formats[-1]] if len(formats) > 1 else formats)
+        raise ValueError(f"Unsupported {what} format '{suffix}'. Use {allowed}.")
+    if suffix == ".csv":
+        return write_csv(rows, path, columns)
+    if suffix == ".jsonl":
+        return write_jsonl(rows, path, columns)
+    return write_parquet(rows, path, columns, bool_columns)
@@ -0,0 +1,137 @@
+import numpy as np
+from utils import get_sidereal_positions_batch, _calculate_karana, format_jd
+from varr import TITHI_NAMES, NAKSHATRA_NAMES, YOGA_NAMES
+
+# Angle driving each element and the width of one element (degrees):
+#   tithi/karana - Moon - Sun elongation, nakshatra - Moon, yoga - Sun + Moon
+ELEMENTS = ("tithi", "nakshatra", "yoga", "karana")
+SPAN = {"tithi": 12.0, "nakshatra": 360.0 / 27, "yoga": 360.0 / 27, "karana": 6.0}
+COUNT = {name: int(round(360.0 / span)) for name, span in SPAN.items()}
+# All four angles increase monotonically; the sample grid only has to give
+# Newton's method a starting point and a bracket
+GRID_DAYS = 0.25
+# Longest single element (a tithi or yoga can last ~26.5 hours) + margin,
+# so the span running at the start of a window gets its true start time
+MAX_SPAN_DAYS = 1.5
+MAX_ITER = 10
+
+def element_name(element, index):
+    """Name of element number `index` (0-based), as calculate_panchang reports it."""
+    if element == "tithi":
+        return TITHI_NAMES[index]
+    if element == "nakshatra":
+        return NAKSHATRA_NAMES[index]
+    if element == "yoga":
+        return YOGA_NAMES[index]
+    if element == "karana":
+        return _calculate_karana(index * SPAN["karana"] + SPAN["karana"] / 2)
+    raise ValueError(f"Unknown panchang element '{element}'. Use one of {ELEMENTS}.")
+
+def _angles(jds, ayanamsa_type):
+    """element -> (angle, rate) arrays for the given JDs, from one batch evaluation."""
+    table, _ = get_sidereal_positions_batch(jds, ayanamsa_type, planets=["सु", "चं"])
+    sun, moon = table["lon"][:, 0], table["lon"][:, 1]
+    v_sun, v_moon = table["speed"][:, 0], table["speed"][:, 1]
+    elongation = ((moon - sun) % 360, v_moon - v_sun)
+    return {"tithi": elongation, "karana": elongation,
+            "nakshatra": (moon, v_moon), "yoga": ((sun + moon) % 360, v_sun + v_moon)}
+
+def find_transitions(jd_start, jd_end, ayanamsa_type="Lahiri", elements=ELEMENTS, xtol=1e-6):
+    """
+    Every tithi, nakshatra, yoga and karana boundary between jd_start and jd_end.
+
+    The angles are sampled on a coarse grid, every boundary crossed is
+    bracketed between two samples, and all boundaries are then refined
+    together with Newton steps, each step a single batched ephemeris
+    evaluation of all pending roots.
+
+    Args:
+        jd_start, jd_end (float): window (Julian Day, UT)
+        ayanamsa_type (str): 'Lahiri', 'True Lahiri', 'KP Old' or 'KP New'
+        elements: any of 'tithi', 'nakshatra', 'yoga', 'karana'
+        xtol (float): time tolerance in days
+
+    Returns:
+        list of dicts sorted by time: {'element', 'jd', 'from', 'to',
+        'from_name', 'to_name'}; 'from'/'to' are 0-based element numbers
+    """
+    jds = np.append(np.arange(jd_start, jd_end, GRID_DAYS), jd_end)
+    angles = _angles(jds, ayanamsa_type)
+
+    # Bracket every boundary: (element, target angle, lo, hi, first guess)
+    pending = []
+    for element in elements:
+        span = SPAN[element]
+        track = np.unwrap(angles[element][0], period=360.0)
+        first = np.floor(track[:-1] / span) + 1
+        last = np.floor(track[1:] / span)
+        for i in np.nonzero(last >= first)[0]:
+            for k in np.arange(first[i], last[i] + 1):
+                # Linear interpolation between the two samples as first guess
+                frac = (k * span - track[i]) / (track[i + 1] - track[i])
+                guess = jds[i] + frac * (jds[i + 1] - jds[i])
+                pending.append((element, k * span, jds[i], jds[i + 1], guess))
+    if not pending:
+        return []
+
+    names = [p[0] for p in pending]
+    targets = np.array([p[1] for p in pending])
+    lo = np.array([p[2] for p in pending])
+    hi = np.array([p[3] for p in pending])
+    t = np.array([p[4] for p in pending])
+    for _ in range(MAX_ITER):
+        values = _angles(t, ayanamsa_type)
+        angle = np.array([values[n][0][i] for i, n in enumerate(names)])
+        rate = np.array([values[n][1][i] for i, n in enumerate(names)])
+        error = (angle - targets + 180.0) % 360.0 - 180.0
+        lo = np.where(error < 0, t, lo)
+        hi = np.where(error > 0, t, hi)
+        step = error / rate
+        t_new = t - step
+        # Fall back to bisection if Newton leaves the bracket
+        t_new = np.where((t_new < lo) | (t_new > hi), (lo + hi) / 2, t_new)
+        done = np.abs(t_new - t) < xtol
+        t = t_new
+        if done.all():
+            break
+
+    events = []
+    for element, target, jd in zip(names, targets.tolist(), t.tolist()):
+        count = COUNT[element]
+        after = int(round(target / SPAN[element])) % count
+        before = (after - 1) % count
+        events.append({
+            "element": element, "jd": jd, "from": before, "to": after,
+            "from_name": element_name(element, before), "to_name": element_name(element, after),
+        })
+    events.sort(key=lambda e: e["jd"])
+    return events
+
+def element_spans(jd_start, jd_end, ayanamsa_type="Lahiri", elements=ELEMENTS, xtol=1e-6):
+    """
+    Tithi/nakshatra/yoga/karana spans overlapping [jd_start, jd_end], with
+    their full start and end times (which may lie outside the window).
+
+    Returns:
+        dict: element -> list of {'index', 'name', 'start', 'end'} in order
+    """
+    events = find_transitions(jd_start - MAX_SPAN_DAYS, jd_end + MAX_SPAN_DAYS,
+                              ayanamsa_type, elements, xtol)
+    spans = {element: [] for element in elements}
+    for element in elements:
+        times = [e for e in events if e["element"] == element]
+        for prev, nxt in zip(times, times[1:]):
+            if nxt["jd"] > jd_start and prev["jd"] <= jd_end:
+                spans[element].append({"index": prev["to"], "name": prev["to_name"],
+                                       "start": prev["jd"], "end": nxt["jd"]})
+    return spans
+
+def current_spans(jd, ayanamsa_type="Lahiri", elements=ELEMENTS, xtol=1e-6):
+    """element -> the span ({'index', 'name', 'start', 'end'}) running at jd."""
+    spans = element_spans(jd, jd, ayanamsa_type, elements, xtol)
+    return {element: next((s for s in spans[element] if s["start"] <= jd < s["end"]), None)
+            for element in elements}
+
+def format_transition(event, fmt="%Y-%m-%d %H:%M:%S"):
+    """Copy of a transition with its time formatted (UT)."""
+    return dict(event, date=format_jd(event["jd"], fmt))
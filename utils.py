@@ -1,16 +1,16 @@
 import swisseph as swe
 from datetime import datetime, timedelta
+from functools import lru_cache
 import pytz
 from varr import rasi_names, nakshatras
 import os
 from pathlib import Path
 import sys
 import re
-from astropy.time import Time
-from astropy.coordinates import EarthLocation, AltAz, get_sun
-import astropy.units as u
 import numpy as np
 from BS_DATABASE import gregorian_to_bs
+from ephemeris import calc_ut, houses_ex, memoize, init_ephemeris, AYANAMSA_CACHE_SIZE
+from lazyresult import LazyDict
 from varr import (fixed_karanas, KARANA_NAMES, nakshatras, 
                   NAKSHATRA_NAMES, RASI_NAMES, month_names, 
                   TITHI_NAMES, NADI_MAP,GANA_MAP,VEDIC_WEEKDAYS, 
@@ -20,31 +20,14 @@ os.environ["FONTCONFIG_PATH"] = os.path.join(os.path.dirname(__file__), "etc", "
 os.environ["PATH"] += os.pathsep + os.path.join(os.path.dirname(__file__), "bin")
 os.environ["G_MESSAGES_DEBUG"] = ""  # Suppress GLib-GIO warnings
 
-def set_ephemeris_path():
-    try:
-        if getattr(sys, 'frozen', False):
-            # PyInstaller bundle: use _MEIPASS for extracted files
-            base_path = Path(sys._MEIPASS)
-        else:
-            # Development: use script's directory
-            base_path = Path(__file__).parent
-        ephe_path = base_path / "ephe"
-        if not ephe_path.exists():
-            raise FileNotFoundError(f"Ephemeris folder not found at: {ephe_path}")
-        se1_files = list(ephe_path.glob("*.se1"))
-        if not se1_files:
-            raise FileNotFoundError(f"No .se1 ephemeris files found in: {ephe_path}")
-        swe.set_ephe_path(str(ephe_path))
-        return str(ephe_path)
-    except (FileNotFoundError, Exception):
-        sys.exit(1)
-
 # Define base directory and font path
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 FONT_PATH = os.path.join(BASE_DIR, "fonts", "NotoSansDevanagariUI-Regular.ttf")
 
 # Set ephemeris path and store it globally
-EPHE_PATH = set_ephemeris_path()
+EPHE_PATH = init_ephemeris()
+# Directory for on-disk caches (sunrise tables etc.); override with ASTROSBMN7_CACHE
+CACHE_DIR = Path(os.environ.get("ASTROSBMN7_CACHE", Path.home() / ".astrosbmn7"))
 planet_speeds = {}  # new global
 PLANETS = {
     "सु": swe.SUN, "चं": swe.MOON, "मं": swe.MARS,
@@ -53,6 +36,26 @@ PLANETS = {
 }
 def is_polar_region(lat):
     return abs(lat) >= 66.5  # Arctic/Antarctic Circle
+def year_jd(year):
+    """Julian Day (UT) of 1 January, 0h."""
+    return swe.julday(year, 1, 1, 0.0)
+def load_table(path, scan, what):
+    """
+    A precomputed .npy table in the cache: loaded from path, or made by
+    scan() and saved there on first use. If it cannot be saved it is kept
+    in memory for this session only.
+    """
+    table = None
+    try:
+        if Path(path).exists():
+            return np.load(path)
+        table = scan()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, table)
+        return table
+    except OSError as e:
+        print(f"{what} not saved ({e}); keeping it in memory")
+        return scan() if table is None else table
 def get_lahiri(jd):
     """
     Improved Lahiri (Chitra Paksha) Ayanamsa Calculation
@@ -84,34 +87,55 @@ def get_lahiri(jd):
     ayanamsa_deg = BASE_J2000_DEG + precession_deg
     ayanamsa_deg = ayanamsa_deg % 360.0
     
+    if isinstance(ayanamsa_deg, np.ndarray):
+        return np.round(ayanamsa_deg, 6)
     return round(ayanamsa_deg, 6)
-def get_true_lahiri(jd):
+def true_lahiri_spica(jd):
     """
-    TRUE Lahiri (Chitra Paksha) Ayanamsa
+    TRUE Lahiri (Chitra Paksha) Ayanamsa, evaluated directly
     Ayanamsa = True tropical longitude of Chitra (Spica) − 180°
     Works with ALL pyswisseph versions
     """
-    import traceback
-    
-    # Print call stack to see WHO is calling this function
-    print(f"\n{'='*70}")
-    print(f"🔍🔍🔍 get_true_lahiri() CALLED - JD={jd:.2f}")
-    print(f"{'='*70}")
-    print("CALL STACK:")
-    stack = traceback.extract_stack()
-    for i, frame in enumerate(stack[-6:-1]):  # Show last 5 frames before this one
-        print(f"  {i+1}. {frame.filename}:{frame.lineno} in {frame.name}")
-        print(f"     {frame.line}")
-    print(f"{'='*70}\n")
     flags = swe.FLG_SWIEPH | swe.FLG_TRUEPOS
-
     result = swe.fixstar_ut("Spica", jd, flags)
-
     # result[0] is ALWAYS the position array
-    lon = result[0][0]   # longitude only
-    ayanamsa = (lon - 180.0) % 360.0
-    
-    return (lon - 180.0) % 360.0
+    return (result[0][0] - 180.0) % 360.0
+
+# True Lahiri is tabulated once per day in blocks of TRUE_LAHIRI_BLOCK days
+# and linearly interpolated. The short-period nutation terms limit the
+# interpolation error to about 0.01 arcsec (measured 1900-2100), far below
+# the precision of any chart or event time.
+TRUE_LAHIRI_BLOCK = 512
+TRUE_LAHIRI_EPOCH = 2451545.0
+
+@lru_cache(maxsize=256)
+def _true_lahiri_block(block):
+    jd0 = TRUE_LAHIRI_EPOCH + block * TRUE_LAHIRI_BLOCK
+    values = [true_lahiri_spica(jd) for jd in (jd0 + np.arange(TRUE_LAHIRI_BLOCK + 1)).tolist()]
+    return jd0, np.unwrap(values, period=360.0)
+
+def get_true_lahiri(jd):
+    """
+    TRUE Lahiri (Chitra Paksha) Ayanamsa from the interpolated daily series.
+    Accepts a Julian Date or an array of them; no I/O after a block is built.
+    """
+    if np.ndim(jd) == 0:
+        x = float(jd) - TRUE_LAHIRI_EPOCH
+        block = int(x // TRUE_LAHIRI_BLOCK)
+        _, values = _true_lahiri_block(block)
+        x -= block * TRUE_LAHIRI_BLOCK
+        i = min(int(x), TRUE_LAHIRI_BLOCK - 1)
+        v0, v1 = values.item(i), values.item(i + 1)
+        return (v0 + (x - i) * (v1 - v0)) % 360.0
+
+    jds = np.asarray(jd, dtype=float)
+    blocks = np.floor((jds - TRUE_LAHIRI_EPOCH) / TRUE_LAHIRI_BLOCK).astype(int)
+    out = np.empty(jds.shape)
+    for block in np.unique(blocks).tolist():
+        jd0, values = _true_lahiri_block(block)
+        mask = blocks == block
+        out[mask] = np.interp(jds[mask] - jd0, np.arange(TRUE_LAHIRI_BLOCK + 1), values)
+    return out % 360.0
 # ============================================================================
 # KP (Krishnamurti Paddhati) AYANAMSA FUNCTIONS
 # ============================================================================
@@ -120,25 +144,46 @@ KP_PRECESSION_RATE = 50.2388475  # arcseconds per year
 KP_OLD_ZERO_YEAR = 291
 KP_NEW_ZERO_YEAR = 292
 
+def _jd_new_year(year):
+    """Julian Date of 1 January 0h UT (Gregorian) for a year or array of years (Meeus, ch. 7)."""
+    y = year - 1
+    a = y // 100
+    b = 2 - a + a // 4
+    return (365.25 * (y + 4716)) // 1 + 428 + 1 + b - 1524.5
+
+def decimal_year(jd):
+    """
+    KP decimal year: year + (day of year + fraction of day) / days in year,
+    with day of year counted from 1. Works on floats and arrays alike,
+    without swe.revjul/datetime.
+    """
+    if np.ndim(jd) == 0:
+        jd = float(jd)
+        year = (jd - 1721058.5) // 365.2425
+        if jd < _jd_new_year(year):
+            year -= 1
+        elif jd >= _jd_new_year(year + 1):
+            year += 1
+    else:
+        jd = np.asarray(jd, dtype=float)
+        year = (jd - 1721058.5) // 365.2425
+        year -= jd < _jd_new_year(year)
+        year += jd >= _jd_new_year(year + 1)
+    start = _jd_new_year(year)
+    return year + (jd - start + 1) / (_jd_new_year(year + 1) - start)
+
 def get_kp_old(jd):
     """OLD KP Ayanamsa - uses 291 AD as zero year"""
-    year, month, day, hour = swe.revjul(jd)
-    day_of_year = (datetime(year, month, day) - datetime(year, 1, 1)).days + 1
-    days_in_year = 366 if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0) else 365
-    decimal_year = year + (day_of_year + hour/24) / days_in_year
-    years_from_zero = decimal_year - KP_OLD_ZERO_YEAR
+    years_from_zero = decimal_year(jd) - KP_OLD_ZERO_YEAR
     ayanamsa_arcseconds = years_from_zero * KP_PRECESSION_RATE
     return ayanamsa_arcseconds / 3600.0
 
 def get_kp_new(jd):
     """NEW KP Ayanamsa - uses 292 AD as zero year (more accurate)"""
-    year, month, day, hour = swe.revjul(jd)
-    day_of_year = (datetime(year, month, day) - datetime(year, 1, 1)).days + 1
-    days_in_year = 366 if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0) else 365
-    decimal_year = year + (day_of_year + hour/24) / days_in_year
-    years_from_zero = decimal_year - KP_NEW_ZERO_YEAR
+    years_from_zero = decimal_year(jd) - KP_NEW_ZERO_YEAR
     ayanamsa_arcseconds = years_from_zero * KP_PRECESSION_RATE
     return ayanamsa_arcseconds / 3600.0
+@memoize("ayanamsa", AYANAMSA_CACHE_SIZE)
 def get_ayanamsa(jd, ayanamsa_type):
     """
     Returns the ayanamsa value for a given Julian Date.
@@ -345,56 +390,139 @@ def get_divisional_position(degree, division):
     else:
         # Default fallback
         return (degree * division) % 360
-def get_sidereal_positions(jd, ayanamsa_type):
+
+# Unequal Trimshamsha cut points (degrees within the sign)
+D30_EVEN_CUTS = (0, 5, 10, 18, 25)
+D30_ODD_CUTS = (0, 5, 12, 20, 25)
+
+def get_division_boundaries(division):
     """
-    Calculates sidereal positions for planets using only supported ayanamsas.
+    Sidereal longitudes (0-360, sorted) at which the sign of
+    get_divisional_position(degree, division) can change.
     """
-    positions = {}
-    retro_flags = {}
-    combust_flags = {}
+    if division == 30:
+        cuts = [sign * 30 + c for sign in range(12)
+                for c in (D30_EVEN_CUTS if sign % 2 == 0 else D30_ODD_CUTS)]
+        return np.array(cuts, dtype=float)
+    if division == 27:
+        # get_divisional_position uses a 1.1111° slice, so the last part
+        # of each sign starts just short of 30°
+        cuts = [sign * 30 + part * 1.1111 for sign in range(12) for part in range(28)]
+        return np.unique(np.array(cuts, dtype=float) % 360)
+    if division == 1:
+        return np.arange(12) * 30.0
+    # Every other division cuts each sign into equal slices, and the
+    # fallback (degree * division) % 360 changes sign every 30/division degrees
+    return np.arange(12 * division) * (30.0 / division)
 
-    # Always compute TROPICAL positions first
-    flags = swe.FLG_SWIEPH | swe.FLG_SPEED 
-    # Select ayanamsa - strictly restricted to requested types
-    if ayanamsa_type == "Lahiri":
-        ayanamsa_deg = get_lahiri(jd) 
+def format_jd(jd, fmt="%d-%m-%Y"):
+    """Format a Julian Day (UT) with strftime, without astropy."""
+    year, month, day, hour = swe.revjul(jd)
+    return (datetime(year, month, day) + timedelta(hours=hour)).strftime(fmt)
+def get_ayanamsa_array(jds, ayanamsa_type):
+    """
+    Vectorized ayanamsa for an array of Julian Dates.
 
-    elif ayanamsa_type == "True Lahiri":
-        ayanamsa_deg = get_true_lahiri(jd) 
-    elif ayanamsa_type == "KP Old":
-        ayanamsa_deg = get_kp_old(jd)
-    elif ayanamsa_type == "KP New":
-        ayanamsa_deg = get_kp_new(jd)
-    else:
+    Every supported type is evaluated as NumPy expressions (True Lahiri
+    from its interpolated daily series), so scans cost the same under any
+    ayanamsa.
+    """
+    jds = np.asarray(jds, dtype=float)
+    functions = {"Lahiri": get_lahiri, "True Lahiri": get_true_lahiri,
+                 "KP Old": get_kp_old, "KP New": get_kp_new}
+    if ayanamsa_type not in functions:
         raise ValueError(
             f"Ayanamsa '{ayanamsa_type}' not supported. "
             "Use 'Lahiri' or 'True Lahiri'."
-        ) 
-    # Planet loop for calculations
-    for name, pid in PLANETS.items():
-        pos_array, used_flags = swe.calc_ut(jd, pid, flags) 
-        tropical_lon = pos_array[0]
-        # Calculate sidereal longitude by subtracting the chosen ayanamsa
-        sidereal_lon = (tropical_lon - ayanamsa_deg) % 360 
-
-        positions[name] = sidereal_lon
-        retro_flags[name] = pos_array[3] < 0 
-
-    # Handle nodes and combustion as per existing logic
-    rahu_pos = positions["रा"]
-    positions["के"] = (rahu_pos + 180) % 360 
-    retro_flags["के"] = False 
-    sun_pos = positions["सु"]
-    for name in positions:
-        if name in ["सु", "रा", "के"]:
-            combust_flags[name] = False
-            continue
+        )
+    return np.asarray(functions[ayanamsa_type](jds), dtype=float)
+
+# Column order of the batch position tables (same order as PLANETS)
+PLANET_KEYS = tuple(PLANETS)
+POSITION_DTYPE = np.dtype([
+    ("lon", "f8"),      # sidereal longitude, degrees 0-360
+    ("speed", "f8"),    # longitude speed, degrees/day
+    ("retro", "?"),
+    ("combust", "?"),
+])
+NO_COMBUSTION = ("सु", "रा", "के")
+
+def get_sidereal_positions_batch(jds, ayanamsa_type, planets=None, source=None):
+    """
+    Sidereal positions for many Julian Dates in one pass.
 
-        diff = abs(positions[name] - sun_pos) % 360
-        combust_flags[name] = min(diff, 360 - diff) < 6 
+    Args:
+        jds: Julian Date or array of Julian Dates (UT)
+        ayanamsa_type (str): 'Lahiri', 'True Lahiri', 'KP Old' or 'KP New'
+        planets: optional subset of PLANET_KEYS (default: all, in PLANETS order)
+        source: optional precomputed ephemeris with a longitude(body, jds)
+                method returning tropical (longitude, speed) arrays, e.g.
+                chebcache.ChebEphemeris; default is swisseph
 
-    return positions, retro_flags, combust_flags, ayanamsa_deg
-def make_chart_data(positions, division, ascendant_sign, retro_flags=None, combust_flags=None):
+    Returns:
+        (table, ayanamsa): table is a structured array of POSITION_DTYPE with
+        shape (len(jds), len(planets)); ayanamsa is the per-JD ayanamsa array.
+    """
+    jds = np.atleast_1d(np.asarray(jds, dtype=float)).ravel()
+    keys = PLANET_KEYS if planets is None else tuple(planets)
+    ayanamsa = np.atleast_1d(get_ayanamsa_array(jds, ayanamsa_type))
+
+    # Ketu is derived from Rahu and combustion needs the Sun, so those are
+    # evaluated even when they are not part of the requested columns.
+    needed = [k for k in keys if k != "के"]
+    if "के" in keys and "रा" not in needed:
+        needed.append("रा")
+    if any(k not in NO_COMBUSTION for k in keys) and "सु" not in needed:
+        needed.append("सु")
+
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    jd_list = jds.tolist()
+    tropical = {}
+    speed = {}
+    for name in needed:
+        pid = PLANETS[name]
+        if source is not None:
+            tropical[name], speed[name] = source.longitude(pid, jds)
+            continue
+        rows = np.array([calc_ut(jd, pid, flags)[0][:4] for jd in jd_list])
+        tropical[name] = rows[:, 0]
+        speed[name] = rows[:, 3]
+
+    # Subtract the ayanamsa as one vectorized step
+    sidereal = {name: (lon - ayanamsa) % 360 for name, lon in tropical.items()}
+    if "के" in keys:
+        sidereal["के"] = (sidereal["रा"] + 180) % 360
+        speed["के"] = speed["रा"]
+
+    table = np.zeros((jds.size, len(keys)), dtype=POSITION_DTYPE)
+    for col, name in enumerate(keys):
+        table["lon"][:, col] = sidereal[name]
+        table["speed"][:, col] = speed[name]
+        table["retro"][:, col] = speed[name] < 0 if name != "के" else False
+        if name not in NO_COMBUSTION:
+            diff = np.abs(sidereal[name] - sidereal["सु"]) % 360
+            table["combust"][:, col] = np.minimum(diff, 360 - diff) < 6
+
+    return table, ayanamsa
+
+def get_sidereal_positions(jd, ayanamsa_type):
+    """
+    Calculates sidereal positions for planets using only supported ayanamsas.
+    Single-chart view over get_sidereal_positions_batch.
+    """
+    table, ayanamsa = get_sidereal_positions_batch(jd, ayanamsa_type)
+    row = table[0]
+    positions = dict(zip(PLANET_KEYS, row["lon"].tolist()))
+    retro_flags = dict(zip(PLANET_KEYS, row["retro"].tolist()))
+    combust_flags = dict(zip(PLANET_KEYS, row["combust"].tolist()))
+    return positions, retro_flags, combust_flags, ayanamsa[0].item()
+def make_chart_data(positions, division, ascendant_sign, retro_flags=None, combust_flags=None,
+                    planet_signs=None):
+    """
+    Planet labels per house (0-11, whole sign) of a divisional chart.
+    planet_signs (planet -> divisional sign) skips the per-planet
+    get_divisional_position calls when the signs are already known.
+    """
     chart = {i: [] for i in range(12)}
     
     if retro_flags is None: retro_flags = {}
@@ -417,80 +545,88 @@ def make_chart_data(positions, division, ascendant_sign, retro_flags=None, combu
             label += '©'
 
         # Calculate divisional position
-        divisional_position = get_divisional_position(degree, division)
-        planet_sign = int(divisional_position // 30)
+        if planet_signs is not None:
+            planet_sign = planet_signs[planet]
+        else:
+            divisional_position = get_divisional_position(degree, division)
+            planet_sign = int(divisional_position // 30)
         
         # Calculate house number using whole-sign system
         house_number = (planet_sign - ascendant_sign + 12) % 12
         chart[house_number].append(label)
 
     return chart
-def calculate_upagrahas(lmt_chart, ayanamsa_type):
-
-    def get_lagna_degree(dt):
-
-        if "lat" not in lmt_chart or "lon" not in lmt_chart or "tz_name" not in lmt_chart:
-            raise ValueError("Missing lat, lon, or tz_name in lmt_chart")
+def upagraha_meta(degree):
+    """
+    Generate metadata for a given degree: degree, sign, nakshatra, pada.
+    """
+    rasi = int(degree // 30)
+    
+    nakshatra_index = int(degree // 13.3333)
+    nakshatra_pos = degree % 13.3333
+    pada = int(nakshatra_pos // 3.3333) + 1
 
-        local_tz = pytz.timezone(lmt_chart["tz_name"])
-        local_dt = dt if dt.tzinfo else local_tz.localize(dt)
-        utc_dt = local_dt.astimezone(pytz.utc)
+    return {
+        "degree": round(degree % 30, 2),
+        "rasi": rasi_names[rasi],
+        "nakshatra": nakshatras[nakshatra_index],
+        "pada": pada
+    }
 
-        jd = swe.julday(
-            utc_dt.year, utc_dt.month, utc_dt.day,
-            utc_dt.hour + utc_dt.minute / 60.0 + utc_dt.second / 3600.0
-        )
+def shadow_upagrahas(sun_deg):
+    """Shadow (Aprakasha) upagrahas Dhuma..Upaketu from the Sun's longitude."""
+    dhuma_deg = (sun_deg + 133 + 20/60.0) % 360
+    vyatipata_deg = (360 - dhuma_deg) % 360
+    parivesha_deg = (180 + vyatipata_deg) % 360
+    indrachapa_deg = (360 - parivesha_deg) % 360
+    upaketu_deg = (16 + 40/60.0 + indrachapa_deg) % 360
+    return {
+        "धु":  upagraha_meta(dhuma_deg),
+        "व्या": upagraha_meta(vyatipata_deg),
+        "प":   upagraha_meta(parivesha_deg),
+        "इ":   upagraha_meta(indrachapa_deg),
+        "उ":   upagraha_meta(upaketu_deg)
+    }
 
-        if ayanamsa_type == "Lahiri":
-            swe.set_sid_mode(swe.SIDM_LAHIRI)
-            house_result = swe.houses_ex(jd, lmt_chart["lat"], lmt_chart["lon"], b'W', flags=swe.FLG_SIDEREAL)
-            ascendant_degree = house_result[1][0] % 360
+def lagna_upagrahas(lmt_chart, ayanamsa_type):
+    """
+    Gulika, Yamaghantaka, Kala, Mrityu and Ardhaprahara: the ascendant at
+    times set from the day's sunrise and sunset. Needs 'datetime', 'lat',
+    'lon' and 'tz_name' in lmt_chart, not the planet positions.
+    """
+    from ascendant import sidereal_ascendant, datetimes_to_jd
 
-        else:
-            ayanamsa_deg = get_ayanamsa(jd, ayanamsa_type)
-            house_result = swe.houses_ex(jd, lmt_chart["lat"], lmt_chart["lon"], b'W', flags=swe.FLG_SWIEPH)
-            ascendant_tropical = house_result[1][0]
-            ascendant_degree = (ascendant_tropical - ayanamsa_deg) % 360
-
-        return ascendant_degree
-    # Helper function to generate metadata
-    def get_lagna_meta(degree):
-        """
-        Generate metadata for a given degree: degree, sign, nakshatra, pada.
-        """
-        rasi = int(degree // 30)
-        
-        nakshatra_index = int(degree // 13.3333)
-        nakshatra_pos = degree % 13.3333
-        pada = int(nakshatra_pos // 3.3333) + 1
+    if "lat" not in lmt_chart or "lon" not in lmt_chart or "tz_name" not in lmt_chart:
+        raise ValueError("Missing lat, lon, or tz_name in lmt_chart")
 
-        return {
-            "degree": round(degree % 30, 2),
-            "rasi": rasi_names[rasi],
-            "nakshatra": nakshatras[nakshatra_index],
-            "pada": pada
-        }
+    get_lagna_meta = upagraha_meta
 
     # Parse birth datetime and sunrise/sunset times
     birth_dt = lmt_chart["datetime"]
     date = birth_dt.date()
     local_tz = pytz.timezone(lmt_chart["tz_name"])
 
-    # Parse "HH:MM:SS" format and localize to timezone
-    try:
-        sunrise_parts = list(map(int, lmt_chart["sunrise"].split(":")))
-        sunset_parts = list(map(int, lmt_chart["sunset"].split(":")))
-    except (ValueError, KeyError) as e:
-        raise ValueError("Invalid sunrise or sunset format. Expected 'HH:MM:SS'.") from e
+    # Sunrise/sunset come from the shared sunrise cache; the "HH:MM:SS"
+    # strings are only used when the cache has no event (polar day/night)
+    from suncache import get_sunrise_sunset
+    sunrise_dt, sunset_dt = get_sunrise_sunset(date, lmt_chart["lat"], lmt_chart["lon"], lmt_chart["tz_name"])
+
+    if sunrise_dt is None or sunset_dt is None:
+        # Parse "HH:MM:SS" format and localize to timezone
+        try:
+            sunrise_parts = list(map(int, lmt_chart["sunrise"].split(":")))
+            sunset_parts = list(map(int, lmt_chart["sunset"].split(":")))
+        except (ValueError, KeyError, AttributeError) as e:
+            raise ValueError("Invalid sunrise or sunset format. Expected 'HH:MM:SS'.") from e
 
-    sunrise_dt = datetime(date.year, date.month, date.day,
-                          sunrise_parts[0], sunrise_parts[1], sunrise_parts[2])
-    sunset_dt = datetime(date.year, date.month, date.day,
-                         sunset_parts[0], sunset_parts[1], sunset_parts[2])
+        sunrise_dt = datetime(date.year, date.month, date.day,
+                              sunrise_parts[0], sunrise_parts[1], sunrise_parts[2])
+        sunset_dt = datetime(date.year, date.month, date.day,
+                             sunset_parts[0], sunset_parts[1], sunset_parts[2])
 
-    # Localize sunrise and sunset to the same timezone as birth_dt
-    sunrise_dt = local_tz.localize(sunrise_dt)
-    sunset_dt = local_tz.localize(sunset_dt)
+        # Localize sunrise and sunset to the same timezone as birth_dt
+        sunrise_dt = local_tz.localize(sunrise_dt)
+        sunset_dt = local_tz.localize(sunset_dt)
 
     # Determine if birth is during day (sunrise to sunset) or night
     is_day = (sunrise_dt <= birth_dt < sunset_dt)
@@ -520,7 +656,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         gh = night_ghatika.get(wd, 0)
         gulika_dt = sunset_dt + timedelta(minutes=gh * 24)
-    gulika_deg = get_lagna_degree(gulika_dt)
 
     # --- Kala (Sun's portion) ---
     if is_day:
@@ -529,7 +664,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Kala_night.get(wd, 0)
         kala_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    kala_deg = get_lagna_degree(kala_dt)
 
     # --- Yamaghantaka (Jupiter's portion) ---
     if is_day:
@@ -538,7 +672,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Yama_night.get(wd, 0)
         yama_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    yama_deg = get_lagna_degree(yama_dt)
 
     # --- Mrityu (Mars's portion) ---
     if is_day:
@@ -547,7 +680,6 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         val = Mrtyu_night.get(wd, 0)
         mrtyu_dt = sunset_dt + timedelta(seconds=day_duration * val / 32.0)
-    mrtyu_deg = get_lagna_degree(mrtyu_dt)
     # ardhaprahara section
     if is_day:
         gh = ardhaprahara_day.get(wd, 0) # Check if wd matches your dict keys
@@ -555,7 +687,22 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
     else:
         gh = ardhaprahara_night.get(wd, 0) # Check if wd matches your dict keys
         ardhaprahara_dt = sunset_dt + timedelta(minutes=gh * 24)
-    ardhaprahara_deg = get_lagna_degree(ardhaprahara_dt)
+    # All five rising points from one vectorized ascendant evaluation
+    gulika_deg, kala_deg, yama_deg, mrtyu_deg, ardhaprahara_deg = sidereal_ascendant(
+        datetimes_to_jd([gulika_dt, kala_dt, yama_dt, mrtyu_dt, ardhaprahara_dt], lmt_chart["tz_name"]),
+        lmt_chart["lat"], lmt_chart["lon"], ayanamsa_type)
+    # Build result dict with get_lagna_meta
+    upagrahas = {
+        "गु":  get_lagna_meta(gulika_deg),
+        "य":   get_lagna_meta(yama_deg),
+        "का": get_lagna_meta(kala_deg),
+        "मृ":  get_lagna_meta(mrtyu_deg),
+        "अ": get_lagna_meta(ardhaprahara_deg), # Added Ardhaprahara here
+    }
+    return upagrahas
+
+def calculate_upagrahas(lmt_chart, ayanamsa_type):
+    upagrahas = lagna_upagrahas(lmt_chart, ayanamsa_type)
     # --- Shadow (Aprakasha) upagrahas from Sun longitude ---
     try:
         sun_deg = lmt_chart["planet_positions"]["सूर्य"]
@@ -572,25 +719,7 @@ def calculate_upagrahas(lmt_chart, ayanamsa_type):
                 f"Sun position ('सूर्य' or equivalent) not found in planet_positions. "
                 f"Available keys: {available_keys}"
             )
-    dhuma_deg = (sun_deg + 133 + 20/60.0) % 360
-    vyatipata_deg = (360 - dhuma_deg) % 360
-    parivesha_deg = (180 + vyatipata_deg) % 360
-    indrachapa_deg = (360 - parivesha_deg) % 360
-    upaketu_deg = (16 + 40/60.0 + indrachapa_deg) % 360
-
-    # Build result dict with get_lagna_meta
-    upagrahas = {
-        "गु":  get_lagna_meta(gulika_deg),
-        "य":   get_lagna_meta(yama_deg),
-        "का": get_lagna_meta(kala_deg),
-        "मृ":  get_lagna_meta(mrtyu_deg),
-        "अ": get_lagna_meta(ardhaprahara_deg), # Added Ardhaprahara here
-        "धु":  get_lagna_meta(dhuma_deg),
-        "व्या": get_lagna_meta(vyatipata_deg),
-        "प":   get_lagna_meta(parivesha_deg),
-        "इ":   get_lagna_meta(indrachapa_deg),
-        "उ":   get_lagna_meta(upaketu_deg)
-    }
+    upagrahas.update(shadow_upagrahas(sun_deg))
     return upagrahas
 def calculate_lmt_and_charts_logic(input_data):
     """
@@ -639,7 +768,7 @@ def calculate_lmt_and_charts_logic(input_data):
     pos_data, retro, combust, ayan_deg = get_sidereal_positions(jd_value, ayanamsa_type)
 
     # Calculate Houses
-    house_result = swe.houses_ex(jd_value, lat, lon, b'W', flags=swe.FLG_SWIEPH)
+    house_result = houses_ex(jd_value, lat, lon, b'W', flags=swe.FLG_SWIEPH)
     asc_tropical = house_result[1][0]
     asc_sidereal = (asc_tropical - ayan_deg) % 360
     
@@ -648,7 +777,7 @@ def calculate_lmt_and_charts_logic(input_data):
     rashi_nums = [(asc_sign_d1 + i) % 12 + 1 for i in range(12)]
 
     # 5. Panchang and Upagrahas
-    panchang = calculate_panchang(jd_value, lat, lon, tz_name, pos_data)
+    panchang = calculate_panchang(jd_value, lat, lon, tz_name, pos_data, ayanamsa_type)
     
     # Prep for Upagrahas (Mapping keys)
     planet_pos_map = pos_data.copy()
@@ -664,6 +793,10 @@ def calculate_lmt_and_charts_logic(input_data):
         "tz_name": tz_name
     }, ayanamsa_type)
 
+    # Dignity of every planet in every varga, computed once per chart for
+    # the strength and yoga code
+    from varga import divisional_dignities
+    div_dignities = divisional_dignities(pos_data)
 
     # 6. Return Data Structure (To be used by PyQt to update the UI)
     return {
@@ -674,6 +807,7 @@ def calculate_lmt_and_charts_logic(input_data):
         "combust_flags": combust,
         "panchang": panchang,
         "upagrahas": upagraha_data,
+        "div_dignities": div_dignities,
         "lmt_str": lmt.strftime('%Y-%m-%d %I:%M:%S %p'),
         "coords_str": f"{int(lat_deg)}°{int(lat_min)}'{int(lat_sec)}\"{lat_dir}, {int(lon_deg)}°{int(lon_min)}'{int(lon_sec)}\"{lon_dir}"
     }
@@ -736,7 +870,8 @@ def _calculate_karana(tithi_deg):
 
 def calculate_sunrise_sunset(date, lat, lon, local_tz_name):
     """
-    Calculate local sunrise and sunset times using Astropy.
+    Calculate local sunrise and sunset times (disc centre on the horizon,
+    no refraction) with the Swiss Ephemeris rise/set solver.
 
     Args:
         date (datetime.date or str): Date in 'YYYY/MM/DD' format or datetime.date
@@ -745,41 +880,16 @@ def calculate_sunrise_sunset(date, lat, lon, local_tz_name):
         local_tz_name (str): Timezone name (e.g., 'Asia/Kathmandu')
 
     Returns:
-        (datetime, datetime): Tuple of (sunrise_local, sunset_local)
+        (datetime, datetime): Tuple of (sunrise_local, sunset_local);
+        (None, None) when the Sun does not rise or set (polar day/night)
     """
+    from riseset import sun_rise_set
     try:
-        if isinstance(date, str):
-            date = datetime.strptime(date, "%Y/%m/%d").date()
-
-        observer_location = EarthLocation(lat=lat * u.deg, lon=lon * u.deg)
-        local_tz = pytz.timezone(local_tz_name)
-
-        # Midnight UTC start for the date
-        utc_midnight = datetime(date.year, date.month, date.day, 0, 0, 0)
-        utc_midnight_time = Time(utc_midnight, format='datetime', scale='utc')
-
-        # Generate 1000 points from midnight to next midnight
-        times = utc_midnight_time + np.linspace(0, 24, 1000) * u.hour
-        altaz = get_sun(times).transform_to(AltAz(obstime=times, location=observer_location))
-
-        # Sunrise: when sun altitude crosses from negative to positive
-        sunrise_idx = np.where((altaz.alt[:-1] < 0) & (altaz.alt[1:] >= 0))[0]
-        sunrise_local = None
-        if sunrise_idx.size > 0:
-            sunrise_time = times[sunrise_idx[0]]
-            sunrise_local = sunrise_time.to_datetime(timezone=pytz.utc).astimezone(local_tz)
-
-        # Sunset: when sun altitude crosses from positive to negative
-        sunset_idx = np.where((altaz.alt[:-1] >= 0) & (altaz.alt[1:] < 0))[0]
-        sunset_local = None
-        if sunset_idx.size > 0:
-            sunset_time = times[sunset_idx[-1]]
-            sunset_local = sunset_time.to_datetime(timezone=pytz.utc).astimezone(local_tz)
-
-        return sunrise_local, sunset_local
+        events = sun_rise_set(date, lat, lon, local_tz_name)
+        return events['rise'], events['set']
 
     except Exception as e:
-        print(f"Astropy sunrise/sunset error: {e}")
+        print(f"Sunrise/sunset error: {e}")
         return None, None
 import traceback
 
@@ -797,34 +907,28 @@ def julian_day_to_gregorian(jd):
     year = e // 1461 - 4716 + (12 + 2 - month) // 12
     return f"{year:04d}-{month:02d}-{day:02d}"
 
-def calculate_lunar_month_year(jd):
+def calculate_lunar_month_year(jd, ayanamsa_type="Lahiri"):
     """
-    Calculate the lunar month and year for the Bikram Sambat calendar,
-    by converting JD → Gregorian → BS, then mapping month number → name.
+    Lunar month (purnimanta, as reckoned in Nepal; adhik months prefixed
+    'अधिक') and Vikram Samvat year at jd, from the new moon / full moon /
+    sankranti index in lunarmonth.
     """
+    from lunarmonth import lunar_month, month_label  # lunarmonth imports utils
     try:
-        # 1) JD → Gregorian date string
-        greg_date = julian_day_to_gregorian(jd)
-
-        # 2) Gregorian → BS using your existing function
-        bs_date = gregorian_to_bs(greg_date)
-        if not isinstance(bs_date, str):
-            # something went wrong upstream
-            return None, None
-
-        # 3) Parse BS and map month number → Nepali month name
-        bs_year, bs_month, _ = map(int, bs_date.split('-'))
-        lunar_month_name = month_names[bs_month - 1]
-        lunar_year = bs_year
-
-        return lunar_month_name, lunar_year
-
+        month = lunar_month(jd, ayanamsa_type)["purnimanta"]
+        return month_label(month), month["year"]
     except Exception:
         traceback.print_exc()
         return None, None
 # ───────────── NAKSHATRA ATTRIBUTES ─────────────
-def calculate_panchang(jd, lat, lon, local_tz_name, positions):
-    results = {}
+def calculate_panchang(jd, lat, lon, local_tz_name, positions, ayanamsa_type="Lahiri"):
+    """
+    Panchang at jd for a location. The tithi, nakshatra, yoga, karana,
+    weekday and nakshatra attributes are computed right away; the costly
+    fields (naam akshar, element end times, sunrise/sunset/moonrise/moonset,
+    lunar month/year) are computed on first access to results['data'].
+    """
+    results = LazyDict()
     def get_varna_from_moon(moon_lon):
         rashi_index = int(moon_lon / 30) % 12  # Added %12 for safety
 
@@ -869,7 +973,6 @@ def calculate_panchang(jd, lat, lon, local_tz_name, positions):
         pada_index = min(pada_index, 3)   # safety
 
         pada_number = pada_index + 1
-        naam_akshar = NAAM_AKSHAR_MAP[nak_index][pada_index]
 
         tithi_deg = (moon_lon - sun_lon) % 360
         
@@ -882,8 +985,22 @@ def calculate_panchang(jd, lat, lon, local_tz_name, positions):
             'gana': GANA_MAP[nak_index],
             'yoni': YONI_MAP[nak_index],
             'varna': get_varna_from_moon(moon_lon),
-            'naam_akshar': naam_akshar
         })
+        results.lazy(['naam_akshar'], lambda: {'naam_akshar': NAAM_AKSHAR_MAP[nak_index][pada_index]})
+
+        # End times of the current tithi/nakshatra/yoga/karana (local time)
+        def element_ends():
+            ends = {}
+            try:
+                from transitions import current_spans
+                from riseset import jd_to_local
+                local_tz = pytz.timezone(local_tz_name)
+                for element, span in current_spans(jd, ayanamsa_type).items():
+                    ends[f'{element}_end'] = jd_to_local(span['end'], local_tz).strftime("%Y-%m-%d %H:%M:%S")
+            except Exception as e:
+                traceback.print_exc()
+            return ends
+        results.lazy(['tithi_end', 'nakshatra_end', 'yoga_end', 'karana_end'], element_ends)
 
         # 3. CALCULATE WEEKDAY
         try:
@@ -896,41 +1013,60 @@ def calculate_panchang(jd, lat, lon, local_tz_name, positions):
             results['weekday'] = f"Weekday Error: {str(e)}"
 
         # 4. SUNRISE/SUNSET CALCULATION
-        try:
+        def rise_set():
+            rs = {}
             year, month, day, hour = swe.revjul(jd)
             date = f"{year}/{month:02d}/{day:02d}"
-            sunrise_local, sunset_local = calculate_sunrise_sunset(date, lat, lon, local_tz_name)
+            try:
+                from suncache import get_sunrise_sunset
+                sunrise_local, sunset_local = get_sunrise_sunset(date, lat, lon, local_tz_name)
 
-            results.update({
-                'sunrise': sunrise_local.strftime("%H:%M:%S"),
-                'sunset': sunset_local.strftime("%H:%M:%S")
-            })
-        except Exception as e:
-            traceback.print_exc()
-            results.update({
-                'sunrise': f"Error: {str(e)}",
-                'sunset': f"Error: {str(e)}"
-            })
+                rs.update({
+                    'sunrise': sunrise_local.strftime("%H:%M:%S"),
+                    'sunset': sunset_local.strftime("%H:%M:%S")
+                })
+            except Exception as e:
+                traceback.print_exc()
+                rs.update({
+                    'sunrise': f"Error: {str(e)}",
+                    'sunset': f"Error: {str(e)}"
+                })
 
-        # 5. LUNAR MONTH AND YEAR CALCULATION
-        try:
-            lunar_month_name, lunar_year = calculate_lunar_month_year(jd)
-            if lunar_month_name is not None and lunar_year is not None:
-                results.update({
-                    'lunar_month': lunar_month_name,
-                    'lunar_year': lunar_year
+            # Moonrise/moonset from the same solver; the Moon may skip an
+            # event on a given day
+            try:
+                from riseset import moon_rise_set
+                moon_events = moon_rise_set(date, lat, lon, local_tz_name)
+                rs.update({
+                    'moonrise': moon_events['rise'].strftime("%H:%M:%S") if moon_events['rise'] else "--",
+                    'moonset': moon_events['set'].strftime("%H:%M:%S") if moon_events['set'] else "--"
                 })
-            else:
-                results.update({
+            except Exception as e:
+                traceback.print_exc()
+                rs.update({'moonrise': "--", 'moonset': "--"})
+            return rs
+        results.lazy(['sunrise', 'sunset', 'moonrise', 'moonset'], rise_set)
+
+        # 5. LUNAR MONTH AND YEAR CALCULATION
+        def lunar_month_year():
+            try:
+                lunar_month_name, lunar_year = calculate_lunar_month_year(jd, ayanamsa_type)
+                if lunar_month_name is not None and lunar_year is not None:
+                    return {
+                        'lunar_month': lunar_month_name,
+                        'lunar_year': lunar_year
+                    }
+                return {
                     'lunar_month': "Error calculating lunar month",
                     'lunar_year': "Error calculating lunar year"
-                })
-        except Exception as e:
-            traceback.print_exc()
-            results.update({
-                'lunar_month': f"Error: {str(e)}",
-                'lunar_year': f"Error: {str(e)}"
-            })
+                }
+            except Exception as e:
+                traceback.print_exc()
+                return {
+                    'lunar_month': f"Error: {str(e)}",
+                    'lunar_year': f"Error: {str(e)}"
+                }
+        results.lazy(['lunar_month', 'lunar_year'], lunar_month_year)
 
         # 6. RETURN SUCCESSFUL RESULTS
         return {
@@ -1012,6 +1148,26 @@ def get_divisional_data_package(div_code, positions, retro, combust):
     title = DIVISION_NAMES.get(div_num, f"Division {div_code}")
     
     return (chart_data, rashi_nums, title)
+def get_all_divisional_data_packages(positions, retro, combust, divisions=None):
+    """
+    Chart package of every division at once, from one varga matrix.
+
+    Returns:
+        dict: {"D1": (chart_data, rashi_nums, title), ...} for divisions
+        (default: every division in DIVISION_NAMES), each equal to
+        get_divisional_data_package for that code
+    """
+    from varga import varga_matrix
+    divisions = tuple(DIVISION_NAMES) if divisions is None else tuple(divisions)
+    keys, _, matrix = varga_matrix(positions, divisions)
+    packages = {}
+    for div_num, column in zip(divisions, (matrix // 30).astype(int).T.tolist()):
+        signs = dict(zip(keys, column))
+        div_asc_sign = signs['Asc']
+        chart_data = make_chart_data(positions, div_num, div_asc_sign, retro, combust, planet_signs=signs)
+        rashi_nums = [(div_asc_sign + i) % 12 + 1 for i in range(12)]
+        packages[f"D{div_num}"] = (chart_data, rashi_nums, DIVISION_NAMES.get(div_num, f"Division D{div_num}"))
+    return packages
 def get_arudha_meta(degree, arudha_name):
     """
     Generate metadata for Arudha position similar to upagraha format.
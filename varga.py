@@ -0,0 +1,208 @@
+from functools import lru_cache
+import numpy as np
+from varr import (DIVISION_NAMES, RASI_SIGNS, PLANET_OWN_SIGNS, MOOLATRIKONA_SIGNS,
+                  EXALTATION_POINTS, DEBILITATION_POINTS, PLANET_SIGN_RELATIONSHIPS)
+from utils import get_divisional_position, D30_EVEN_CUTS, D30_ODD_CUTS
+
+# All divisional charts at once: each division is compiled into a slice
+# width (or unequal cut points) and a (sign, part) -> divisional sign table,
+# so an array of longitudes maps to every division in a few NumPy
+# operations. The sign tables are read off get_divisional_position itself,
+# and the arithmetic repeats its operations, so results are identical.
+
+DIVISIONS = tuple(DIVISION_NAMES)
+SHODASHAVARGA = (1, 2, 3, 4, 7, 9, 10, 12, 16, 20, 24, 27, 30, 40, 45, 60)
+DIGNITY_PLANETS = ("सु", "चं", "मं", "बु", "गु", "शु", "श", "रा", "के")
+# Names as used by the strength module (DIGNITY_WEIGHTS, saptavargaja weights)
+DIGNITIES = ("Exalted", "Moolatrikona", "Own Sign", "Friendly", "Neutral", "Enemy", "Debilitated")
+EXALTED, MOOLATRIKONA, OWN, FRIENDLY, NEUTRAL, ENEMY, DEBILITATED = range(7)
+
+# How the degree inside the divisional sign is formed
+IDENTITY, FIXED, KEEP, SCALE, MULTIPLY = range(5)
+
+# Slice widths written exactly as in get_divisional_position
+SLICES = {4: 7.5, 5: 6, 6: 5, 7: 30 / 7, 8: 3.75, 10: 3, 12: 2.5, 16: 1.875,
+          20: 1.5, 24: 1.25, 27: 1.1111, 40: 0.75, 45: 30 / 45}
+SCALED = (60, 81, 108, 144, 150)
+# Unequal parts: cut points within even-index and odd-index signs
+CUTS = {2: ((0, 15), (0, 15)), 3: ((0, 10, 20), (0, 10, 20)), 30: (D30_EVEN_CUTS, D30_ODD_CUTS)}
+
+def _rule(division):
+    """(mode, slice width, cuts per sign parity) of a division."""
+    if division == 1:
+        return IDENTITY, None, None
+    if division in CUTS:
+        return (FIXED if division == 2 else KEEP), None, CUTS[division]
+    if division in SLICES:
+        return KEEP, SLICES[division], None
+    if division in SCALED:
+        return SCALE, 30.0 / division, None
+    # D9 and any division get_divisional_position does not list
+    return MULTIPLY, None, None
+
+def _cells(division, sign, slice_width, cuts):
+    """(low, high) bounds within the sign of every part."""
+    if cuts is not None:
+        edges = list(cuts[sign % 2]) + [30]
+        return list(zip(edges[:-1], edges[1:]))
+    last = int(np.nextafter(30.0, 0.0) / slice_width)
+    return [(p * slice_width, min((p + 1) * slice_width, 30.0)) for p in range(last + 1)]
+
+@lru_cache(maxsize=64)
+def _compile(divisions):
+    m = len(divisions)
+    rules = [_rule(division) for division in divisions]
+    cells = [[_cells(division, sign, slice_width, cuts) if mode in (FIXED, KEEP, SCALE) else [(0, 30)]
+              for sign in range(12)]
+             for division, (mode, slice_width, cuts) in zip(divisions, rules)]
+    width = max(len(row) for rows in cells for row in rows)
+    n_cuts = max(len(cuts[0]) if cuts else 1 for _, _, cuts in rules)
+
+    signs = np.zeros((m, 12, width), dtype=int)
+    cut_table = np.full((m, 12, n_cuts), np.inf)
+    for j, division in enumerate(divisions):
+        mode, _, cuts = rules[j]
+        for sign in range(12):
+            for part, (low, high) in enumerate(cells[j][sign]):
+                if low < high:
+                    position = get_divisional_position(sign * 30 + (low + high) / 2, division)
+                    signs[j, sign, part] = int(position // 30) % 12
+                else:
+                    # Only reached by rounding just below 30°; every sliced
+                    # division steps its sign linearly with the part
+                    signs[j, sign, part] = (2 * signs[j, sign, part - 1] - signs[j, sign, part - 2]) % 12
+            if cuts is not None:
+                cut_table[j, sign, :len(cuts[sign % 2])] = cuts[sign % 2]
+    modes = np.array([mode for mode, _, _ in rules])
+    is_cut = np.array([cuts is not None for _, _, cuts in rules], dtype=bool)
+    sliced = np.nonzero(np.isin(modes, (KEEP, SCALE)) & ~is_cut)[0]
+    cut = np.nonzero(is_cut)[0]
+    return {
+        "divisions": np.array(divisions, dtype=float),
+        "identity": np.nonzero(modes == IDENTITY)[0],
+        "multiply": np.nonzero(modes == MULTIPLY)[0],
+        "sliced": sliced, "slices": np.array([rules[j][1] for j in sliced], dtype=float),
+        "scale": modes[sliced] == SCALE,
+        "cut": cut, "cuts": cut_table[cut], "fixed": modes[cut] == FIXED,
+        "signs": signs,
+    }
+
+def divisional_positions(degrees, divisions=DIVISIONS):
+    """
+    Divisional longitudes (0-360) of an array of sidereal longitudes in
+    every requested division; element [i, j] equals
+    get_divisional_position(degrees[i], divisions[j]).
+
+    Returns:
+        np.ndarray of shape (len(degrees), len(divisions))
+    """
+    table = _compile(tuple(int(d) for d in divisions))
+    degrees = np.atleast_1d(np.asarray(degrees, dtype=float))
+    sign = np.trunc(degrees / 30).astype(int)
+    row = (sign % 12)[:, None]
+    deg_in_sign = np.mod(degrees, 30)[:, None]
+    out = np.empty((len(degrees), len(divisions)))
+
+    out[:, table["identity"]] = degrees[:, None]
+    columns = table["multiply"]
+    out[:, columns] = (degrees[:, None] * table["divisions"][columns]) % 360
+
+    # Equal slices: the part is int(deg_in_sign / slice), as in get_divisional_position
+    columns = table["sliced"]
+    if len(columns):
+        part = np.trunc(deg_in_sign / table["slices"])
+        new_sign = table["signs"][columns, row, part.astype(int)]
+        scaled = (deg_in_sign - part * table["slices"]) * table["divisions"][columns]
+        out[:, columns] = new_sign * 30 + np.where(table["scale"], scaled, deg_in_sign)
+
+    # Unequal parts (D2, D3, D30): count the cut points passed
+    columns = table["cut"]
+    if len(columns):
+        part = (deg_in_sign[:, :, None] >= table["cuts"][np.arange(len(columns)), row]).sum(-1) - 1
+        new_sign = table["signs"][columns, row, part]
+        out[:, columns] = np.where(table["fixed"], new_sign * 30.0, new_sign * 30 + deg_in_sign)
+    return out
+
+def divisional_signs(degrees, divisions=DIVISIONS):
+    """0-based divisional signs, shape (len(degrees), len(divisions))."""
+    return (divisional_positions(degrees, divisions) // 30).astype(int) % 12
+
+def varga_matrix(positions, divisions=DIVISIONS):
+    """
+    Planets x divisions matrix of divisional longitudes for a positions
+    dict (planet key -> sidereal longitude, 'Asc' included if present).
+
+    Returns:
+        (keys, divisions, matrix): row and column labels and the
+        (len(keys), len(divisions)) array
+    """
+    keys = list(positions)
+    divisions = tuple(divisions)
+    return keys, divisions, divisional_positions([positions[k] for k in keys], divisions)
+
+def _sign_dignity(planet, sign):
+    name = RASI_SIGNS[sign]
+    relations = PLANET_SIGN_RELATIONSHIPS.get(planet, {})
+    if sign == int(EXALTATION_POINTS[planet] // 30):
+        return EXALTED
+    if sign == int(DEBILITATION_POINTS[planet] // 30):
+        return DEBILITATED
+    if name in PLANET_OWN_SIGNS.get(planet, []):
+        return OWN
+    if name in relations.get("Friendly", []):
+        return FRIENDLY
+    if name in relations.get("Enemy", []):
+        return ENEMY
+    return NEUTRAL
+
+# planet x sign -> dignity code, from the varr tables
+DIGNITY_TABLE = np.array([[_sign_dignity(planet, sign) for sign in range(12)] for planet in DIGNITY_PLANETS])
+# Moolatrikona (sign, from, to) per planet; sign -1 where there is none
+MOOLA_TABLE = np.array([(RASI_SIGNS.index(MOOLATRIKONA_SIGNS[p][0]),) + MOOLATRIKONA_SIGNS[p][1:]
+                        if MOOLATRIKONA_SIGNS.get(p) else (-1, 0, 0) for p in DIGNITY_PLANETS], dtype=float)
+
+def dignity_matrix(positions, divisions=DIVISIONS):
+    """
+    Dignity codes (indices into DIGNITIES) of the planets in positions
+    across divisions, from one pass over the divisional sign matrix.
+
+    Dignity follows the divisional sign: exaltation sign, debilitation
+    sign, own sign, then the sign relationship. Moolatrikona needs the
+    degree, so it is only given in D1, where its range takes precedence
+    (Moon in Taurus 3-30°, Mercury in Virgo 15-20°).
+
+    Returns:
+        (planets, divisions, codes, signs): row and column labels, the
+        dignity codes and the 0-based divisional signs
+    """
+    planets = [p for p in DIGNITY_PLANETS if p in positions]
+    rows = np.array([DIGNITY_PLANETS.index(p) for p in planets], dtype=int)
+    degrees = np.array([positions[p] for p in planets], dtype=float)
+    divisions = tuple(divisions)
+    signs = divisional_signs(degrees, divisions)
+    codes = DIGNITY_TABLE[rows[:, None], signs]
+    if 1 in divisions:
+        column = divisions.index(1)
+        moola = MOOLA_TABLE[rows]
+        in_moola = ((signs[:, column] == moola[:, 0]) & (moola[:, 1] <= degrees % 30)
+                    & (degrees % 30 <= moola[:, 2]))
+        codes[in_moola, column] = MOOLATRIKONA
+    return planets, divisions, codes, signs
+
+def divisional_dignities(positions, divisions=DIVISIONS):
+    """
+    Dignity of every planet in every division, for results['div_dignities'].
+
+    Returns:
+        dict: {planet: {'D1': 'Own Sign', 'D9': 'Enemy', ...,
+        'vargottama': bool}}; vargottama is True when the D1 and D9 signs
+        are the same
+    """
+    labels = [f"D{d}" for d in divisions]
+    planets, _, codes, signs = dignity_matrix(positions, tuple(divisions) + (1, 9))
+    out = {}
+    for i, planet in enumerate(planets):
+        row = {label: DIGNITIES[code] for label, code in zip(labels, codes[i])}
+        row["vargottama"] = bool(signs[i, -2] == signs[i, -1])
+        out[planet] = row
+    return out